@@ -5,6 +5,7 @@ __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 # Click-based script for interfacing with the cci_tools library
 # to create new collections in the nested cci structure.
 from cci_tools.core.utils import client, auth, STAC_API
+from cci_tools.core.transport import stac_writes
 from cci_tools.collection.main import (
     create_project_collection,
     add_drs_collection,
@@ -130,7 +131,7 @@ def main(
     else:
         print(
             parent,
-            client.put(f"{STAC_API}/collections/{parent}", json=pdata, auth=auth),
+            stac_writes.put(f"{STAC_API}/collections/{parent}", json=pdata, auth=auth),
         )
 
 
@@ -3,6 +3,7 @@ __contact__ = "daniel.westwood@stfc.ac.uk"
 __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 
 from cci_tools.core.utils import client, auth, STAC_API, es_client
+from cci_tools.core.transport import stac_writes
 import click
 import logging
 from cci_tools.core.utils import logstream, set_verbose
@@ -170,7 +171,9 @@ def main(collection: str, child_based: bool = False, verbose: bool = False):
 
     coll_data["extent"]["spatial"]["bbox"] = bbox
     coll_data["extent"]["temporal"]["interval"] = [[start_datetime, end_datetime]]
-    resp = client.put(f"{STAC_API}/collections/{collection}", json=coll_data, auth=auth)
+    resp = stac_writes.put(
+        f"{STAC_API}/collections/{collection}", json=coll_data, auth=auth
+    )
     if str(resp.status_code)[0] != "2":
         logger.info(f"{resp.status_code}: {resp.content}")
 
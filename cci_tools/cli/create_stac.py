@@ -1,13 +1,31 @@
 import click
 import json
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+from cci_tools.core.ratelimit import artefacts_limiter
+from cci_tools.core.timing import timer
+from cci_tools.core.transport import stac_writes
 from cci_tools.core.utils import (
-    es_client,
-    get_file_query,
+    get_dir_ecvs,
     get_dir_query,
+    resolve_files,
+    scan_index,
 )
-from cci_tools.stac.create_record import handle_process_record
+from cci_tools.readers.file import load_date_patterns
+from cci_tools.readers.remote import fetch_stats, set_archive_root
+from cci_tools.readers.tileset import tile_sets
+from cci_tools.stac.create_record import (
+    clear_licence_cache,
+    extract_collection,
+    handle_process_records,
+    warm_licences,
+)
+from cci_tools.stac.journal import RecordJournal
+from cci_tools.stac.shards import ShardWriter
+from cci_tools.stac.uploader import AsyncUploader
 import logging
 from cci_tools.core.utils import logstream, set_verbose
 
@@ -17,6 +35,8 @@ logger.propagate = False
 
 ACCEPTABLE_RESPONSES = ["OK", "Excluded"]
 
+_failed_files_lock = threading.Lock()
+
 
 # Parse command line arguments using click
 @click.command()
@@ -68,6 +88,179 @@ ACCEPTABLE_RESPONSES = ["OK", "Excluded"]
 )
 @click.option("-v", "--verbose", count=True)
 @click.option("--halt", "halt", required=False, is_flag=True, help="Halt on errors")
+@click.option(
+    "--page_size",
+    "page_size",
+    required=False,
+    type=int,
+    default=1000,
+    help="Number of OpenSearch records fetched per request (up to 10000)",
+)
+@click.option(
+    "--batch_size",
+    "batch_size",
+    required=False,
+    type=int,
+    default=500,
+    help="Number of files resolved per OpenSearch request for .txt file lists",
+)
+@click.option(
+    "--refresh_licences",
+    "refresh_licences",
+    required=False,
+    is_flag=True,
+    help="Ignore cached licence URLs and fetch them again from the artefacts server",
+)
+@click.option(
+    "--resume",
+    "resume",
+    required=False,
+    is_flag=True,
+    help="Continue from the journal of a previous interrupted run",
+)
+@click.option(
+    "--journal",
+    "journal_file",
+    required=False,
+    help="Path to the run journal (default: OUTPUT_DIR/create_items_journal.ndjson)",
+)
+@click.option(
+    "--output_format",
+    "output_format",
+    required=False,
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    help="Write one JSON file per item, or append items to NDJSON shards per collection",
+)
+@click.option(
+    "--shard_size",
+    "shard_size",
+    required=False,
+    type=int,
+    default=256,
+    help="Maximum uncompressed size of each NDJSON shard in MB",
+)
+@click.option(
+    "--compression",
+    "compression",
+    required=False,
+    type=click.Choice(["none", "gzip", "zstd"]),
+    default="none",
+    help="Compression applied to NDJSON shards",
+)
+@click.option(
+    "--upload_concurrency",
+    "upload_concurrency",
+    required=False,
+    type=int,
+    default=8,
+    help="Number of concurrent uploads when OUTPUT_DIR is UPLOAD (0 to upload inline)",
+)
+@click.option(
+    "--workers",
+    "workers",
+    required=False,
+    type=int,
+    default=1,
+    help="Number of processes used to generate records in parallel",
+)
+@click.option(
+    "--date_patterns",
+    "date_patterns",
+    required=False,
+    type=click.Path(exists=True),
+    help="JSON file of per-ECV filename date patterns",
+)
+@click.option(
+    "--geotiff_threads",
+    "geotiff_threads",
+    required=False,
+    type=int,
+    default=0,
+    help="Number of threads reading GeoTIFF headers ahead of record generation",
+)
+@click.option(
+    "--netcdf_workers",
+    "--netcdf_threads",
+    "netcdf_workers",
+    required=False,
+    type=int,
+    default=0,
+    help="Fill incomplete NetCDF records from file headers, read on this many processes",
+)
+@click.option(
+    "--metadata_only",
+    "metadata_only",
+    required=False,
+    is_flag=True,
+    help="Read only the time and lat/lon extents of xarray datasets (fmt_override xarray), without loading coordinate arrays",
+)
+@click.option(
+    "--infer_tiles",
+    "infer_tiles",
+    required=False,
+    type=int,
+    default=0,
+    help="Read this many GeoTIFFs per directory in full and derive the rest from their filenames",
+)
+@click.option(
+    "--verify_rate",
+    "verify_rate",
+    required=False,
+    type=float,
+    default=0.01,
+    help="Fraction of derived GeoTIFFs still read in full to check the derived metadata",
+)
+@click.option(
+    "--archive_url",
+    "archive_url",
+    required=False,
+    help="Read archive files under this URL (e.g. https://dap.ceda.ac.uk or s3://bucket) instead of the local /neodc mount",
+)
+@click.option(
+    "--block_size",
+    "block_size",
+    required=False,
+    type=int,
+    default=256,
+    help="Size in KiB of each range request made when reading remote files",
+)
+@click.option(
+    "--parallel_configs",
+    "parallel_configs",
+    required=False,
+    type=int,
+    default=1,
+    help="Number of configurations from a CCI_DIRS file processed concurrently",
+)
+@click.option(
+    "--rate_limit",
+    "rate_limit",
+    required=False,
+    type=float,
+    help="Maximum requests per second to each of the STAC API and artefacts server",
+)
+@click.option(
+    "--max_retries",
+    "max_retries",
+    required=False,
+    type=int,
+    default=5,
+    help="Times a STAC API request is retried after a connection error or a 429/502/503/504 response",
+)
+@click.option(
+    "--timing",
+    "timing",
+    required=False,
+    is_flag=True,
+    help="Print a summary of the time spent in each stage of record generation",
+)
+@click.option(
+    "--timing_file",
+    "timing_file",
+    required=False,
+    help="Write the stage timing summary to this JSON file (implies --timing)",
+)
 def main(
     cci_dirs: str,
     output_dir: str,
@@ -77,6 +270,26 @@ def main(
     end_time: str | None = None,
     halt: bool = False,
     verbose: int = 0,
+    workers: int = 1,
+    page_size: int = 1000,
+    batch_size: int = 500,
+    refresh_licences: bool = False,
+    resume: bool = False,
+    journal_file: str = None,
+    output_format: str = "json",
+    shard_size: int = 256,
+    compression: str = "none",
+    upload_concurrency: int = 8,
+    date_patterns: str = None,
+    infer_tiles: int = 0,
+    verify_rate: float = 0.01,
+    archive_url: str = None,
+    block_size: int = 256,
+    parallel_configs: int = 1,
+    rate_limit: float = None,
+    max_retries: int = 5,
+    timing: bool = False,
+    timing_file: str = None,
     **kwargs,
 ):
     """
@@ -92,6 +305,74 @@ def main(
 
     exclusion = exclusion or "uf8awhjidaisdf8sd"
 
+    if refresh_licences:
+        clear_licence_cache()
+
+    timer.enabled = timing or timing_file is not None
+
+    if date_patterns is not None:
+        load_date_patterns(date_patterns)
+
+    set_archive_root(archive_url, block_size=block_size * 1024)
+    tile_sets.configure(infer_tiles, verify_rate)
+
+    stac_writes.configure(max_retries=max_retries, max_rate=rate_limit)
+    artefacts_limiter.set_rate(rate_limit)
+
+    if journal_file is None:
+        journal_dir = "." if output_dir == "UPLOAD" else output_dir
+        journal_file = f"{journal_dir}/create_items_journal.ndjson"
+    journal = RecordJournal(journal_file, resume=resume)
+
+    writer = None
+    if output_format == "ndjson" and output_dir != "UPLOAD":
+        writer = ShardWriter(
+            output_dir,
+            max_bytes=shard_size * 1024 * 1024,
+            compression=None if compression == "none" else compression,
+            resume=resume,
+        )
+        kwargs["writer"] = writer.write
+        # Shards are synced before the journal commits the items written to them
+        journal.add_sync_hook(writer.sync)
+
+    try:
+        run_configurations(
+            cci_dirs,
+            output_dir,
+            output_drs,
+            journal,
+            exclusion=exclusion,
+            start_time=start_time,
+            end_time=end_time,
+            halt=halt,
+            workers=workers,
+            page_size=page_size,
+            batch_size=batch_size,
+            upload_concurrency=upload_concurrency,
+            parallel_configs=parallel_configs,
+            **kwargs,
+        )
+    finally:
+        journal.close()
+        if writer is not None:
+            with timer.stage("write"):
+                writer.close()
+        if timer.enabled:
+            timer.report(timing_file)
+        fetch_stats.report()
+        tile_sets.report()
+        stac_writes.report()
+
+
+def load_configurations(cci_dirs: str, output_drs: str = None) -> list:
+    """
+    Expand ``cci_dirs`` into a list of ``(cci_dir, output_drs, splitter)`` configurations.
+
+    ``cci_dirs`` is either a single directory/file or a file of ``dir,drs,splitter``
+    lines, where a DRS or splitter given on one line carries over to the lines below.
+    """
+
     splitter = None
 
     if os.path.isfile(cci_dirs):
@@ -100,6 +381,7 @@ def main(
     else:
         cci_configurations = [[cci_dirs]]
 
+    configurations = []
     for cfg in cci_configurations:
 
         cci_dir = cfg[0]
@@ -112,110 +394,284 @@ def main(
             else:
                 splitter = cfg[2]
 
-        print(f"Input CCI directory: {cci_dir}")
-        print(f"Output STAC record directory: {output_dir}")
-        print(f"Using DRS: {output_drs}")
+        configurations.append((cci_dir, output_drs, splitter))
+    return configurations
 
-        # Loop over OpenSearch records, converting each to STAC format
-        failed_list = []
-        count_success, count_fail = 0, 0
-        is_last = False
 
-        if os.path.isfile(cci_dir):
-            if cci_dir.endswith(".txt"):
-                with open(cci_dir) as f:
-                    fileset = [r.strip() for r in f.readlines()]
-            else:
-                fileset = [cci_dir]
-
-            for file in fileset:
-                body = get_file_query(file)
-                hits = es_client.search(index="opensearch-files", body=body)["hits"][
-                    "hits"
-                ]
-
-                if len(hits) == 0:
-                    print("")
-                    print(f"{file}: Not found in Opensearch")
-                    count_fail += 1
-                    continue
-
-                record = hits[0]
-                response = handle_process_record(
-                    record,
-                    output_dir,
-                    exclusion=exclusion,
-                    drs=output_drs,
-                    splitter=splitter,
-                    start_time=start_time,
-                    end_time=end_time,
-                    halt=halt,
-                    **kwargs,
-                )
-
-                if response not in ACCEPTABLE_RESPONSES:
-                    failed_list.append(f"{file}:{response}")
-                    count_fail += 1
-                else:
-                    count_success += 1
-        else:
-            # Multi-File Query
-            body = get_dir_query(cci_dir)
-            hits = es_client.search(index="opensearch-files", body=body)["hits"]["hits"]
-            if len(hits) == 0:
-                print("")
-                print(f"{cci_dir}: No OpenSearch hits found!")
-                continue
-
-            while len(hits) == 10 or not is_last:
-                if len(hits) != 10:
-                    is_last = True
-                for record in hits:
-                    response = handle_process_record(
-                        record,
-                        output_dir,
-                        exclusion=exclusion,
-                        drs=output_drs,
-                        splitter=splitter,
-                        start_time=start_time,
-                        end_time=end_time,
-                        halt=halt,
-                        **kwargs,
-                    )
-                    file = record["_source"]["info"]["name"]
-                    if response not in ACCEPTABLE_RESPONSES:
-                        failed_list.append(f"{file}:{response}")
-                        count_fail += 1
-                    else:
-                        count_success += 1
-
-                searchAfter = hits[-1]["sort"]
-                body["search_after"] = searchAfter
-                response = es_client.search(index="opensearch-files", body=body)
-                hits = response["hits"]["hits"]
-                if len(hits) == 0:
-                    is_last = True
-
-        if len(failed_list) > 0:
-            try:
-                output_failed_files = f"{output_dir}/failed_files_{record["_source"]["projects"]["opensearch"]["datasetId"]}.txt"
-            except:
-                output_failed_files = f"{output_dir}/failed_files-no_datasetID.txt"
+def run_configurations(
+    cci_dirs: str,
+    output_dir: str,
+    output_drs: str,
+    journal: RecordJournal,
+    parallel_configs: int = 1,
+    **kwargs,
+):
+    """
+    Create STAC records for each configuration (directory, DRS and splitter) given
+    by ``cci_dirs``, recording each processed record in the journal.
+
+    With ``parallel_configs > 1`` up to that many configurations are processed at
+    once, sharing the ES client and the STAC API and artefacts rate limits. Worker
+    process pools running at the same time split the limits between them.
+    """
+
+    configurations = load_configurations(cci_dirs, output_drs)
+    failed_files = set()
+    if parallel_configs > 1 and len(configurations) > 1:
+        kwargs["pool_share"] = 1 / min(parallel_configs, len(configurations))
+
+    def run(configuration):
+        cci_dir, output_drs, splitter = configuration
+        return run_configuration(
+            cci_dir,
+            output_dir,
+            output_drs,
+            journal,
+            splitter=splitter,
+            failed_files=failed_files,
+            **kwargs,
+        )
+
+    if parallel_configs > 1 and len(configurations) > 1:
+        with ThreadPoolExecutor(max_workers=parallel_configs) as pool:
+            summaries = list(pool.map(run, configurations))
+    else:
+        summaries = [run(configuration) for configuration in configurations]
 
-            with open(output_failed_files, "w") as file:
-                for item in failed_list:
-                    file.write(item + "\n")
+    if len(summaries) > 1:
+        print("Summary of all configurations:")
+        for summary in summaries:
             print(
-                f"The list of files for which STAC records could not be created, or that were created but are incomplete, have been written to the following file:"
+                f"{summary['cci_dir']} ({summary['drs']}): "
+                f"{summary['success']} created, {summary['fail']} failed"
             )
-            print(output_failed_files)
+        print("")
+        print(
+            f"Total STAC records created successfully: "
+            f"{sum(s['success'] for s in summaries)}"
+        )
+        print(f"Total STAC records that failed: {sum(s['fail'] for s in summaries)}")
+        print("")
+
+    return summaries
+
+
+def run_configuration(
+    cci_dir: str,
+    output_dir: str,
+    output_drs: str,
+    journal: RecordJournal,
+    splitter: dict | str = None,
+    exclusion: str = None,
+    start_time: str = None,
+    end_time: str = None,
+    halt: bool = False,
+    workers: int = 1,
+    page_size: int = 1000,
+    batch_size: int = 500,
+    upload_concurrency: int = 0,
+    failed_files: set = None,
+    **kwargs,
+) -> dict:
+    """
+    Create STAC records for a single directory or file list, returning a summary of
+    the records created and failed.
+
+    ``failed_files`` holds the failed-files outputs already claimed in this run, so
+    that configurations never overwrite each other's list of failures.
+    """
+
+    print(f"Input CCI directory: {cci_dir}")
+    print(f"Output STAC record directory: {output_dir}")
+    print(f"Using DRS: {output_drs}")
+
+    # Loop over OpenSearch records, converting each to STAC format
+    failed_list = []
+    count_success, count_fail = 0, 0
+    record = None
+    found_records = False
+
+    # Restore the outcomes of records committed by a previous run
+    config_key = f"{cci_dir},{output_drs}"
+    completed = journal.completed(config_key)
+    for entry in completed:
+        if entry["outcome"] not in ACCEPTABLE_RESPONSES:
+            failed_list.append(f"{entry['label']}:{entry['outcome']}")
+            count_fail += 1
+        else:
+            count_success += 1
+    completed_ids = {entry["id"] for entry in completed}
+    if len(completed) > 0:
+        found_records = True
+        print(f"Resuming after {len(completed)} previously processed records")
+
+    if os.path.isfile(cci_dir):
+        if cci_dir.endswith(".txt"):
+            with open(cci_dir) as f:
+                fileset = [r.strip() for r in f.readlines() if r.strip()]
+        else:
+            fileset = [cci_dir]
+
+        completed_labels = {entry["label"] for entry in completed}
+        fileset = [file for file in fileset if file not in completed_labels]
+
+        resolved, missing = resolve_files(fileset, batch_size=batch_size)
+        if len(missing) > 0:
             print("")
+            print(f"{len(missing)} of {len(fileset)} files not found in Opensearch:")
+            for file in missing:
+                print(f"{file}: Not found in Opensearch")
+            count_fail += len(missing)
+
+        ecvs = set()
+        for _, hit in resolved:
+            try:
+                ecvs.add(extract_collection(hit["_source"]))
+            except Exception:
+                pass
+        try:
+            warm_licences(ecvs)
+        except Exception as err:
+            logger.warning(f"Unable to pre-resolve licences: {err}")
+
+        records = iter(resolved)
+
+    else:
+        # Multi-File Query
+        body = get_dir_query(cci_dir)
+        search_after = journal.resume_after(config_key)
+        if search_after is not None:
+            body["search_after"] = search_after
+
+        try:
+            warm_licences(get_dir_ecvs(cci_dir))
+        except Exception as err:
+            logger.warning(f"Unable to pre-resolve licences: {err}")
 
+        records = (
+            (hit["_source"]["info"]["name"], hit)
+            for hit in scan_index(body, page_size=page_size)
+            if hit["_id"] not in completed_ids
+        )
+
+    # Uploaded records are only counted, and journalled, once the STAC API has
+    # responded. Records wait in scan order so that the journal only ever holds a
+    # prefix of the scan for ``--resume`` to continue from.
+    uploader = None
+    config_kwargs = kwargs
+    submitted = []
+    if output_dir == "UPLOAD" and upload_concurrency > 0:
+        uploader = AsyncUploader(concurrency=upload_concurrency)
+
+        def submit(stac_dict: dict):
+            submitted.append(stac_dict["id"])
+            uploader.submit(stac_dict)
+
+        config_kwargs = {**kwargs, "writer": submit}
+
+    waiting = deque()
+    uploads = {}
+
+    def commit():
+        nonlocal count_success, count_fail
+        while waiting and waiting[0]["uploads"] == 0:
+            entry = waiting.popleft()
+            file, response = entry["file"], entry["response"]
+            journal.write(config_key, entry["record"], file, response)
+            if response not in ACCEPTABLE_RESPONSES:
+                failed_list.append(f"{file}:{response}")
+                count_fail += 1
+            else:
+                count_success += 1
+
+    def count_uploads(outcomes):
+        for item_id, outcome, _ in outcomes:
+            entry = uploads[item_id].popleft()
+            if not uploads[item_id]:
+                del uploads[item_id]
+            if outcome != "OK":
+                entry["response"] = outcome
+            entry["uploads"] -= 1
+        commit()
+
+    for file, record, response in handle_process_records(
+        records,
+        output_dir,
+        workers=workers,
+        exclusion=exclusion,
+        drs=output_drs,
+        splitter=splitter,
+        start_time=start_time,
+        end_time=end_time,
+        halt=halt,
+        **config_kwargs,
+    ):
+        found_records = True
+        entry = {
+            "record": record,
+            "file": file,
+            "response": response,
+            "uploads": len(submitted),
+        }
+        for item_id in submitted:
+            uploads.setdefault(item_id, deque()).append(entry)
+        submitted.clear()
+        waiting.append(entry)
+
+        if uploader is not None:
+            count_uploads(uploader.results())
+        else:
+            commit()
+
+    if uploader is not None:
+        count_uploads(uploader.close())
+
+    summary = {
+        "cci_dir": cci_dir,
+        "drs": output_drs,
+        "success": count_success,
+        "fail": count_fail,
+        "failed_files": None,
+    }
+
+    if not found_records and not os.path.isfile(cci_dir):
         print("")
-        print(f"No. of STAC records created successfully: {count_success}")
-        print(f"No. of STAC records that failed: {count_fail}")
+        print(f"{cci_dir}: No OpenSearch hits found!")
+        return summary
+
+    if len(failed_list) > 0:
+        try:
+            output_failed_files = f"{output_dir}/failed_files_{record['_source']['projects']['opensearch']['datasetId']}"
+        except:
+            output_failed_files = f"{output_dir}/failed_files-no_datasetID"
+
+        if failed_files is None:
+            failed_files = set()
+        with _failed_files_lock:
+            name, n = output_failed_files, 1
+            while name in failed_files:
+                name = f"{output_failed_files}-{n}"
+                n += 1
+            failed_files.add(name)
+        output_failed_files = f"{name}.txt"
+        summary["failed_files"] = output_failed_files
+
+        with open(output_failed_files, "w") as file:
+            for item in failed_list:
+                file.write(item + "\n")
+        print(
+            f"The list of files for which STAC records could not be created, or that were created but are incomplete, have been written to the following file:"
+        )
+        print(output_failed_files)
         print("")
 
+    print("")
+    print(f"No. of STAC records created successfully: {count_success}")
+    print(f"No. of STAC records that failed: {count_fail}")
+    print("")
+
+    return summary
+
 
 if __name__ == "__main__":
     main()
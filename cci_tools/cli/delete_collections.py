@@ -3,9 +3,9 @@ __contact__ = "daniel.westwood@stfc.ac.uk"
 __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 
 import click
-from time import sleep
 
 from cci_tools.core.utils import STAC_API, client, auth
+from cci_tools.core.transport import stac_writes
 import logging
 from cci_tools.core.utils import logstream, set_verbose
 
@@ -37,8 +37,7 @@ def remove_items(item_url, dryrun=True, item_aggregations=False):
             print(f'DELETE {item_url}/{item["id"]}')
             if not dryrun:
                 deleted_items = True
-                print(client.delete(f'{item_url}/{item["id"]}', auth=auth))
-                sleep(0.1)
+                print(stac_writes.delete(f'{item_url}/{item["id"]}', auth=auth))
 
         if dryrun:
             return
@@ -96,7 +95,7 @@ def recursive_removal(
     if not lowest_only or (lowest_only and not has_children):
         print(f'DELETE {collection.split("/")[-1]}')
         if not dryrun:
-            client.delete(collection, auth=auth)
+            stac_writes.delete(collection, auth=auth)
 
 
 DEPTHS_EXPLAINED = ["CCI", "Project", "Moles-Record", "DRS"]
@@ -131,6 +130,21 @@ DEPTHS_EXPLAINED = ["CCI", "Project", "Moles-Record", "DRS"]
     type=int,
     help="Delete collections at a certain depth in the nested collection set.",
 )
+@click.option(
+    "--rate_limit",
+    "rate_limit",
+    required=False,
+    type=float,
+    help="Maximum requests per second to the STAC API",
+)
+@click.option(
+    "--max_retries",
+    "max_retries",
+    required=False,
+    type=int,
+    default=5,
+    help="Times a request is retried after a connection error or a 429/502/503/504 response",
+)
 @click.option("-v", "--verbose", count=True)
 def main(
     collection: str,
@@ -141,6 +155,8 @@ def main(
     lowest_only=False,
     realrun=False,
     delete_depth=None,
+    rate_limit: float = None,
+    max_retries: int = 5,
     verbose: int = 0,
 ):
     """
@@ -154,6 +170,8 @@ def main(
     set_verbose(verbose)
     dryrun = not realrun
 
+    stac_writes.configure(max_retries=max_retries, max_rate=rate_limit)
+
     if parent and not lowest_only and keep_collections:
         parent_data = client.get(f"{STAC_API}/collections/{parent}").json()
         # Remove collection link from parent
@@ -165,7 +183,7 @@ def main(
                 print(f"Removing {collection} from {parent} (parent)")
         parent_data["links"] = new_links
 
-        client.put(f"{STAC_API}/collections/{parent}", json=parent_data, auth=auth)
+        stac_writes.put(f"{STAC_API}/collections/{parent}", json=parent_data, auth=auth)
 
     # Generate warnings
     if not dryrun:
@@ -201,6 +219,7 @@ def main(
         delete_depth=delete_depth,
         item_aggregations=item_aggregations,
     )
+    stac_writes.report()
 
 
 if __name__ == "__main__":
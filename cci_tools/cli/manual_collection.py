@@ -5,6 +5,7 @@ __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 # Update an existing collection
 
 from cci_tools.core.utils import client, auth, STAC_API
+from cci_tools.core.transport import stac_writes
 from cci_tools.collection.main import remove_duplicate_links
 import click
 import json
@@ -62,7 +63,9 @@ def main(collection_file: str, parent: str = None, verbose: int = 0):
 
             parent_data["links"] = remove_duplicate_links(parent_data["links"])
 
-            client.put(f"{STAC_API}/collections/{parent}", json=parent_data, auth=auth)
+            stac_writes.put(
+                f"{STAC_API}/collections/{parent}", json=parent_data, auth=auth
+            )
 
         with open(collection_file) as f:
             collection_data = json.loads(
@@ -72,11 +75,11 @@ def main(collection_file: str, parent: str = None, verbose: int = 0):
             )
 
         if post:
-            resp = client.post(
+            resp = stac_writes.post(
                 f"{STAC_API}/collections", json=collection_data, auth=auth
             )
         else:
-            resp = client.put(
+            resp = stac_writes.put(
                 f"{STAC_API}/collections/{collection}", json=collection_data, auth=auth
             )
         logger.info(f"Response for {collection}: {resp}")
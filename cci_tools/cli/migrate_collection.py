@@ -1,6 +1,7 @@
 import click
 
 from cci_tools.core.utils import STAC_API, client, auth
+from cci_tools.core.transport import stac_writes
 from cci_tools.collection.main import remove_duplicate_links
 import logging
 from cci_tools.core.utils import logstream, set_verbose
@@ -39,7 +40,7 @@ def main(collection_name: str, parent: str, new_parent: str = None, verbose: int
 
         parent_data["links"] = remove_duplicate_links(new_links)
         logger.info(
-            f"Old: {client.put(f'{STAC_API}/collections/{parent}', json=parent_data, auth=auth)}"
+            f"Old: {stac_writes.put(f'{STAC_API}/collections/{parent}', json=parent_data, auth=auth)}"
         )
 
     # Add to migration location (if applicable)
@@ -57,7 +58,7 @@ def main(collection_name: str, parent: str, new_parent: str = None, verbose: int
         new_parent_data["links"] = remove_duplicate_links(new_parent_data["links"])
 
         logger.info(
-            f"New: {client.put(f'{STAC_API}/collections/{new_parent}', json=new_parent_data, auth=auth)}"
+            f"New: {stac_writes.put(f'{STAC_API}/collections/{new_parent}', json=new_parent_data, auth=auth)}"
         )
 
 
@@ -8,9 +8,11 @@ import xarray as xr
 import json
 from typing import Union
 
+from cci_tools.readers.consolidated import ConsolidatedMetadata, open_consolidated
 from cci_tools.stac.create_record import process_record
 from cci_tools.collection.openeo import openeo_collection
-from cci_tools.core.utils import STAC_API, client, auth
+from cci_tools.core.utils import STAC_API, auth
+from cci_tools.core.transport import stac_writes
 import logging
 from cci_tools.core.utils import logstream, set_verbose
 
@@ -24,8 +26,34 @@ logger.propagate = False
 KNOWN_PROPERTIES = ["product_version", "project", "sensor"]
 
 
+def read_variables(
+    endpoint: str, engine: str, metadata: ConsolidatedMetadata | None
+) -> tuple[dict, dict]:
+    """
+    Global attributes and ``{variable: (shape, attrs)}`` for an aggregation, from
+    its consolidated metadata where possible, otherwise by opening it with xarray.
+    """
+    if metadata is not None:
+        variables = {
+            name: (var.shape, var.attrs) for name, var in metadata.variables.items()
+        }
+        return metadata.attrs, variables
+
+    with xr.open_dataset(endpoint, engine=engine) as ds:
+        variables = {
+            name: (var.shape, dict(var.attrs)) for name, var in ds.variables.items()
+        }
+        return dict(ds.attrs), variables
+
+
 def apply_openeo_reqs_for_item(
-    endpoint, did, ecv, moles_uuid, engine, license: Union[str, None] = None
+    endpoint,
+    did,
+    ecv,
+    moles_uuid,
+    engine,
+    license: Union[str, None] = None,
+    metadata: ConsolidatedMetadata = None,
 ):
 
     # Add parameters
@@ -44,6 +72,8 @@ def apply_openeo_reqs_for_item(
         openeo=True,
         fmt_override=f"xarray|{engine}",
         collections=["cci_openeo", did],
+        metadata_only=True,
+        consolidated=metadata,
     )
 
     item_record["properties"]["license"] = license
@@ -104,25 +134,28 @@ def main(
 
     license = "other"  # xarray license not valid stac
 
+    # Read once for both the item and the collection
+    metadata = open_consolidated(endpoint)
+
     item_record = apply_openeo_reqs_for_item(
-        endpoint, did, ecv, moles_uuid, engine, license=license
+        endpoint, did, ecv, moles_uuid, engine, license=license, metadata=metadata
     )
 
-    ds = xr.open_dataset(endpoint, engine=engine)
+    attrs, variables = read_variables(endpoint, engine, metadata)
     summary_bands = {}
     alt_shape = 0
     cube_variables = []
-    for v in ds.variables:
-        if len(ds.variables[v].shape) == 1:
+    for v, (shape, var_attrs) in variables.items():
+        if len(shape) == 1:
             pass
         else:
             if alt_shape == 0:
-                alt_shape = len(ds.variables[v].shape)
+                alt_shape = len(shape)
 
-            if not (len(ds.variables[v].shape) != alt_shape or "bnds" in v):
+            if not (len(shape) != alt_shape or "bnds" in v):
                 summary_bands[v] = {
-                    "long_name": ds.variables[v].attrs.get("long_name", v),
-                    "description": ds.variables[v].attrs.get("long_name", v),
+                    "long_name": var_attrs.get("long_name", v),
+                    "description": var_attrs.get("long_name", v),
                 }
                 cube_variables.append(v)
 
@@ -132,20 +165,20 @@ def main(
     item_record["properties"]["cube:variables"] = {v: {} for v in cube_variables}
 
     for prop in KNOWN_PROPERTIES:
-        if prop in ds.attrs:
-            item_record["properties"][prop] = ds.attrs.get(prop)
+        if prop in attrs:
+            item_record["properties"][prop] = attrs.get(prop)
 
     keywords = []
-    if hasattr(ds, "keywords"):
-        keywords = [k.strip() for k in ds.keywords.split(">")]
+    if "keywords" in attrs:
+        keywords = [k.strip() for k in attrs["keywords"].split(">")]
 
     collection_record = openeo_collection(
         did.lower() + ".openeo",
-        ds.attrs.get("summary", None),
+        attrs.get("summary", None),
         [item_record["bbox"]],
         item_record["properties"]["start_datetime"],
         item_record["properties"]["end_datetime"],
-        ds.title,
+        attrs["title"],
         moles_uuid=moles_uuid,
         keywords=did.split("-") + keywords,
         summary_bands=summary_bands,
@@ -168,22 +201,24 @@ def main(
     else:
         logger.info(f"collection: {collection_record['id']}")
         # Post the collection, then the item
-        resp = client.post(f"{STAC_API}/collections", json=collection_record, auth=auth)
+        resp = stac_writes.post(
+            f"{STAC_API}/collections", json=collection_record, auth=auth
+        )
         if str(resp.status_code) == "409":
-            resp = client.put(
+            resp = stac_writes.put(
                 f'{STAC_API}/collections/{collection_record["id"]}',
                 json=collection_record,
                 auth=auth,
             )
         logger.info(f"Collection response: {resp}")
 
-        resp = client.post(
+        resp = stac_writes.post(
             f"{STAC_API}/collections/{did.lower()}.openeo/items",
             json=item_record,
             auth=auth,
         )
         if str(resp.status_code) == "409":
-            resp = client.put(
+            resp = stac_writes.put(
                 f'{STAC_API}/collections/{did.lower()}.openeo/items/{item_record["id"]}',
                 json=item_record,
                 auth=auth,
@@ -1,7 +1,9 @@
 import click
 import glob
 
-from cci_tools.stac.post_record import post_records
+from cci_tools.core.transport import stac_writes
+from cci_tools.stac.manifest import PostManifest
+from cci_tools.stac.post_record import fetch_item, post_records
 from cci_tools.core.utils import client, auth
 import logging
 from cci_tools.core.utils import logstream, set_verbose
@@ -16,8 +18,87 @@ logger.propagate = False
 @click.option(
     "--openeo", help="Flag for enabling openEO-specific posting rules", is_flag=True
 )
+@click.option(
+    "--batch_size",
+    "batch_size",
+    required=False,
+    type=int,
+    default=0,
+    help="Send items in batches of this size per collection through the bulk items endpoint",
+)
+@click.option(
+    "--concurrency",
+    "concurrency",
+    required=False,
+    type=int,
+    default=1,
+    help="Number of item requests in flight at once",
+)
+@click.option(
+    "--collection_concurrency",
+    "collection_concurrency",
+    required=False,
+    type=int,
+    help="Maximum item requests in flight for any one collection (default --concurrency)",
+)
+@click.option(
+    "--prefetch_existing",
+    "prefetch_existing",
+    required=False,
+    is_flag=True,
+    help="Fetch existing item ids per collection first, to update existing items without a failed POST",
+)
+@click.option(
+    "--manifest",
+    "manifest_file",
+    required=False,
+    help="SQLite manifest of posted item hashes (default POST_DIRECTORY/post_items_manifest.sqlite)",
+)
+@click.option(
+    "--force",
+    "force",
+    required=False,
+    is_flag=True,
+    help="Post every item, even if unchanged since it was last posted",
+)
+@click.option(
+    "--verify_remote",
+    "verify_remote",
+    required=False,
+    type=int,
+    default=0,
+    help="Compare this many manifest items per collection with the live items first, reposting collections that differ",
+)
+@click.option(
+    "--rate_limit",
+    "rate_limit",
+    required=False,
+    type=float,
+    help="Maximum requests per second to the STAC API",
+)
+@click.option(
+    "--max_retries",
+    "max_retries",
+    required=False,
+    type=int,
+    default=5,
+    help="Times a request is retried after a connection error or a 429/502/503/504 response",
+)
 @click.option("-v", "--verbose", count=True)
-def main(post_directory, openeo: bool = False, verbose: int = 0):
+def main(
+    post_directory,
+    openeo: bool = False,
+    batch_size: int = 0,
+    concurrency: int = 1,
+    collection_concurrency: int = None,
+    prefetch_existing: bool = False,
+    manifest_file: str = None,
+    force: bool = False,
+    verify_remote: int = 0,
+    rate_limit: float = None,
+    max_retries: int = 5,
+    verbose: int = 0,
+):
 
     set_verbose(verbose)
 
@@ -26,7 +107,28 @@ def main(post_directory, openeo: bool = False, verbose: int = 0):
         with open(path_file) as f:
             post_directory = [r.strip() for r in f.readlines()][int(post_directory)]
 
-    post_records(post_directory, openeo)
+    stac_writes.configure(max_retries=max_retries, max_rate=rate_limit)
+
+    manifest = PostManifest(
+        manifest_file or f"{post_directory}/post_items_manifest.sqlite", force=force
+    )
+    try:
+        if verify_remote > 0 and not force:
+            manifest.verify_remote(fetch_item, verify_remote)
+
+        post_records(
+            post_directory,
+            None,
+            openeo=openeo,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            collection_concurrency=collection_concurrency,
+            prefetch_existing=prefetch_existing,
+            manifest=manifest,
+        )
+    finally:
+        manifest.close()
+        stac_writes.report()
 
 
 if __name__ == "__main__":
@@ -20,6 +20,7 @@ from elasticsearch import Elasticsearch
 
 from cci_tools.collection.main import create_project_collection, remove_duplicate_links
 from cci_tools.core.utils import client, auth, STAC_API
+from cci_tools.core.transport import stac_writes
 
 import os
 import click
@@ -55,13 +56,13 @@ def main(dryrun):
 
     if not dryrun:
         if exists:
-            response = client.put(
+            response = stac_writes.put(
                 f"{STAC_API}/collections/cci",
                 json=cci,
                 auth=auth,
             )
         else:
-            response = client.post(
+            response = stac_writes.post(
                 f"{STAC_API}/collections",
                 json=cci,
                 auth=auth,
@@ -6,6 +6,7 @@ import json
 import copy
 import requests
 from cci_tools.core.utils import client, auth, STAC_API, COLLECTION_TEMPLATE, logstream
+from cci_tools.core.transport import stac_writes
 
 from cci_tools.elasticsearch import (
     uuids_per_project,
@@ -229,13 +230,13 @@ def add_drs_collection(
         if exists:
             response = "Skipped"
             if overwrite:
-                response = client.put(
+                response = stac_writes.put(
                     f"{STAC_API}/collections/{id.lower()}",
                     json=drs_stac,
                     auth=auth,
                 )
         else:
-            response = client.post(
+            response = stac_writes.post(
                 f"{STAC_API}/collections",
                 json=drs_stac,
                 auth=auth,
@@ -403,13 +404,13 @@ def add_uuid_collection(
         if exists:
             response = "Skipped"
             if overwrite:
-                response = client.put(
+                response = stac_writes.put(
                     f"{STAC_API}/collections/{id}",
                     json=moles_stac,
                     auth=auth,
                 )
         else:
-            response = client.post(
+            response = stac_writes.post(
                 f"{STAC_API}/collections",
                 json=moles_stac,
                 auth=auth,
@@ -552,14 +553,14 @@ def create_project_collection(
         if exists:
             response = "Skipped"
             if overwrite:
-                response = client.put(
+                response = stac_writes.put(
                     f"{STAC_API}/collections/{id}",
                     json=project_coll,
                     auth=auth,
                 )
 
         else:
-            response = client.post(
+            response = stac_writes.post(
                 f"{STAC_API}/collections",
                 json=project_coll,
                 auth=auth,
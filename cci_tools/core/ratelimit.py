@@ -0,0 +1,59 @@
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Space out requests to a service to at most ``rate`` per second.
+
+    Each caller reserves the next free slot under a lock and then waits for it, so
+    the limit holds across threads and event loops sharing the limiter. A ``rate``
+    of ``None`` or 0 disables the limit, although requests can still be held back
+    with ``hold``.
+    """
+
+    def __init__(self, rate: float = None):
+        self.set_rate(rate)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float | None):
+        self.rate = rate
+        self._interval = 1 / rate if rate else 0.0
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+            return slot - now
+
+    def hold(self, seconds: float):
+        """
+        Hold back every request for ``seconds``, e.g. as asked by a server."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+    def acquire(self):
+        if not self._interval and self._next <= time.monotonic():
+            return
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        if not self._interval and self._next <= time.monotonic():
+            return
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Process-wide limits shared by every configuration of a run
+stac_limiter = RateLimiter()
+artefacts_limiter = RateLimiter()
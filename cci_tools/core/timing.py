@@ -0,0 +1,120 @@
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import json
+import math
+import threading
+import time
+from array import array
+from contextlib import nullcontext
+
+_NO_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of sorted values, for ``pct`` between 0 and 1."""
+    return values[max(math.ceil(pct * len(values)) - 1, 0)]
+
+
+class StageTimer:
+    """
+    Collect wall-clock durations for named stages of the record pipeline.
+
+    Stages are timed with ``with timer.stage(name):``, which does nothing while the
+    timer is disabled. Samples from other processes can be moved across with
+    ``drain`` and ``merge``. Samples may be added from any thread.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = array("d")
+            self._samples[name].append(seconds)
+
+    def drain(self) -> dict:
+        """
+        Return the samples collected so far and reset the timer."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            self._samples = {}
+        return samples
+
+    def merge(self, samples: dict):
+        with self._lock:
+            for name, values in samples.items():
+                if name not in self._samples:
+                    self._samples[name] = array("d")
+                self._samples[name].extend(values)
+
+    def summary(self) -> dict:
+        """
+        Per-stage count, total, p50, p95 and max in seconds."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+
+        summary = {}
+        for name, values in samples.items():
+            if len(values) == 0:
+                continue
+            summary[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": values[-1],
+            }
+        return summary
+
+    def report(self, output_file: str = None):
+        """
+        Print the stage summary, slowest stage first, and optionally write it as JSON."""
+        summary = self.summary()
+
+        if output_file is not None:
+            with open(output_file, "w") as f:
+                json.dump(summary, f, indent=2)
+
+        if len(summary) == 0:
+            return
+
+        print("")
+        print(
+            f"{'Stage':<20} {'Count':>9} {'Total (s)':>11} {'p50 (ms)':>10} "
+            f"{'p95 (ms)':>10} {'Max (ms)':>10}"
+        )
+        for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["total"]):
+            print(
+                f"{name:<20} {s['count']:>9} {s['total']:>11.2f} {s['p50'] * 1e3:>10.2f} "
+                f"{s['p95'] * 1e3:>10.2f} {s['max'] * 1e3:>10.2f}"
+            )
+        print("")
+
+
+# Shared timer for the create_items pipeline, enabled by ``--timing``
+timer = StageTimer()
@@ -0,0 +1,468 @@
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import asyncio
+import email.utils
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from cci_tools.core.ratelimit import RateLimiter, stac_limiter
+from cci_tools.core.utils import client
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Responses worth retrying: throttling, and gateways or servers briefly unavailable
+RETRY_STATUS = {429, 502, 503, 504}
+
+# Responses asking the client to slow down
+THROTTLE_STATUS = {429, 503}
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """
+    Seconds to wait from a ``Retry-After`` header, given as seconds or an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+# Collection and item ids in STAC API paths, left out of endpoint names
+ENDPOINT_IDS = [
+    (re.compile(r"/collections/[^/]+"), "/collections/*"),
+    (re.compile(r"/items/[^/]+$"), "/items/*"),
+]
+
+
+def _endpoint(method: str, url: str) -> str:
+    """
+    Method and path of a request with collection and item ids replaced by ``*``,
+    such as ``PUT /collections/*/items/*``."""
+    path = httpx.URL(url).path
+    for pattern, replacement in ENDPOINT_IDS:
+        path = pattern.sub(replacement, path)
+    return f"{method} {path}"
+
+
+def _is_error(response: httpx.Response | None) -> bool:
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _LatencyFilter:
+    """
+    Smoothed latency of one endpoint, and its lowest value over the last
+    ``window`` seconds, taken as the latency without congestion."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.latency = None
+        # (time, latency) with increasing latencies, so the first is the minimum
+        self._minima = deque()
+
+    def add(self, now: float, seconds: float) -> float:
+        """
+        Add a response time, returning the lowest smoothed latency in the window."""
+        self.latency = (
+            seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        )
+        while self._minima and self._minima[-1][1] >= self.latency:
+            self._minima.pop()
+        self._minima.append((now, self.latency))
+        while self._minima[0][0] < now - self.window:
+            self._minima.popleft()
+        return self._minima[0][1]
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease control of the request rate and the
+    number of requests in flight.
+
+    Each successful response raises the concurrency limit by ``1 / limit`` (so by
+    one per round of requests) while that limit is in use, and the rate by
+    ``increase / rate`` (so by ``increase`` requests per second, every second), up to
+    twice the recent throughput. Both are multiplied by ``decrease`` on congestion:
+    a throttling response, an error rate above ``error_threshold`` over the last
+    ``window`` responses, or a smoothed latency of successful responses from an
+    endpoint more than ``latency_factor`` times its lowest over the last
+    ``baseline_window`` seconds.
+    Latency alone never lowers the rate below the recent throughput, as a slow
+    endpoint is relieved by fewer requests in flight. Decreases are at least one
+    smoothed latency (and one second) apart, so one burst of errors only counts
+    once.
+
+    Without ``max_rate`` or ``max_concurrency`` that value is unlimited until the
+    first congestion, when it is set from the recent throughput or the requests in
+    flight. Concurrency is only limited for requests entering with ``enter`` or
+    ``aenter``; the rate is applied to ``limiter``.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        max_rate: float = None,
+        max_concurrency: int = None,
+        adaptive: bool = True,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        min_rate: float = 0.5,
+        error_threshold: float = 0.1,
+        latency_factor: float = 3.0,
+        window: int = 50,
+        baseline_window: float = 60.0,
+    ):
+        self.limiter = limiter
+        self.increase = increase
+        self.decrease = decrease
+        self.min_rate = min_rate
+        self.error_threshold = error_threshold
+        self.latency_factor = latency_factor
+        self.window = window
+        self.baseline_window = baseline_window
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._in_flight = 0
+        self.configure(max_rate, max_concurrency, adaptive)
+
+    def configure(
+        self,
+        max_rate: float = None,
+        max_concurrency: int = None,
+        adaptive: bool = True,
+    ):
+        with self._cond:
+            self.max_rate = max_rate
+            self.max_concurrency = max_concurrency
+            self.adaptive = adaptive
+            self.rate = max_rate
+            self.limit = max_concurrency
+            self.latency = None
+            self.decreases = 0
+            self._endpoints = {}
+            self._outcomes = deque(maxlen=self.window)
+            self._calm_until = 0.0
+            self.limiter.set_rate(max_rate)
+            self._notify()
+
+    def _notify(self):
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def _has_slot(self) -> bool:
+        return self.limit is None or self._in_flight < max(int(self.limit), 1)
+
+    def enter(self):
+        with self._cond:
+            while not self._has_slot():
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def aenter(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._has_slot():
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            await waiter
+
+    def leave(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._notify()
+
+    def _throughput(self, now: float) -> float | None:
+        if len(self._outcomes) < 2:
+            return None
+        span = now - self._outcomes[0][0]
+        return len(self._outcomes) / span if span > 0 else None
+
+    def observe(
+        self, seconds: float, response: httpx.Response | None, endpoint: str = ""
+    ):
+        """
+        Adjust the rate and concurrency limit after a response, or ``None`` for a
+        request that failed to connect or timed out, from ``endpoint``."""
+        if not self.adaptive:
+            return
+
+        now = time.monotonic()
+        error = _is_error(response)
+        with self._cond:
+            self._outcomes.append((now, error))
+            self.latency = (
+                seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+            )
+
+            # Only successes are timed, since a refusal such as a 409 for an
+            # existing item returns much faster than a write
+            slow = False
+            if response is not None and response.is_success:
+                latency = self._endpoints.get(endpoint)
+                if latency is None:
+                    latency = _LatencyFilter(self.baseline_window)
+                    self._endpoints[endpoint] = latency
+                baseline = latency.add(now, seconds)
+                slow = latency.latency > self.latency_factor * baseline
+
+            errors = sum(e for _, e in self._outcomes)
+            overloaded = (
+                response is not None and response.status_code in THROTTLE_STATUS
+            ) or (
+                len(self._outcomes) >= 10
+                and errors / len(self._outcomes) > self.error_threshold
+            )
+
+            if overloaded:
+                self._decrease(now)
+            elif slow:
+                self._decrease(now, latency_only=True)
+            elif not error:
+                self._increase(now)
+
+    def _decrease(self, now: float, latency_only: bool = False):
+        if now < self._calm_until:
+            return
+        self._calm_until = now + max(self.latency, 1.0)
+        self.decreases += 1
+
+        limit = self._in_flight + 1 if self.limit is None else self.limit
+        self.limit = max(1.0, limit * self.decrease)
+
+        throughput = self._throughput(now)
+        rate = self.rate
+        if throughput is not None:
+            rate = throughput if rate is None else min(rate, throughput)
+        if rate is not None:
+            if not latency_only:
+                rate *= self.decrease
+            self.rate = max(self.min_rate, rate)
+            self.limiter.set_rate(self.rate)
+
+        logger.info(
+            f"STAC API congested, reducing to {self.limit:.1f} requests in flight"
+            + (f" at {self.rate:.1f}/s" if self.rate is not None else "")
+        )
+
+    def _increase(self, now: float):
+        if self.limit is not None and self._in_flight + 1 >= int(self.limit):
+            self.limit += 1 / self.limit
+            if self.max_concurrency is not None:
+                self.limit = min(self.limit, self.max_concurrency)
+            self._notify()
+
+        if self.rate is not None:
+            rate = self.rate + self.increase / self.rate
+            throughput = self._throughput(now)
+            if throughput is not None:
+                rate = min(rate, max(2 * throughput, self.rate))
+            if self.max_rate is not None:
+                rate = min(rate, self.max_rate)
+            self.rate = rate
+            self.limiter.set_rate(rate)
+
+
+class WriteTransport:
+    """
+    Send mutating requests to the STAC API through ``client``, retrying connection
+    errors and throttling or gateway responses, paced by an ``AIMDController``.
+
+    Retries back off exponentially with full jitter, from ``backoff`` seconds up to
+    ``max_backoff``, or for as long as a ``Retry-After`` header asks (up to
+    ``max_backoff``), during which all other requests through the transport are
+    held back too. After ``max_retries`` the last response is returned, or the
+    last connection error raised.
+
+    A request that timed out may still have been applied, so a retried POST can
+    return 409, which callers handle by updating the object with PUT.
+    """
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        limiter: RateLimiter,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+    ):
+        self.client = client
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.controller = AIMDController(limiter)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def configure(
+        self,
+        max_retries: int = 5,
+        max_rate: float = None,
+        max_concurrency: int = None,
+        adaptive: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.controller.configure(max_rate, max_concurrency, adaptive)
+
+    def _retry_delay(
+        self,
+        attempt: int,
+        method: str,
+        url: str,
+        response: httpx.Response | None,
+        error: Exception | None,
+    ) -> float | None:
+        """
+        Seconds to wait before retrying a request, or None if it is finished."""
+        with self._lock:
+            self.requests += 1
+            if error is None and response.status_code not in RETRY_STATUS:
+                return None
+            if attempt >= self.max_retries:
+                self.failures += 1
+                return None
+            self.retries += 1
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+        wait = retry_after(response) if response is not None else None
+        if wait is not None:
+            wait = min(wait, self.max_backoff)
+            self.limiter.hold(wait)
+            delay = max(delay, wait)
+
+        reason = error or f"returned {response.status_code}"
+        logger.warning(
+            f"{method} {url} {reason}, retry {attempt + 1}/{self.max_retries} "
+            f"in {delay:.1f}s"
+        )
+        return delay
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response = error = None
+            self.controller.enter()
+            try:
+                self.limiter.acquire()
+                start = time.perf_counter()
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as err:
+                error = err
+            finally:
+                self.controller.leave()
+            self.controller.observe(
+                time.perf_counter() - start, response, _endpoint(method, url)
+            )
+
+            delay = self._retry_delay(attempt, method, url, response, error)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+        if response is None:
+            raise error
+        return response
+
+    async def arequest(
+        self, aclient: httpx.AsyncClient, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response = error = None
+            await self.controller.aenter()
+            try:
+                await self.limiter.aacquire()
+                start = time.perf_counter()
+                response = await aclient.request(method, url, **kwargs)
+            except httpx.TransportError as err:
+                error = err
+            finally:
+                self.controller.leave()
+            self.controller.observe(
+                time.perf_counter() - start, response, _endpoint(method, url)
+            )
+
+            delay = self._retry_delay(attempt, method, url, response, error)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        if response is None:
+            raise error
+        return response
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    async def apost(self, aclient: httpx.AsyncClient, url: str, **kwargs):
+        return await self.arequest(aclient, "POST", url, **kwargs)
+
+    async def aput(self, aclient: httpx.AsyncClient, url: str, **kwargs):
+        return await self.arequest(aclient, "PUT", url, **kwargs)
+
+    def drain_counts(self) -> tuple:
+        """
+        Return the request, retry and failure counts so far and reset them."""
+        with self._lock:
+            counts = (self.requests, self.retries, self.failures)
+            self.requests = self.retries = self.failures = 0
+        return counts
+
+    def merge_counts(self, counts: tuple):
+        with self._lock:
+            self.requests += counts[0]
+            self.retries += counts[1]
+            self.failures += counts[2]
+
+    def report(self):
+        if self.retries == 0 and self.failures == 0:
+            return
+        controller = self.controller
+        print(
+            f"STAC API writes: {self.requests} requests, {self.retries} retried, "
+            f"{self.failures} failed after {self.max_retries} retries, "
+            f"{controller.decreases} slowdowns"
+            + (f", final rate {controller.rate:.1f}/s" if controller.rate else "")
+        )
+
+
+# Shared transport for every request that modifies the STAC API
+stac_writes = WriteTransport(client, stac_limiter)
@@ -6,9 +6,12 @@ import httpx
 import boto3
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from elasticsearch import Elasticsearch
 from obs import ObsClient
 
+from cci_tools.core.timing import timer
+
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +20,10 @@ logstream = logging.StreamHandler()
 formatter = logging.Formatter("%(levelname)s [%(name)s]: %(message)s")
 logstream.setFormatter(formatter)
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
 dryrun = True
 
 
@@ -147,7 +154,18 @@ COLLECTION_TEMPLATE = {
 }
 
 
-def get_dir_query(directory):
+# Fields of an ``opensearch-files`` document read by ``process_record``
+OPENSEARCH_SOURCE_FIELDS = [
+    "info.name",
+    "info.directory",
+    "info.format",
+    "info.spatial",
+    "info.temporal",
+    "projects.opensearch",
+]
+
+
+def get_dir_query(directory, size=10):
     query = {
         "query": {
             "bool": {
@@ -158,11 +176,103 @@ def get_dir_query(directory):
             }
         },
         "sort": [{"info.directory": {"order": "asc"}}, {"info.name": {"order": "asc"}}],
-        "size": 10,
+        "size": size,
     }
     return query
 
 
+def normalise_ecv(ecv) -> str:
+    """
+    The form of an ECV used for collections, licence URLs and licence cache keys."""
+    return str(ecv).lower()
+
+
+def get_dir_ecvs(directory, index="opensearch-files"):
+    """
+    Find the ECVs tagged on the opensearch records under a directory."""
+    body = {
+        "query": get_dir_query(directory)["query"],
+        "size": 0,
+        "aggs": {"ecvs": {"terms": {"field": "projects.opensearch.ecv", "size": 1000}}},
+    }
+    buckets = es_client.search(index=index, body=body)["aggregations"]["ecvs"][
+        "buckets"
+    ]
+    return [normalise_ecv(b["key"]) for b in buckets]
+
+
+def scan_index(
+    body,
+    index="opensearch-files",
+    page_size=1000,
+    source=OPENSEARCH_SOURCE_FIELDS,
+    keep_alive="5m",
+    prefetch=True,
+):
+    """
+    Stream all hits for a sorted query from a point-in-time (PIT) snapshot of an index.
+
+    Results are consistent for the whole scan even if the index changes mid-run. Pages of
+    ``page_size`` hits are requested with ``search_after``, and while one page is being
+    consumed the next is fetched in the background if ``prefetch`` is set. Hits are
+    filtered down to the ``source`` fields (``False`` for ids/sort keys only).
+    """
+
+    if page_size < 1 or page_size > 10000:
+        raise ValueError(f"Page size must be between 1 and 10000, not {page_size}")
+
+    pit_id = es_client.open_point_in_time(index=index, keep_alive=keep_alive)["id"]
+
+    body = {
+        **body,
+        "size": page_size,
+        "_source": source,
+        "sort": body.get("sort", []) + [{"_shard_doc": "asc"}],
+    }
+
+    def fetch_page(search_after):
+        page_body = {**body, "pit": {"id": pit_id, "keep_alive": keep_alive}}
+        if search_after is not None:
+            page_body["search_after"] = search_after
+        return es_client.search(body=page_body)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        with timer.stage("es_scan"):
+            response = fetch_page(body.get("search_after"))
+        while True:
+            # PIT ids may change between requests, always use the latest.
+            pit_id = response.get("pit_id", pit_id)
+            hits = response["hits"]["hits"]
+            if len(hits) == 0:
+                break
+
+            next_page = None
+            if len(hits) == page_size:
+                if executor is not None:
+                    next_page = executor.submit(fetch_page, hits[-1]["sort"])
+                else:
+                    next_page = hits[-1]["sort"]
+
+            yield from hits
+
+            if next_page is None:
+                break
+            # Only the time spent waiting on a page is counted.
+            with timer.stage("es_scan"):
+                if executor is not None:
+                    response = next_page.result()
+                else:
+                    response = fetch_page(next_page)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        try:
+            es_client.close_point_in_time(body={"id": pit_id})
+        except Exception as err:
+            logger.debug(f"Failed to close point in time: {err}")
+
+
 def get_file_query(file):
     file = file.split("/")[-1]
     query = {
@@ -180,6 +290,57 @@ def get_file_query(file):
     return query
 
 
+def get_exact_file_query(file):
+    """
+    Query for a single file by exact name, and exact directory if the path is given."""
+    directory, _, name = file.rpartition("/")
+    must = [
+        {"term": {"info.name": name}},
+        {"exists": {"field": "projects.opensearch"}},
+    ]
+    if directory:
+        must.append({"term": {"info.directory": directory}})
+
+    return {
+        "query": {"bool": {"must": must}},
+        "_source": OPENSEARCH_SOURCE_FIELDS,
+        "size": 1,
+    }
+
+
+def resolve_files(fileset, batch_size=500, index="opensearch-files"):
+    """
+    Find the ``opensearch-files`` record for each file in a list, using one
+    ``_msearch`` request per batch of ``batch_size`` files.
+
+    Returns the ``(file, record)`` pairs that were found, in input order, and
+    the list of files that could not be resolved.
+    """
+    resolved, missing = [], []
+    for start in range(0, len(fileset), batch_size):
+        batch = fileset[start : start + batch_size]
+
+        searches = []
+        for file in batch:
+            searches += [{"index": index}, get_exact_file_query(file)]
+
+        with timer.stage("es_resolve"):
+            responses = es_client.msearch(body=searches)["responses"]
+        for file, response in zip(batch, responses):
+            if "error" in response:
+                logger.warning(f"{file}: Search failed - {response['error']}")
+                missing.append(file)
+                continue
+
+            hits = response["hits"]["hits"]
+            if len(hits) == 0:
+                missing.append(file)
+            else:
+                resolved.append((file, hits[0]))
+
+    return resolved, missing
+
+
 def get_item_query(count_aggregations=True):
 
     query = {"term": {"properties.aggregation": {"value": False}}}
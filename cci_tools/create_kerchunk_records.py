@@ -12,6 +12,7 @@ import glob
 import copy
 
 from cci_tools.core.utils import STAC_API, client, auth, dryrun, es_client
+from cci_tools.core.transport import stac_writes
 from cci_tools.stac.create_record import process_record
 
 # Setup client and query elasticsearch
@@ -288,9 +289,9 @@ def process_file(line, count, total_files):
 
     stac_record["id"] = kfile.rstrip(".json")
 
-    resp = client.put(selflink, json=stac_record, auth=auth)
+    resp = stac_writes.put(selflink, json=stac_record, auth=auth)
     if str(resp.status_code)[0] != "2":
-        resp = client.post(f"{collection_link}/items", json=stac_record, auth=auth)
+        resp = stac_writes.post(f"{collection_link}/items", json=stac_record, auth=auth)
     print(kfile, resp)
     if resp.status_code == 400:
         print(resp.content)
@@ -0,0 +1,174 @@
+import base64
+import json
+
+import numcodecs
+import numpy as np
+from xarray.coding.times import decode_cf_datetime
+
+from .remote import read_range
+
+
+class RemoteChunkError(Exception):
+    """
+    A chunk holding a value could not be fetched."""
+
+
+class ArrayMetadata:
+    """
+    Shape, dimensions, attributes and encoding of one array in a zarr group."""
+
+    def __init__(self, name: str, zarray: dict, zattrs: dict):
+        self.name = name
+        self.zarray = zarray
+        self.shape = tuple(zarray["shape"])
+        self.chunks = tuple(zarray["chunks"])
+        self.dtype = np.dtype(zarray["dtype"])
+        self.attrs = {k: v for k, v in zattrs.items() if k != "_ARRAY_DIMENSIONS"}
+        self.dims = tuple(zattrs.get("_ARRAY_DIMENSIONS", []))
+
+    def chunk_key(self, chunk_index: tuple) -> str:
+        separator = self.zarray.get("dimension_separator", ".")
+        return separator.join(str(i) for i in chunk_index) or "0"
+
+    def decode_chunk(self, data: bytes) -> np.ndarray:
+        if self.zarray.get("compressor") is not None:
+            data = numcodecs.get_codec(self.zarray["compressor"]).decode(data)
+        for f in reversed(self.zarray.get("filters") or []):
+            data = numcodecs.get_codec(f).decode(data)
+        return (
+            np.frombuffer(data, dtype=self.dtype)
+            .reshape(self.chunks, order=self.zarray.get("order", "C"))
+        )
+
+
+class ConsolidatedMetadata:
+    """
+    Global attributes and array metadata of a zarr store or kerchunk reference set,
+    read from its consolidated metadata without opening it with xarray.
+
+    Values are decoded from chunks held inline in kerchunk references, from byte
+    ranges of the referenced files, or from the store itself. A chunk that cannot
+    be fetched raises ``RemoteChunkError``.
+    """
+
+    def __init__(self, metadata: dict, refs: dict = None, store: str = None):
+        self._refs = refs
+        self._store = store
+
+        self.attrs = metadata.get(".zattrs", {})
+        self.variables = {}
+        for key, zarray in metadata.items():
+            if not key.endswith("/.zarray"):
+                continue
+            name = key[: -len("/.zarray")]
+            self.variables[name] = ArrayMetadata(
+                name, zarray, metadata.get(f"{name}/.zattrs", {})
+            )
+
+        self.sizes = {}
+        for var in self.variables.values():
+            self.sizes.update(zip(var.dims, var.shape))
+
+    def _read_chunk(self, var: ArrayMetadata, chunk_index: tuple) -> np.ndarray:
+        key = f"{var.name}/{var.chunk_key(chunk_index)}"
+
+        if self._refs is not None:
+            ref = self._refs.get(key)
+            if isinstance(ref, list):
+                data = self._fetch(key, *ref)
+            elif ref is None:
+                data = None
+            elif ref.startswith("base64:"):
+                data = base64.b64decode(ref[len("base64:") :])
+            else:
+                data = ref.encode()
+        elif self._store is not None:
+            try:
+                data = self._fetch(key, f"{self._store}/{key}")
+            except RemoteChunkError as err:
+                if not isinstance(err.__cause__, FileNotFoundError):
+                    raise
+                data = None
+        else:
+            raise RemoteChunkError(key)
+
+        if data is None:
+            # Chunks that were never written hold the fill value.
+            return np.full(var.chunks, var.zarray.get("fill_value"), dtype=var.dtype)
+        return var.decode_chunk(data)
+
+    def _fetch(self, key: str, url: str, offset: int = None, length: int = None):
+        # Only the referenced range is requested from remote files.
+        try:
+            return read_range(url, offset, length)
+        except OSError as err:
+            raise RemoteChunkError(key) from err
+
+    def _read_element(self, var: ArrayMetadata, index: tuple):
+        index = tuple(i % n for i, n in zip(index, var.shape))
+        chunk_index = tuple(i // c for i, c in zip(index, var.chunks))
+        within = tuple(i % c for i, c in zip(index, var.chunks))
+        return self._read_chunk(var, chunk_index)[within]
+
+    def _decode(self, values: list, attrs: dict):
+        values = np.asarray(values)
+        if "scale_factor" in attrs or "add_offset" in attrs:
+            values = values * attrs.get("scale_factor", 1) + attrs.get("add_offset", 0)
+        if " since " in attrs.get("units", ""):
+            values = decode_cf_datetime(
+                values, attrs["units"], calendar=attrs.get("calendar")
+            )
+        return values
+
+    def coordinate_extent(self, name: str) -> tuple:
+        """
+        Decoded (min, max) of a 1D coordinate from its first and last values, or
+        from its CF bounds variable if it has one."""
+        var = self.variables[name]
+        bounds = self.variables.get(var.attrs.get("bounds"))
+        if bounds is not None:
+            values = [
+                self._read_element(bounds, (i, j)) for i in (0, -1) for j in (0, 1)
+            ]
+            attrs = {**var.attrs, **bounds.attrs}
+        else:
+            values = [self._read_element(var, (0,)), self._read_element(var, (-1,))]
+            attrs = var.attrs
+
+        values = self._decode(values, attrs)
+        return min(values), max(values)
+
+
+def _load_json(path: str) -> dict:
+    return json.loads(read_range(path))
+
+
+def _parse_refs(refs: dict) -> dict:
+    # Metadata entries in kerchunk references may be JSON encoded strings.
+    metadata = {}
+    for key, value in refs.items():
+        if key.rsplit("/", 1)[-1] in (".zgroup", ".zattrs", ".zarray"):
+            metadata[key] = json.loads(value) if isinstance(value, str) else value
+    return metadata
+
+
+def open_consolidated(endpoint: str) -> ConsolidatedMetadata | None:
+    """
+    Read the metadata of a kerchunk reference file (``.json``) or a zarr store with
+    consolidated metadata (``.zmetadata``). Returns None for anything else, so the
+    caller can fall back to xarray.
+
+    Nothing is cached, so callers reading the same endpoint more than once should
+    pass the result along rather than reading it again.
+    """
+    endpoint = endpoint.rstrip("/")
+    try:
+        if endpoint.endswith(".json"):
+            refs = _load_json(endpoint)
+            refs = refs.get("refs", refs) if refs.get("version") == 1 else refs
+            return ConsolidatedMetadata(_parse_refs(refs), refs=refs)
+
+        metadata = _load_json(f"{endpoint}/.zmetadata")["metadata"]
+        return ConsolidatedMetadata(metadata, store=endpoint)
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
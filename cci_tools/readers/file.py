@@ -1,14 +1,26 @@
 import re
+import json
 import calendar
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+VERSION_PATTERN = re.compile("(fv[0-9]{1}.[0-9]{1})")
+
+RESOLUTION_PATTERN = re.compile("(?<=[^a-zA-Z0-9])P([0-9]{1,2})Y(?=[^a-zA-Z0-9])")
+
 
 def extract_version(filename):
-    try:
-        return re.search("(fv[0-9]{1}.[0-9]{1})", filename).group()
-    except:
+    match = VERSION_PATTERN.search(filename)
+    if match is None:
         return "Unknown"
+    return match.group()
 
 
 def end_of_month(dt):
@@ -16,63 +28,178 @@ def end_of_month(dt):
     return dt.replace(day=last_day)
 
 
-def extract_times_from_file(geotiff_file, interval):
-
-    filename = geotiff_file.split("/")[-1]
-
-    ymd_two = re.search(
-        "([0-9]{2}[0-9]{2}[0-9]{4})_([0-9]{2}[0-9]{2}[0-9]{4})", filename
-    )
-    yyyymmdd = re.search("([0-9]{2}[0-9]{2}[0-9]{4})", filename)
-    yyyy = re.search("(?<=[^a-zA-Z0-9])([0-9]{4})(?=[^a-zA-Z0-9])", filename)
-    yyyy_yyyy = re.search("([0-9]{4})-([0-9]{4})", filename)
-    resolution = re.search("(?<=[^a-zA-Z0-9])(P[0-9]{1,2}Y)(?=[^a-zA-Z0-9])", filename)
-    y1 = None
-    end_datetime = None
-
-    resolutions = {"Y": "years", "M": "months", "D": "days"}
-
-    if ymd_two is not None:
-        start_datetime = datetime.strptime(
-            ymd_two.group().split("_")[0], "%Y%m%d"
-        ).strftime("%Y-%m-%dT%H:%M:%SZ")
-        end_datetime = datetime.strptime(
-            ymd_two.group().split("_")[1], "%Y%m%d"
-        ).strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif yyyymmdd is not None:
-        dt_object = datetime.strptime(yyyymmdd.group(), "%Y%m%d")
-        start_datetime = dt_object.strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif yyyy_yyyy is not None:
-        y0, y1 = yyyy_yyyy.group().split("-")
-        dt_object = datetime.strptime(y0, "%Y")
-        start_datetime = dt_object.strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif yyyy is not None:
-        dt_object = datetime.strptime(yyyy.group(), "%Y")
-        start_datetime = dt_object.strftime("%Y-%m-%dT%H:%M:%SZ")
-    else:
-        return None, None
-
-    if end_datetime is not None:
-        pass
-    elif interval == "month":
-        end_datetime = end_of_month(dt_object).strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif y1 is not None:
-        fdt_object = datetime.strptime(y1, "%Y")
-        end_datetime = (
-            fdt_object + relativedelta(years=1) - relativedelta(seconds=1)
-        ).strftime("%Y-%m-%dT%H:%M:%SZ")
-    elif resolution is not None:
-        # P1Y example
-        r = resolution.group()
-        end_datetime = (
-            dt_object
-            + relativedelta(**{resolutions[r[-1]]: int(r[1:-1])})
-            - relativedelta(seconds=1)
-        ).strftime("%Y-%m-%dT%H:%M:%SZ")
-    else:
-        # Day
-        end_datetime = dt_object.strftime("%Y-%m-%d") + "T23:59:59Z"
-
-    print(filename, start_datetime, end_datetime)
-
-    return start_datetime, end_datetime
+def _parse_date(value: str, fmt: str) -> datetime:
+    # Fast paths for the formats used by the default patterns
+    if fmt == "%Y%m%d" and len(value) == 8:
+        return datetime(int(value[:4]), int(value[4:6]), int(value[6:]))
+    if fmt == "%Y" and len(value) == 4:
+        return datetime(int(value), 1, 1)
+    return datetime.strptime(value, fmt)
+
+
+def _format_date(dt: datetime) -> str:
+    # Equivalent to strftime("%Y-%m-%dT%H:%M:%SZ") for whole-second times
+    return dt.isoformat() + "Z"
+
+
+def _parse_period(period: str) -> relativedelta:
+    """
+    ISO 8601 period of years, months or days (e.g. ``P1Y``) as a relativedelta."""
+    match = re.fullmatch("P([0-9]+)([YMD])", period)
+    if match is None:
+        raise ValueError(f"Unsupported period: {period}")
+    units = {"Y": "years", "M": "months", "D": "days"}
+    return relativedelta(**{units[match.group(2)]: int(match.group(1))})
+
+
+class DatePattern:
+    """
+    A precompiled filename pattern with a ``start`` and optional ``end`` group.
+
+    Without ``end_period`` an ``end`` match is the exact end time. With it, ``end``
+    is the start of the final period, and the end time is the last second of that
+    period.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        format: str = "%Y%m%d",
+        end_period: str = None,
+    ):
+        self.regex = re.compile(pattern)
+        self.format = format
+        self.end_period = end_period
+        self._end_delta = _parse_period(end_period) if end_period else None
+
+    def match(self, filename: str) -> tuple | None:
+        """
+        ``(start, end, end_is_exact)`` datetimes for a filename, or None."""
+        match = self.regex.search(filename)
+        if match is None:
+            return None
+
+        groups = match.groupdict()
+        start = _parse_date(groups["start"], self.format)
+        if groups.get("end") is None:
+            return start, None, False
+
+        end = _parse_date(groups["end"], self.format)
+        if self._end_delta is None:
+            return start, end, True
+        return start, end + self._end_delta - relativedelta(seconds=1), False
+
+    @classmethod
+    def from_config(cls, config: dict):
+        return cls(
+            config["pattern"],
+            format=config.get("format", "%Y%m%d"),
+            end_period=config.get("end_period"),
+        )
+
+
+# In priority order, the first pattern to match a filename is used.
+DEFAULT_PATTERNS = [
+    DatePattern("(?P<start>[0-9]{8})_(?P<end>[0-9]{8})"),
+    DatePattern("(?P<start>[0-9]{8})"),
+    DatePattern(
+        "(?P<start>[0-9]{4})-(?P<end>[0-9]{4})", format="%Y", end_period="P1Y"
+    ),
+    DatePattern("(?<=[^a-zA-Z0-9])(?P<start>[0-9]{4})(?=[^a-zA-Z0-9])", format="%Y"),
+]
+
+
+class FilenameDateParser:
+    """
+    Extract start and end times from filenames with an ordered set of patterns,
+    stopping at the first pattern that matches.
+    """
+
+    def __init__(self, patterns: list = None):
+        self.patterns = list(patterns or DEFAULT_PATTERNS)
+
+    def parse(self, filename: str, interval: str = None) -> tuple:
+        """
+        ``(start_datetime, end_datetime)`` strings for a filename, or ``(None, None)``
+        if no pattern matches."""
+        filename = filename.split("/")[-1]
+
+        for pattern in self.patterns:
+            times = pattern.match(filename)
+            if times is not None:
+                break
+        else:
+            return None, None
+
+        start, end, end_is_exact = times
+        if end_is_exact:
+            pass
+        elif interval == "month":
+            end = end_of_month(start)
+        elif end is not None:
+            pass
+        else:
+            resolution = RESOLUTION_PATTERN.search(filename)
+            if resolution is not None:
+                # P1Y example
+                end = (
+                    start
+                    + relativedelta(years=int(resolution.group(1)))
+                    - relativedelta(seconds=1)
+                )
+            else:
+                # Day
+                end = start.replace(hour=23, minute=59, second=59)
+
+        start_datetime, end_datetime = _format_date(start), _format_date(end)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{filename}: {start_datetime} - {end_datetime}")
+        return start_datetime, end_datetime
+
+    def parse_many(self, filenames: list, interval: str = None) -> list:
+        """
+        Parse a batch of filenames, returning a ``(start, end)`` pair for each."""
+        parse = self.parse
+        return [parse(filename, interval) for filename in filenames]
+
+
+_default_parser = FilenameDateParser()
+_ecv_parsers = {}
+
+
+def register_date_patterns(ecv: str, patterns: list, replace: bool = False):
+    """
+    Register filename patterns for an ECV, tried before the default patterns
+    unless ``replace`` is set. Patterns are ``DatePattern`` objects or config dicts.
+    """
+    patterns = [
+        p if isinstance(p, DatePattern) else DatePattern.from_config(p)
+        for p in patterns
+    ]
+    if not replace:
+        patterns += DEFAULT_PATTERNS
+    _ecv_parsers[ecv.lower()] = FilenameDateParser(patterns)
+
+
+def load_date_patterns(config_file: str):
+    """
+    Register per-ECV filename patterns from a JSON file of the form
+    ``{"ecv": [{"pattern": ..., "format": ..., "end_period": ...}]}``."""
+    with open(config_file) as f:
+        config = json.load(f)
+    for ecv, patterns in config.items():
+        register_date_patterns(ecv, patterns)
+
+
+def get_date_parser(ecv: str = None) -> FilenameDateParser:
+    if ecv is None:
+        return _default_parser
+    return _ecv_parsers.get(ecv.lower(), _default_parser)
+
+
+def extract_times_from_file(geotiff_file, interval, ecv=None):
+    return get_date_parser(ecv).parse(geotiff_file, interval)
+
+
+def extract_times_from_files(filenames, interval=None, ecv=None):
+    return get_date_parser(ecv).parse_many(filenames, interval)
@@ -1,17 +1,114 @@
 import re
 import rasterio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import xarray as xr
-from pyproj import Transformer
+import numpy as np
 
 from .file import extract_times_from_file, extract_version
+from .projection import transform_bboxes
+from .remote import is_remote, measure_fetch, open_file, resolve_path
+
+
+def geotiff_bounds(src, densify_pts: int = 21) -> tuple:
+    """
+    WGS84 bounds (W, S, E, N) of an open rasterio dataset.
+
+    The bounds come from the header's affine transform, with each edge densified
+    before reprojecting so curved edges of projected tiles are still covered."""
+    if src.crs is None:
+        raise ValueError("GeoTIFF has no CRS")
+
+    bounds = transform_bboxes(
+        [tuple(src.bounds)], src.crs.to_string(), densify_pts=densify_pts
+    )[0]
+    if not np.isfinite(bounds).all():
+        raise ValueError("GeoTIFF bounds could not be reprojected")
+    return tuple(float(b) for b in bounds)
+
+
+def bbox_geometry(bbox_w, bbox_s, bbox_e, bbox_n) -> tuple:
+    """
+    GeoJSON geometry type and coordinates of a bbox."""
+    geo_type = "Polygon"
+    if bbox_w == bbox_e and bbox_n == bbox_s:
+        geo_type = "Point"
+    coordinates = [
+        [
+            [bbox_w, bbox_s],
+            [bbox_e, bbox_s],
+            [bbox_e, bbox_n],
+            [bbox_w, bbox_n],
+            [bbox_w, bbox_s],
+        ]
+    ]
+    return geo_type, coordinates
 
 
 def read_geotiff(geotiff_file: str, **kwargs):
     """
-    Wrapper for accessing geotiffs"""
-    with rasterio.open(geotiff_file) as src:
-        access_geotiff(src, geotiff_file, **kwargs)
+    Wrapper for accessing geotiffs. Remote files are opened through ``open_file``
+    so that only the blocks holding the header are fetched."""
+    path = resolve_path(geotiff_file)
+    opener = open_file if is_remote(path) else None
+    with measure_fetch(path), rasterio.open(path, opener=opener) as src:
+        return access_geotiff(src, geotiff_file, **kwargs)
+
+
+# GDAL options for reading many tile headers: skip sibling directory listings and
+# cache the blocks read from each file.
+GDAL_SCAN_OPTIONS = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "VSI_CACHE": True,
+    "VSI_CACHE_SIZE": 16 * 1024 * 1024,
+    "GDAL_CACHEMAX": 256,
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.TIF,.tiff",
+}
+
+
+def _scan_geotiff(geotiff_file: str, kwargs: dict):
+    # rasterio environments are per-thread, so each read enters its own.
+    try:
+        with rasterio.Env(**GDAL_SCAN_OPTIONS):
+            return read_geotiff(geotiff_file, **kwargs)
+    except Exception as err:
+        return err
+
+
+def scan_geotiffs(geotiff_files, threads: int = 8, queue_size: int = None, **kwargs):
+    """
+    Read the headers of many GeoTIFFs concurrently, yielding their ``stac_info``
+    in the same order as ``geotiff_files``.
+
+    Files are read on a thread pool under ``GDAL_SCAN_OPTIONS``, with at most
+    ``queue_size`` (default ``4 * threads``) reads in flight. A ``None`` file
+    yields ``None``, and a file that cannot be read yields the exception raised.
+    ``kwargs`` are passed to ``access_geotiff``, and a ``(file, file_kwargs)`` pair
+    may be given in place of a file to add kwargs for that file only.
+    """
+    queue_size = queue_size or 4 * threads
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for geotiff_file in geotiff_files:
+            file_kwargs = kwargs
+            if isinstance(geotiff_file, tuple):
+                geotiff_file, extra_kwargs = geotiff_file
+                file_kwargs = {**kwargs, **extra_kwargs}
+
+            if geotiff_file is None:
+                pending.append(None)
+            else:
+                pending.append(pool.submit(_scan_geotiff, geotiff_file, file_kwargs))
+
+            if len(pending) >= queue_size:
+                future = pending.popleft()
+                yield future.result() if future is not None else None
+
+        while pending:
+            future = pending.popleft()
+            yield future.result() if future is not None else None
 
 
 def access_geotiff(
@@ -23,6 +120,7 @@ def access_geotiff(
     interval: str = None,
     fill_incomplete: bool = False,
     openeo: bool = False,
+    ecv: str = None,
 ) -> tuple[dict, dict]:
     """
     Read data from a GeoTiff file to produce a valid set of STAC info."""
@@ -39,7 +137,9 @@ def access_geotiff(
         dt_object = datetime.strptime(end_dt, "%Y%m%dT%H%M%SZ")
         end_datetime = dt_object.strftime("%Y-%m-%dT%H:%M:%SZ")
     except Exception as e:
-        start_datetime, end_datetime = extract_times_from_file(geotiff_file, interval)
+        start_datetime, end_datetime = extract_times_from_file(
+            geotiff_file, interval, ecv=ecv
+        )
         if start_datetime is None and fill_incomplete:
             incomplete = True
             start_datetime = "0001-01-01T00:00:00Z"
@@ -60,20 +160,7 @@ def access_geotiff(
     except:
 
         try:
-            epsg = src.crs.to_epsg()
-
-            ds = xr.open_dataset(geotiff_file, engine="rasterio")
-            x_min = float(ds.x.min())
-            x_max = float(ds.x.max())
-            y_max = float(ds.y.max())
-            y_min = float(ds.y.min())
-
-            transformer = Transformer.from_crs(
-                f"EPSG:{epsg}", "EPSG:4326", always_xy=True
-            )
-            bbox_w, bbox_s = transformer.transform(x_min, y_min)
-            bbox_n, bbox_e = transformer.transform(x_max, y_max)
-
+            bbox_w, bbox_s, bbox_e, bbox_n = geotiff_bounds(src)
         except:
             if assume_global or fill_incomplete:
                 bbox_w = -180
@@ -83,18 +170,7 @@ def access_geotiff(
             else:
                 raise ValueError("Insufficient Spatial Information")
 
-    geo_type = "Polygon"
-    if bbox_w == bbox_e and bbox_n == bbox_s:
-        geo_type = "Point"
-    coordinates = [
-        [
-            [bbox_w, bbox_s],
-            [bbox_e, bbox_s],
-            [bbox_e, bbox_n],
-            [bbox_w, bbox_n],
-            [bbox_w, bbox_s],
-        ]
-    ]
+    geo_type, coordinates = bbox_geometry(bbox_w, bbox_s, bbox_e, bbox_n)
     bbox = [bbox_w, bbox_s, bbox_e, bbox_n]
     format = "GeoTIFF"
 
@@ -126,6 +202,7 @@ def access_geotiff(
         "bbox": bbox,
         "geo_type": geo_type,
         "coordinates": coordinates,
+        "properties": properties,
         "format": format,
         "transform": transform,
         "epsg": epsg,
@@ -0,0 +1,239 @@
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from xarray.coding.times import decode_cf_datetime
+
+from .remote import fetch_stats, is_remote, measure_fetch, open_file, resolve_path
+from .xarray import TIME_FORMAT, _format_time
+
+# Formats seen in CCI ``time_coverage_*`` attributes
+COVERAGE_FORMATS = [
+    "%Y%m%dT%H%M%SZ",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d",
+    "%Y%m%d",
+    "%Y%m%dT%H%M%S",
+    "%Y%m%d%H%M%SZ",
+    "%Y%m%d%H%M%S",
+]
+
+# netCDF-C is not thread-safe, so netCDF4 is only used by one thread at a time
+_netcdf4_lock = threading.Lock()
+
+COORDINATE_NAMES = {
+    "lat": ["lat", "latitude"],
+    "lon": ["lon", "longitude"],
+    "time": ["time"],
+}
+
+
+def _attr(value):
+    # h5py returns bytes and single-element arrays for NetCDF attributes.
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, np.ndarray) and value.size == 1:
+        return _attr(value.item())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _parse_coverage(value) -> str | None:
+    for fmt in COVERAGE_FORMATS:
+        try:
+            return datetime.strptime(str(value), fmt).strftime(TIME_FORMAT)
+        except ValueError:
+            pass
+    return None
+
+
+class _H5Header:
+    def __init__(self, f):
+        self.f = f
+        self.attrs = {k: _attr(v) for k, v in f.attrs.items()}
+
+    def variable(self, name: str):
+        if name not in self.f:
+            return None
+        var = self.f[name]
+        if var.ndim != 1 or var.shape[0] == 0:
+            return None
+        attrs = {k: _attr(v) for k, v in var.attrs.items()}
+        return attrs, var[0], var[-1]
+
+
+class _NetCDF4Header:
+    def __init__(self, ds):
+        self.ds = ds
+        self.attrs = {k: _attr(ds.getncattr(k)) for k in ds.ncattrs()}
+
+    def variable(self, name: str):
+        if name not in self.ds.variables:
+            return None
+        var = self.ds.variables[name]
+        if var.ndim != 1 or var.shape[0] == 0:
+            return None
+        var.set_auto_maskandscale(False)
+        attrs = {k: _attr(var.getncattr(k)) for k in var.ncattrs()}
+        return attrs, var[0], var[-1]
+
+
+def _coordinate_extent(header, kind: str) -> tuple | None:
+    """
+    Decoded (min, max) of a coordinate from its first and last values."""
+    for name in COORDINATE_NAMES[kind]:
+        var = header.variable(name)
+        if var is not None:
+            break
+    else:
+        return None
+
+    attrs, first, last = var
+    values = np.array([first, last])
+    if "scale_factor" in attrs or "add_offset" in attrs:
+        values = values * attrs.get("scale_factor", 1) + attrs.get("add_offset", 0)
+    if " since " in str(attrs.get("units", "")):
+        values = decode_cf_datetime(
+            values, attrs["units"], calendar=attrs.get("calendar")
+        )
+    return min(values), max(values)
+
+
+def _header_extent(header) -> dict:
+    attrs = header.attrs
+    extent = {}
+
+    start = _parse_coverage(attrs.get("time_coverage_start"))
+    end = _parse_coverage(attrs.get("time_coverage_end"))
+    if start is None or end is None:
+        times = _coordinate_extent(header, "time")
+        if times is not None:
+            start, end = _format_time(times[0]), _format_time(times[1])
+    if start is not None and end is not None:
+        extent["start_datetime"] = start
+        extent["end_datetime"] = end
+
+    try:
+        bbox = [
+            float(attrs[a])
+            for a in [
+                "geospatial_lon_min",
+                "geospatial_lat_min",
+                "geospatial_lon_max",
+                "geospatial_lat_max",
+            ]
+        ]
+    except (KeyError, TypeError, ValueError):
+        lons = _coordinate_extent(header, "lon")
+        lats = _coordinate_extent(header, "lat")
+        bbox = None
+        if lons is not None and lats is not None:
+            bbox = [float(lons[0]), float(lats[0]), float(lons[1]), float(lats[1])]
+    if bbox is not None:
+        extent["bbox"] = bbox
+
+    return extent
+
+
+def read_netcdf_header(netcdf_file: str) -> dict:
+    """
+    Spatial and temporal extent of a NetCDF file from its header.
+
+    Uses the ``time_coverage_*`` and ``geospatial_*`` attributes where present,
+    otherwise the first and last values of the time, lat and lon coordinates, so
+    no data variable is read. Returns whichever of ``start_datetime``,
+    ``end_datetime`` and ``bbox`` (W, S, E, N) could be found. NetCDF4 files are
+    read with h5py, and netCDF4 is used for anything else if it is installed.
+    Remote files are read with h5py through ``open_file``, fetching only the
+    blocks that hold the header and coordinates.
+
+    h5py serialises every call behind a global lock, and netCDF4 reads are
+    serialised here, so threads in one process read headers one at a time. Use
+    ``read_netcdf_headers`` to read many in parallel.
+    """
+    path = resolve_path(netcdf_file)
+    with measure_fetch(path):
+        if is_remote(path):
+            import h5py
+
+            with open_file(path) as fileobj, h5py.File(fileobj, "r") as f:
+                return _header_extent(_H5Header(f))
+        return _read_local_header(path)
+
+
+def _read_local_header(netcdf_file: str) -> dict:
+    try:
+        import h5py
+    except ImportError:
+        h5py = None
+
+    if h5py is not None:
+        try:
+            with h5py.File(netcdf_file, "r") as f:
+                return _header_extent(_H5Header(f))
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # Not HDF5, e.g. NetCDF3 classic
+            pass
+
+    try:
+        import netCDF4
+    except ImportError:
+        raise ImportError(
+            "Reading NetCDF headers requires the 'h5py' or 'netCDF4' package to be installed"
+        )
+    with _netcdf4_lock, netCDF4.Dataset(netcdf_file) as ds:
+        return _header_extent(_NetCDF4Header(ds))
+
+
+def _read_header(netcdf_file: str) -> tuple:
+    """
+    Process pool entrypoint, returning the extent or the exception raised, and
+    the bytes fetched by remote reads for the parent to merge."""
+    try:
+        header = read_netcdf_header(netcdf_file)
+    except Exception as err:
+        header = err
+    return header, fetch_stats.drain()
+
+
+def _result(future) -> dict | Exception:
+    try:
+        header, fetched = future.result()
+    except Exception as err:
+        # Such as an exception that could not be sent back from the worker
+        return err
+    fetch_stats.merge(fetched)
+    return header
+
+
+def read_netcdf_headers(netcdf_files, workers: int = 8, queue_size: int = None):
+    """
+    Read the headers of many NetCDF files in parallel on a process pool, since
+    h5py and netCDF4 read one file at a time in each process, yielding their
+    extents in the same order as ``netcdf_files``.
+
+    At most ``queue_size`` (default ``4 * workers``) reads are in flight. A ``None``
+    file yields ``None``, and a file that cannot be read yields the exception raised.
+    """
+    queue_size = queue_size or 4 * workers
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for netcdf_file in netcdf_files:
+            if netcdf_file is None:
+                pending.append(None)
+            else:
+                pending.append(pool.submit(_read_header, netcdf_file))
+
+            if len(pending) >= queue_size:
+                future = pending.popleft()
+                yield _result(future) if future is not None else None
+
+        while pending:
+            future = pending.popleft()
+            yield _result(future) if future is not None else None
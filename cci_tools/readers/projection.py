@@ -0,0 +1,57 @@
+from functools import lru_cache
+
+import numpy as np
+from pyproj import Transformer
+
+
+@lru_cache(maxsize=64)
+def get_transformer(src_crs: str, dst_crs: str = "EPSG:4326") -> Transformer:
+    """
+    Shared transformer between two CRS, built once per process.
+
+    CRS are given as strings (``EPSG:x`` or WKT) so they can key the cache."""
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def _edge_points(bboxes: np.ndarray, densify_pts: int) -> tuple:
+    """
+    Points along the four edges of each (W, S, E, N) bbox, one row per bbox."""
+    w, s, e, n = (bboxes[:, i : i + 1] for i in range(4))
+    t = np.linspace(0, 1, densify_pts + 2)
+
+    x_edge = w + t * (e - w)
+    y_edge = s + t * (n - s)
+
+    # Bottom, top, left and right edges
+    xs = np.concatenate([x_edge, x_edge, w + 0 * t, e + 0 * t], axis=1)
+    ys = np.concatenate([s + 0 * t, n + 0 * t, y_edge, y_edge], axis=1)
+    return xs, ys
+
+
+def transform_bboxes(
+    bboxes, src_crs: str, dst_crs: str = "EPSG:4326", densify_pts: int = 21
+) -> np.ndarray:
+    """
+    Reproject many (W, S, E, N) bboxes sharing a CRS in one vectorised call.
+
+    Each edge is densified with ``densify_pts`` extra points, so the result covers
+    edges that curve in the destination CRS. Points that cannot be reprojected are
+    ignored. Returns an ``(n, 4)`` array of (W, S, E, N) bounds.
+    """
+    bboxes = np.asarray(bboxes, dtype="float64").reshape(-1, 4)
+    xs, ys = _edge_points(bboxes, densify_pts)
+
+    tx, ty = get_transformer(src_crs, dst_crs).transform(xs, ys)
+    valid = np.isfinite(tx) & np.isfinite(ty)
+    tx = np.where(valid, tx, np.nan)
+    ty = np.where(valid, ty, np.nan)
+
+    return np.stack(
+        [
+            np.nanmin(tx, axis=1),
+            np.nanmin(ty, axis=1),
+            np.nanmax(tx, axis=1),
+            np.nanmax(ty, axis=1),
+        ],
+        axis=1,
+    )
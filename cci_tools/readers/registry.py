@@ -0,0 +1,171 @@
+import os
+
+from .remote import measure_fetch, open_file
+
+# Enough leading bytes to match any registered signature
+SNIFF_BYTES = 16
+
+# Leading bytes of common archive formats
+SIGNATURES = {
+    "tiff": [b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"],
+    "hdf5": [b"\x89HDF\r\n\x1a\n"],
+    "netcdf3": [b"CDF\x01", b"CDF\x02", b"CDF\x05"],
+}
+
+
+class Reader:
+    """
+    A record reader, chosen by ``fmt_override`` keyword or by file extension.
+
+    ``read`` is called as ``read(es_all_dict, location, fname, file_ext, ecv,
+    **options)`` and returns ``(stac_info, properties, incomplete)``. If the reader
+    opens the file itself (``opens_file``), the first bytes of a file are checked
+    against its ``signatures`` when it is resolved.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        read,
+        extensions: list = None,
+        signatures: list = None,
+        overrides: list = None,
+        opens_file: bool = True,
+    ):
+        self.name = name
+        self.read = read
+        self.extensions = list(extensions or [])
+        self.signatures = list(signatures or [])
+        self.overrides = list(overrides or [])
+        self.opens_file = opens_file
+
+    def matches(self, head: bytes) -> bool:
+        return any(head.startswith(s) for s in self.signatures)
+
+    def __repr__(self):
+        return f"Reader({self.name})"
+
+
+class UnrecognisedFormat(Exception):
+    """
+    No registered reader handles a file."""
+
+
+class ReaderRegistry:
+    """
+    Registered readers, with the reader resolved for each directory, extension and
+    ``fmt_override`` cached so that dispatch per record is a dictionary lookup.
+
+    For readers with signatures, the first file resolved for a key is sniffed, and
+    its reader cached only if the sniff confirms the extension's reader. A reader
+    chosen from a file's signature applies to that file alone. Other files are
+    only sniffed again, with ``fallback``, if their cached reader fails.
+    """
+
+    def __init__(self, max_cached: int = 4096):
+        self._readers = []
+        self._by_extension = {}
+        self._defaults = {}
+        self._resolved = {}
+        self.max_cached = max_cached
+
+    def register(self, reader: Reader):
+        self._readers.append(reader)
+        for ext in reader.extensions:
+            self._by_extension[ext] = reader
+        self._defaults = {}
+        self._resolved = {}
+
+    def _sniff(self, path: str) -> bytes | None:
+        try:
+            with measure_fetch(path), open_file(path, block_size=SNIFF_BYTES) as f:
+                return f.read(SNIFF_BYTES)
+        except (OSError, ValueError):
+            # Reported by the reader itself
+            return None
+
+    def _match(self, head: bytes) -> Reader | None:
+        for reader in self._readers:
+            if reader.matches(head):
+                return reader
+        return None
+
+    def _default(self, file_ext: str, fmt_override: str) -> tuple:
+        """
+        Reader for an extension and override, and whether files must be sniffed."""
+        key = (file_ext, fmt_override)
+        default = self._defaults.get(key)
+        if default is not None:
+            return default
+
+        for reader in self._readers:
+            if any(o in fmt_override for o in reader.overrides):
+                default = (reader, False)
+                break
+        else:
+            reader = self._by_extension.get(file_ext)
+            if reader is None:
+                raise UnrecognisedFormat(f"File format {file_ext} not recognised!")
+            default = (reader, reader.opens_file and len(reader.signatures) > 0)
+        self._defaults[key] = default
+        return default
+
+    def resolve(
+        self, location: str, fname: str, fmt_override: str = "", sniff: bool = True
+    ) -> Reader:
+        """
+        Reader for a file, resolved once per directory, extension and override.
+        With ``sniff=False``, for a file already read or derived elsewhere, the
+        extension's reader is returned without opening the file."""
+        file_ext = os.path.splitext(fname)[1]
+        key = (location, file_ext, fmt_override)
+        reader = self._resolved.get(key)
+        if reader is not None:
+            return reader
+
+        reader, needs_sniff = self._default(file_ext, fmt_override)
+        if needs_sniff:
+            if not sniff:
+                return reader
+            head = self._sniff(f"{location}/{fname}")
+            if head is not None and not reader.matches(head):
+                match = self._match(head)
+                if match is None:
+                    raise UnrecognisedFormat(
+                        f"{fname} does not look like a {reader.name} file"
+                    )
+                # Not cached, as the other files may well be named correctly
+                return match
+
+        if len(self._resolved) >= self.max_cached:
+            self._resolved = {}
+        self._resolved[key] = reader
+        return reader
+
+    def fallback(self, location: str, fname: str, reader: Reader) -> Reader | None:
+        """
+        Reader for a file that ``reader`` failed to read, if its leading bytes
+        match another registered format."""
+        if not (reader.opens_file and reader.signatures):
+            return None
+        head = self._sniff(f"{location}/{fname}")
+        if head is None or reader.matches(head):
+            return None
+        return self._match(head)
+
+
+readers = ReaderRegistry()
+
+
+def register_reader(reader: Reader):
+    readers.register(reader)
+
+
+def resolve_reader(
+    location: str, fname: str, fmt_override: str = "", sniff: bool = True
+) -> Reader:
+    return readers.resolve(location, fname, fmt_override, sniff)
+
+
+def fallback_reader(location: str, fname: str, reader: Reader) -> Reader | None:
+    return readers.fallback(location, fname, reader)
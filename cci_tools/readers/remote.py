@@ -0,0 +1,189 @@
+import threading
+from array import array
+from contextlib import contextmanager
+
+import fsspec
+
+from cci_tools.core.timing import percentile
+
+ARCHIVE_URL = "https://dap.ceda.ac.uk"
+
+# Local archive paths are read under this root when set, e.g. ARCHIVE_URL or an
+# object store prefix such as ``s3://bucket``.
+_archive_root = None
+
+BLOCK_SIZE = 256 * 1024
+MAX_BLOCKS = 32
+STORAGE_OPTIONS = {}
+
+_local = threading.local()
+
+
+def set_archive_root(
+    root: str = None,
+    block_size: int = None,
+    storage_options: dict = None,
+):
+    """
+    Read archive files (``/neodc/...``) under ``root`` with fsspec rather than from a
+    local mount. ``block_size`` is the size in bytes of each range request, and
+    ``storage_options`` are passed to the fsspec filesystem."""
+    global _archive_root, BLOCK_SIZE, STORAGE_OPTIONS
+    _archive_root = root.rstrip("/") if root else None
+    if block_size is not None:
+        BLOCK_SIZE = block_size
+    if storage_options is not None:
+        STORAGE_OPTIONS = storage_options
+
+
+def is_remote(path: str) -> bool:
+    return "://" in path
+
+
+def resolve_path(path: str) -> str:
+    """
+    Location to read a file from, which is the archive root followed by the local
+    path if a root is set."""
+    if _archive_root is None or is_remote(path) or not path.startswith("/"):
+        return path
+    return _archive_root + path
+
+
+class _CountingFile:
+    """
+    File wrapper counting bytes returned by ``read``, for filesystems without a
+    block cache."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        _add_fetched(len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._f.close()
+
+
+def _counting_fetcher(fetcher):
+    def fetch(start: int, end: int) -> bytes:
+        data = fetcher(start, end)
+        _add_fetched(len(data))
+        return data
+
+    return fetch
+
+
+def open_file(path: str, mode: str = "rb", block_size: int = None):
+    """
+    Open a file for binary reading. Remote files are read with HTTP/object-store
+    range requests of ``block_size`` bytes (``BLOCK_SIZE`` by default) through a
+    block cache, so only the blocks actually read are fetched, and the bytes
+    fetched are counted towards ``fetch_stats``."""
+    path = resolve_path(path)
+    if not is_remote(path):
+        return open(path, mode)
+
+    fs, fs_path = fsspec.core.url_to_fs(path, **STORAGE_OPTIONS)
+    f = fs.open(
+        fs_path,
+        mode,
+        block_size=block_size or BLOCK_SIZE,
+        cache_type="blockcache",
+        cache_options={"maxblocks": MAX_BLOCKS},
+    )
+    cache = getattr(f, "cache", None)
+    if cache is not None and hasattr(cache, "fetcher"):
+        cache.fetcher = _counting_fetcher(cache.fetcher)
+        return f
+    return _CountingFile(f)
+
+
+def read_range(path: str, offset: int = None, length: int = None) -> bytes:
+    """
+    Read ``length`` bytes from ``offset``, or the whole file."""
+    with open_file(path) as f:
+        if offset is None:
+            return f.read()
+        f.seek(offset)
+        return f.read(length)
+
+
+def _add_fetched(nbytes: int):
+    if getattr(_local, "fetched", None) is not None:
+        _local.fetched += nbytes
+
+
+class FetchStats:
+    """
+    Bytes fetched from remote files per record read. Samples may be added from any
+    thread."""
+
+    def __init__(self):
+        self._samples = array("d")
+        self._lock = threading.Lock()
+
+    def add(self, nbytes: int):
+        with self._lock:
+            self._samples.append(nbytes)
+
+    def drain(self) -> list:
+        with self._lock:
+            samples = list(self._samples)
+            self._samples = array("d")
+        return samples
+
+    def merge(self, samples: list):
+        with self._lock:
+            self._samples.extend(samples)
+
+    def summary(self) -> dict:
+        with self._lock:
+            values = sorted(self._samples)
+        if len(values) == 0:
+            return {}
+        return {
+            "count": len(values),
+            "total": sum(values),
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+            "max": values[-1],
+        }
+
+    def report(self):
+        s = self.summary()
+        if len(s) == 0:
+            return
+        print(
+            f"Remote reads: {s['total'] / 1e6:.2f} MB over {s['count']} records "
+            f"(per record p50 {s['p50'] / 1e3:.1f} kB, p95 {s['p95'] / 1e3:.1f} kB, "
+            f"max {s['max'] / 1e3:.1f} kB)"
+        )
+
+
+fetch_stats = FetchStats()
+
+
+@contextmanager
+def measure_fetch(path: str):
+    """
+    Count the bytes fetched by this thread while reading one record's file, adding
+    the total to ``fetch_stats`` if the file is remote."""
+    if not is_remote(resolve_path(path)) or getattr(_local, "fetched", None) is not None:
+        # Local, or already counted by an enclosing read
+        yield
+        return
+
+    _local.fetched = 0
+    try:
+        yield
+    finally:
+        fetch_stats.add(_local.fetched)
+        _local.fetched = None
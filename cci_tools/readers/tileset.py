@@ -0,0 +1,348 @@
+import copy
+import math
+import os
+import re
+import threading
+
+from .file import extract_times_from_file, extract_version
+from .geotiff import bbox_geometry
+from .projection import transform_bboxes
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Tile indices in filenames, as (x, y) for the tile origin to be fitted against.
+TILE_PATTERNS = [
+    # N40E010, S05W120.5
+    (
+        re.compile(
+            r"(?<![A-Za-z0-9])([NS])([0-9]{1,2}(?:\.[0-9]+)?)([EW])([0-9]{1,3}(?:\.[0-9]+)?)(?![0-9])"
+        ),
+        lambda m: (
+            float(m.group(4)) * (1 if m.group(3) == "E" else -1),
+            float(m.group(2)) * (1 if m.group(1) == "N" else -1),
+        ),
+    ),
+    # h18v04
+    (
+        re.compile(r"(?<![A-Za-z0-9])h([0-9]{1,3})v([0-9]{1,3})(?![0-9])"),
+        lambda m: (float(m.group(1)), float(m.group(2))),
+    ),
+    # X012Y034, X12_Y34
+    (
+        re.compile(r"(?<![A-Za-z0-9])X(-?[0-9]+)_?Y(-?[0-9]+)(?![0-9])"),
+        lambda m: (float(m.group(1)), float(m.group(2))),
+    ),
+]
+
+# Fully read files kept per directory for refitting its model
+MAX_SAMPLES = 64
+
+# Fields that must be identical in every sample of a directory
+TEMPLATE_FIELDS = ["platforms", "drs", "format", "epsg", "shape"]
+
+
+def _close(a, b) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=1e-7, abs_tol=1e-9)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_close(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_close(a[k], b[k]) for k in a)
+    return a == b
+
+
+def _tile_index(geotiff_file: str, pattern) -> tuple | None:
+    if pattern is None:
+        return (0.0, 0.0)
+    regex, parse = pattern
+    match = regex.search(os.path.basename(geotiff_file))
+    return parse(match) if match is not None else None
+
+
+class _Axis:
+    """
+    Tile origin along one axis as a linear function of the filename tile index."""
+
+    def __init__(self, indices: list, origins: list, pixel: float):
+        self.slope = None
+        self.known = indices[0]
+        self.intercept = origins[0]
+
+        distinct = {i: o for i, o in zip(indices, origins)}
+        if len(distinct) > 1:
+            (i0, o0), (i1, o1) = list(distinct.items())[:2]
+            self.slope = (o1 - o0) / (i1 - i0)
+            self.intercept = o0 - self.slope * i0
+
+        tolerance = 1e-3 * abs(pixel)
+        for i, o in zip(indices, origins):
+            predicted = self.origin(i)
+            if predicted is None or abs(predicted - o) > tolerance:
+                raise ValueError("Tile origins do not follow the tile index")
+
+    def origin(self, index: float) -> float | None:
+        if self.slope is None:
+            return self.intercept if index == self.known else None
+        return self.slope * index + self.intercept
+
+
+class TileSetModel:
+    """
+    Properties shared by the GeoTIFFs of one directory, learned from fully read
+    samples, from which the ``stac_info`` of other files is derived using only
+    their filenames.
+
+    The CRS, shape, pixel size and other metadata must be identical across the
+    samples, and the tile origins must be a linear function of a tile index in the
+    filename. Times and versions are either constant or parsed from the filename.
+    The model is only kept if it reproduces every sample.
+    """
+
+    def __init__(self, samples: list, read_kwargs: dict):
+        self.read_kwargs = read_kwargs
+        files = [f for f, _ in samples]
+        infos = [i for _, i in samples]
+        first = infos[0]
+
+        for field in TEMPLATE_FIELDS:
+            if any(not _close(i[field], first[field]) for i in infos):
+                raise ValueError(f"{field} differs between samples")
+
+        others = [
+            {k: v for k, v in i["properties"].items() if k != "proj:transform"}
+            for i in infos
+        ]
+        if any(o != others[0] for o in others):
+            raise ValueError("Properties differ between samples")
+
+        self.times_from_filename = any(
+            (i["start_datetime"], i["end_datetime"])
+            != (first["start_datetime"], first["end_datetime"])
+            for i in infos
+        )
+        self.version_from_filename = any(
+            i["version"] != first["version"] for i in infos
+        )
+
+        transforms = [i["transform"] for i in infos]
+        if any(t is None for t in transforms):
+            raise ValueError("Samples have no transform")
+        a, b, _, d, e, _ = transforms[0]
+        if any(not _close([t[0], t[1], t[3], t[4]], [a, b, d, e]) for t in transforms):
+            raise ValueError("Pixel size differs between samples")
+        if b != 0 or d != 0:
+            raise ValueError("Rotated transforms are not supported")
+
+        self.pattern = None
+        for pattern in TILE_PATTERNS:
+            if all(_tile_index(f, pattern) is not None for f in files):
+                self.pattern = pattern
+                break
+
+        indices = [_tile_index(f, self.pattern) for f in files]
+        self.x = _Axis([i[0] for i in indices], [t[2] for t in transforms], a)
+        self.y = _Axis([i[1] for i in indices], [t[5] for t in transforms], e)
+
+        self.bbox_constant = all(_close(i["bbox"], first["bbox"]) for i in infos)
+        self.template = first
+
+        for f, info in samples:
+            if not _close(self.predict(f), info):
+                raise ValueError(f"Derived metadata does not match {f}")
+
+    def predict(self, geotiff_file: str) -> dict | None:
+        """
+        Derived ``stac_info`` for a file, or None if it cannot be derived."""
+        index = _tile_index(geotiff_file, self.pattern)
+        if index is None:
+            return None
+        x0, y0 = self.x.origin(index[0]), self.y.origin(index[1])
+        if x0 is None or y0 is None:
+            return None
+
+        info = copy.deepcopy(self.template)
+        a, b, _, d, e, _ = info["transform"]
+        transform = [a, b, x0, d, e, y0]
+        info["transform"] = transform
+        info["properties"]["proj:transform"] = transform
+
+        if not self.bbox_constant:
+            height, width = info["shape"]
+            left, right = x0, x0 + a * width
+            top, bottom = y0, y0 + e * height
+            bounds = (min(left, right), min(top, bottom), max(left, right), max(top, bottom))
+            bbox = [
+                float(v)
+                for v in transform_bboxes([bounds], f"EPSG:{info['epsg']}")[0]
+            ]
+            if not all(math.isfinite(v) for v in bbox):
+                return None
+            info["bbox"] = bbox
+            info["geo_type"], info["coordinates"] = bbox_geometry(*bbox)
+
+        if self.times_from_filename:
+            start, end = extract_times_from_file(
+                geotiff_file,
+                self.read_kwargs.get("interval"),
+                ecv=self.read_kwargs.get("ecv"),
+            )
+            if start is None:
+                return None
+            info["start_datetime"], info["end_datetime"] = start, end
+
+        if self.version_from_filename:
+            info["version"] = extract_version(geotiff_file)
+
+        return info
+
+
+class _Directory:
+    __slots__ = ("samples", "model", "predicted", "disabled")
+
+    def __init__(self):
+        self.samples = []
+        self.model = None
+        self.predicted = 0
+        self.disabled = False
+
+
+class TileSetInference:
+    """
+    Derive the ``stac_info`` of GeoTIFFs in homogeneous tile directories without
+    opening them.
+
+    The first ``sample_size`` files of each directory are read in full and used to
+    fit a ``TileSetModel``. Files after that are derived from their filenames,
+    except that one in every ``1 / verify_rate`` is still read and compared with
+    its derived metadata, or passed to ``discard`` if the read fails. A mismatch
+    turns inference off for that directory. Files that cannot be derived are read
+    and added to the samples, up to ``MAX_SAMPLES``, and the model refitted.
+    """
+
+    def __init__(self, sample_size: int = 0, verify_rate: float = 0.01):
+        self.configure(sample_size, verify_rate)
+        self._directories = {}
+        self._verify = {}
+        self._lock = threading.Lock()
+        self.derived = 0
+        self.verified = 0
+        self.mismatches = 0
+
+    def configure(self, sample_size: int = 0, verify_rate: float = 0.01):
+        self.sample_size = sample_size
+        self.verify_every = round(1 / verify_rate) if verify_rate > 0 else 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_size > 0
+
+    def _key(self, geotiff_file: str, read_kwargs: dict) -> tuple:
+        return (os.path.dirname(geotiff_file), tuple(sorted(read_kwargs.items())))
+
+    def predict(self, geotiff_file: str, **read_kwargs) -> dict | None:
+        """
+        Derived ``stac_info`` for a file, or None if it must be read, in which case
+        the result should be passed to ``observe``."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            directory = self._directories.get(self._key(geotiff_file, read_kwargs))
+            if directory is None or directory.model is None or directory.disabled:
+                return None
+
+            try:
+                info = directory.model.predict(geotiff_file)
+            except Exception as err:
+                # Reprojection or filename parsing failed, so read the file instead
+                logger.debug(f"Unable to derive metadata of {geotiff_file}: {err}")
+                return None
+            if info is None:
+                return None
+
+            directory.predicted += 1
+            if self.verify_every and directory.predicted % self.verify_every == 0:
+                self._verify[geotiff_file] = info
+                return None
+
+            self.derived += 1
+            return info
+
+    def observe(self, geotiff_file: str, stac_info: dict, **read_kwargs):
+        """
+        Record a file that was read in full, as a sample or to verify the model."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            key = self._key(geotiff_file, read_kwargs)
+            directory = self._directories.setdefault(key, _Directory())
+
+            expected = self._verify.pop(geotiff_file, None)
+            if expected is not None:
+                self.verified += 1
+                if not _close(expected, stac_info):
+                    self.mismatches += 1
+                    directory.disabled = True
+                    logger.warning(
+                        f"Metadata of {geotiff_file} does not match the rest of "
+                        f"{key[0]}, reading all files in this directory"
+                    )
+                return
+
+            if directory.disabled or len(directory.samples) >= MAX_SAMPLES:
+                return
+
+            # Files the model could not derive, such as tiles in a new row, are
+            # added to the samples so the model can be refitted with them.
+            directory.samples.append((geotiff_file, stac_info))
+            if len(directory.samples) < self.sample_size:
+                return
+
+            try:
+                directory.model = TileSetModel(directory.samples, read_kwargs)
+            except Exception as err:
+                if directory.model is not None:
+                    # An outlier, which has been read in full anyway
+                    directory.samples.pop()
+                    return
+                logger.info(f"Not inferring tile metadata for {key[0]}: {err}")
+                directory.disabled = True
+                directory.samples = []
+
+    def discard(self, geotiff_file: str):
+        """
+        Forget a pending verification of a file that could not be read."""
+        with self._lock:
+            self._verify.pop(geotiff_file, None)
+
+    def drain_counts(self) -> tuple:
+        """
+        Return the derived, verified and mismatched counts so far and reset them."""
+        with self._lock:
+            counts = (self.derived, self.verified, self.mismatches)
+            self.derived = self.verified = self.mismatches = 0
+        return counts
+
+    def merge_counts(self, counts: tuple):
+        with self._lock:
+            self.derived += counts[0]
+            self.verified += counts[1]
+            self.mismatches += counts[2]
+
+    def report(self):
+        if not self.enabled or (self.derived + self.verified) == 0:
+            return
+        print(
+            f"Tile inference: {self.derived} GeoTIFFs derived without reading "
+            f"({self.verified} verified, {self.mismatches} mismatched)"
+        )
+
+
+# Shared inference state for the create_items pipeline, enabled by ``--infer_tiles``
+tile_sets = TileSetInference()
@@ -1,32 +1,76 @@
 import xarray as xr
 import os
 import json
+import importlib.util
+import pandas as pd
 from datetime import datetime
 
+from .consolidated import ConsolidatedMetadata, RemoteChunkError, open_consolidated
+from .remote import measure_fetch, resolve_path
 
-def scrape_xarray(location, endpoint, engine, drs, collections):
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _format_time(value) -> str:
+    # cftime dates format themselves, numpy datetimes go through pandas.
+    if hasattr(value, "strftime"):
+        return value.strftime(TIME_FORMAT)
+    return pd.Timestamp(value).strftime(TIME_FORMAT)
+
+
+def _open_lazy(path: str, engine: str) -> xr.Dataset:
+    """
+    Open a dataset without loading any data, including the dimension coordinates
+    that xarray would normally load to build indexes."""
+    kwargs = {"engine": engine}
+    if importlib.util.find_spec("dask") is not None:
+        kwargs["chunks"] = {}
+    try:
+        return xr.open_dataset(path, create_default_indexes=False, **kwargs)
+    except TypeError:
+        # xarray versions without create_default_indexes
+        return xr.open_dataset(path, **kwargs)
+
+
+def coordinate_extent(ds: xr.Dataset, name: str) -> tuple:
+    """
+    First and last values of a 1D coordinate, or of its CF bounds variable if it
+    has one, ordered as (min, max). Only the end elements are read."""
+    coord = ds[name]
+    bounds = coord.attrs.get("bounds")
+    if bounds in ds.variables:
+        first = ds[bounds][0].values.min()
+        last = ds[bounds][-1].values.max()
+    else:
+        dim = coord.dims[0]
+        first, last = coord.isel({dim: [0, -1]}).values
+
+    return min(first, last), max(first, last)
 
-    engine = engine.split("|")[-1]
 
-    ds = xr.open_dataset(os.path.join(location, endpoint), engine=engine)
+def _stac_info(
+    attrs: dict, sizes: dict, extent, drs, collections, engine: str
+) -> dict:
+    """
+    Build STAC info from global attributes, dimension sizes and an ``extent``
+    function giving the decoded (min, max) of a coordinate."""
 
-    start_datetime = str(
-        ds.time.min().dt.strftime("%Y-%m-%dT%H:%M:%SZ").to_numpy()
-    ) or getattr(ds, "time_coverage_start")
-    end_datetime = str(
-        ds.time.max().dt.strftime("%Y-%m-%dT%H:%M:%SZ").to_numpy()
-    ) or getattr(ds, "time_coverage_start")
+    time_min, time_max = extent("time")
+    start_datetime = _format_time(time_min)
+    end_datetime = _format_time(time_max)
 
-    bbox_w = getattr(ds, "geospatial_lon_min", None)
-    bbox_e = getattr(ds, "geospatial_lon_max", None)
-    bbox_s = getattr(ds, "geospatial_lat_min", None)
-    bbox_n = getattr(ds, "geospatial_lat_max", None)
+    bbox_w = attrs.get("geospatial_lon_min", None)
+    bbox_e = attrs.get("geospatial_lon_max", None)
+    bbox_s = attrs.get("geospatial_lat_min", None)
+    bbox_n = attrs.get("geospatial_lat_max", None)
 
     if bbox_w is None:
-        bbox_w = ds.lon.min().to_dict()["data"] - 180  # Transform via flags
-        bbox_e = ds.lon.max().to_dict()["data"] - 180
-        bbox_s = ds.lat.min().to_dict()["data"]
-        bbox_n = ds.lat.max().to_dict()["data"]
+        lon_min, lon_max = extent("lon")
+        lat_min, lat_max = extent("lat")
+        bbox_w = float(lon_min) - 180  # Transform via flags
+        bbox_e = float(lon_max) - 180
+        bbox_s = float(lat_min)
+        bbox_n = float(lat_max)
 
     geo_type = "Polygon"
     if bbox_w == bbox_e and bbox_n == bbox_s:
@@ -45,16 +89,16 @@ def scrape_xarray(location, endpoint, engine, drs, collections):
     vn = None
     versions = ["product_version", "data_specs_version"]
     for v in versions:
-        vn = getattr(ds, v, vn)
+        vn = attrs.get(v, vn)
 
-    platform = getattr(ds, "platform", None)
+    platform = attrs.get("platform", None)
     if platform is not None:
         platform = [platform]
 
     properties = {
         "datetime": None,
-        "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "created": datetime.now().strftime(TIME_FORMAT),
+        "updated": datetime.now().strftime(TIME_FORMAT),
         "start_datetime": start_datetime,
         "end_datetime": end_datetime,
         "license": "other",
@@ -64,7 +108,7 @@ def scrape_xarray(location, endpoint, engine, drs, collections):
         "collections": collections,
         "proj:transform": None,
         "proj:epsg": "4326",
-        "proj:shape": (len(ds.time), len(ds.lat), len(ds.lon)),
+        "proj:shape": (sizes["time"], sizes["lat"], sizes["lon"]),
     }
 
     return {
@@ -75,3 +119,63 @@ def scrape_xarray(location, endpoint, engine, drs, collections):
         "properties": properties,
         "format": engine,
     }
+
+
+def scrape_xarray(
+    location,
+    endpoint,
+    engine,
+    drs,
+    collections,
+    metadata_only=False,
+    metadata: ConsolidatedMetadata = None,
+):
+    """
+    Extract STAC info from an xarray-readable dataset (e.g. kerchunk or zarr).
+
+    With ``metadata_only`` only the time and lat/lon extents are read, from CF
+    bounds or the end values of each coordinate (lat/lon from the ``geospatial_*``
+    attributes where present). Kerchunk references and consolidated zarr stores are
+    read directly, or from ``metadata`` if already read with ``open_consolidated``,
+    falling back to a lazily opened dataset when a chunk cannot be fetched.
+    """
+
+    engine = engine.split("|")[-1]
+    path = resolve_path(os.path.join(location, endpoint))
+
+    if not metadata_only:
+        with xr.open_dataset(path, engine=engine) as ds:
+            return _stac_info(
+                ds.attrs,
+                ds.sizes,
+                lambda name: (ds[name].min().values[()], ds[name].max().values[()]),
+                drs,
+                collections,
+                engine,
+            )
+
+    with measure_fetch(path):
+        if metadata is None:
+            metadata = open_consolidated(path)
+        if metadata is not None:
+            try:
+                return _stac_info(
+                    metadata.attrs,
+                    metadata.sizes,
+                    metadata.coordinate_extent,
+                    drs,
+                    collections,
+                    engine,
+                )
+            except (RemoteChunkError, KeyError, ValueError, TypeError):
+                pass
+
+    with _open_lazy(path, engine) as ds:
+        return _stac_info(
+            ds.attrs,
+            ds.sizes,
+            lambda name: coordinate_extent(ds, name),
+            drs,
+            collections,
+            engine,
+        )
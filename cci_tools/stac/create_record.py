@@ -6,11 +6,29 @@ __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 import json
 import requests
 import os
-
-from cci_tools.readers.geotiff import read_geotiff
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cci_tools.readers.geotiff import read_geotiff, scan_geotiffs
+from cci_tools.readers.netcdf import read_netcdf_header, read_netcdf_headers
+from cci_tools.readers.registry import (
+    SIGNATURES,
+    Reader,
+    UnrecognisedFormat,
+    fallback_reader,
+    register_reader,
+    resolve_reader,
+)
+from cci_tools.readers.remote import fetch_stats
+from cci_tools.readers.tileset import tile_sets
+from cci_tools.readers.consolidated import ConsolidatedMetadata
 from cci_tools.readers.xarray import scrape_xarray
 from cci_tools.stac.post_record import post_record
-from cci_tools.core.utils import ALLOWED_OPENSEARCH_EXTS, STAC_API
+from cci_tools.core.utils import ALLOWED_OPENSEARCH_EXTS, STAC_API, normalise_ecv
+from cci_tools.core.ratelimit import artefacts_limiter
+from cci_tools.core.transport import stac_writes
+from cci_tools.core.timing import timer
 
 import logging
 from cci_tools.core.utils import logstream
@@ -38,36 +56,146 @@ def extract_collection(es_all_dict: dict):
 
     if type(ecv) is list:
         if len(ecv) == 1:
-            ecv = str(ecv[0]).lower()
+            ecv = ecv[0]
         else:
             raise ValueError("Handling of multi-ecv record not supported")
 
-    return ecv
+    if ecv is None:
+        return None
+    return normalise_ecv(ecv)
 
 
-def get_licence(ecv: str):
+LICENCE_CACHE_FILE = os.environ.get(
+    "CCI_LICENCE_CACHE", os.path.expanduser("~/.cache/cci_tools/licences.json")
+)
+LICENCE_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Fallback URLs used when no licence could be confirmed are only kept in memory,
+# and looked up again after this long
+LICENCE_RETRY_TTL = 5 * 60
+
+_licence_cache = {}
+
+
+def _read_licence_cache() -> dict:
+    try:
+        with open(LICENCE_CACHE_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_licence_cache(entries: dict):
     """
-    Construct URL to the relevant data license on the CEDA artefacts server
+    Merge entries into the on-disk licence cache, replacing the file atomically so
+    concurrent processes never see a partial cache."""
+    try:
+        os.makedirs(os.path.dirname(LICENCE_CACHE_FILE), exist_ok=True)
+        cache = {**_read_licence_cache(), **entries}
+        tmp_file = f"{LICENCE_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, LICENCE_CACHE_FILE)
+    except OSError as err:
+        logger.warning(f"Unable to write licence cache {LICENCE_CACHE_FILE}: {err}")
+
+
+def clear_licence_cache():
+    """
+    Forget all cached licence URLs, in memory and on disk."""
+    _licence_cache.clear()
+    try:
+        os.remove(LICENCE_CACHE_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def _fetch_licence(ecv: str) -> dict:
+    """
+    Construct URL to the relevant data license on the CEDA artefacts server.
+
+    Returns a licence cache entry. If no candidate URL returns 200, including when
+    the server cannot be reached, the entry holds the plain ``.pdf`` URL and is
+    marked as unconfirmed.
     """
     for license in [
         "_terms_and_conditions_v2.pdf",
         "_terms_and_conditions.pdf",
         ".pdf",
     ]:
-        r = requests.get(
-            f"https://artefacts.ceda.ac.uk/licences/specific_licences/esacci_{ecv}{license}"
-        )
+        url = f"https://artefacts.ceda.ac.uk/licences/specific_licences/esacci_{ecv}{license}"
+        artefacts_limiter.acquire()
+        try:
+            r = requests.get(url, timeout=60)
+        except requests.RequestException as err:
+            logger.warning(f"Licence lookup failed for {url}: {err}")
+            continue
         if r.status_code == 200:
-            break
-    url = (
-        f"https://artefacts.ceda.ac.uk/licences/specific_licences/esacci_{ecv}{license}"
+            return {"url": url, "cached": time.time(), "confirmed": True}
+
+    logger.warning(f"No licence confirmed for {ecv}, using {url}")
+    return {"url": url, "cached": time.time(), "confirmed": False}
+
+
+def _is_fresh(entry: dict, now: float) -> bool:
+    ttl = LICENCE_CACHE_TTL if entry.get("confirmed", True) else LICENCE_RETRY_TTL
+    return now - entry["cached"] < ttl
+
+
+def get_licence(ecv: str):
+    """
+    Get the URL to the relevant data license for an ECV, using the in-process or
+    on-disk cache where an entry is younger than ``LICENCE_CACHE_TTL``. Only
+    confirmed licence URLs are written to the on-disk cache.
+    """
+    entry = _licence_cache.get(ecv)
+    if entry is None:
+        entry = _read_licence_cache().get(ecv)
+
+    if entry is not None and _is_fresh(entry, time.time()):
+        _licence_cache[ecv] = entry
+        return entry["url"]
+
+    entry = _fetch_licence(ecv)
+    _licence_cache[ecv] = entry
+    if entry["confirmed"]:
+        _write_licence_cache({ecv: entry})
+    return entry["url"]
+
+
+def warm_licences(ecvs: list, threads: int = 8):
+    """
+    Resolve the licences for a set of ECVs up front, so record processing
+    (including any worker processes) only reads from the cache."""
+    cache = _read_licence_cache()
+    now = time.time()
+    for ecv, entry in cache.items():
+        if _is_fresh(entry, now):
+            _licence_cache.setdefault(ecv, entry)
+
+    to_fetch = sorted(
+        {
+            ecv
+            for ecv in ecvs
+            if ecv not in _licence_cache or not _is_fresh(_licence_cache[ecv], now)
+        }
     )
+    if len(to_fetch) == 0:
+        return
 
-    return url
+    logger.info(f"Resolving licences for {len(to_fetch)} ECVs")
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        entries = dict(zip(to_fetch, pool.map(_fetch_licence, to_fetch)))
+
+    _licence_cache.update(entries)
+    confirmed = {ecv: entry for ecv, entry in entries.items() if entry["confirmed"]}
+    if confirmed:
+        _write_licence_cache(confirmed)
 
 
 def extract_opensearch(es_all_dict: dict):
     incomplete = False
+    missing = []
 
     # Extract geospatial bounding box (W, N, E, S)
     try:
@@ -96,6 +224,7 @@ def extract_opensearch(es_all_dict: dict):
         logger.info(f"Exception extracting opensearch geo-information: {err}")
         logger.info(" > Using Global Defaults")
         incomplete = True
+        missing.append("spatial")
         bbox = [-180, -90, 180, 90]
         geo_type = "Polygon"
         coordinates = [[[-180, -90], [180, -90], [180, 90], [-180, 90], [-180, -90]]]
@@ -110,6 +239,7 @@ def extract_opensearch(es_all_dict: dict):
         logger.info(f"Exception extracting opensearch temporal information: {err}")
         logger.info(" > Using Global Defaults")
         incomplete = True
+        missing.append("temporal")
         start_datetime = "0001-01-01T00:00:00Z"
         end_datetime = "0001-01-01T00:00:00Z"
 
@@ -121,6 +251,7 @@ def extract_opensearch(es_all_dict: dict):
         logger.info(f"Exception extracting opensearch facet information: {err}")
         logger.info(" > Using Global Defaults")
         incomplete = True
+        missing.append("facets")
         version = "Unknown"
         platforms = "Unknown"
         drs = None
@@ -152,11 +283,49 @@ def extract_opensearch(es_all_dict: dict):
         "coordinates": coordinates,
         "properties": properties,
         "format": format,
+        "missing": missing,
     }
 
     return stac_info, properties
 
 
+def fill_from_header(stac_info: dict, header: dict) -> bool:
+    """
+    Fill the spatial and temporal information missing from an OpenSearch record
+    with the extent read from the file header. Returns True if the record is now
+    complete."""
+    missing = stac_info["missing"]
+
+    if "spatial" in missing and "bbox" in header:
+        bbox_w, bbox_s, bbox_e, bbox_n = header["bbox"]
+        stac_info["bbox"] = [bbox_w, bbox_s, bbox_e, bbox_n]
+        if bbox_w == bbox_e and bbox_n == bbox_s:
+            stac_info["geo_type"] = "Point"
+            stac_info["coordinates"] = [bbox_w, bbox_s]
+        else:
+            stac_info["geo_type"] = "Polygon"
+            stac_info["coordinates"] = [
+                [
+                    [bbox_w, bbox_s],
+                    [bbox_e, bbox_s],
+                    [bbox_e, bbox_n],
+                    [bbox_w, bbox_n],
+                    [bbox_w, bbox_s],
+                ]
+            ]
+        missing.remove("spatial")
+
+    if "temporal" in missing and "start_datetime" in header:
+        stac_info["start_datetime"] = header["start_datetime"]
+        stac_info["end_datetime"] = header["end_datetime"]
+        missing.remove("temporal")
+
+    if len(missing) == 0:
+        stac_info["properties"].pop("incomplete", None)
+        return True
+    return False
+
+
 def handle_process_record(
     record: dict,
     output_dir: str,
@@ -167,8 +336,16 @@ def handle_process_record(
     start_time: str = None,
     end_time: str = None,
     halt: bool = False,
+    writer=None,
     **kwargs,
 ) -> str:
+    """
+    Create the STAC item for an OpenSearch record and store it.
+
+    Items are written to ``{output_dir}/{collection}/stac_{id}.json``, posted to the
+    STAC API if ``output_dir`` is ``UPLOAD``, or passed to ``writer`` if one is given.
+    Returns the outcome of the record ("OK", "Excluded", "Incomplete" or an error).
+    """
 
     incomplete = False
     if exclusion in record["_source"]["info"]["name"]:
@@ -179,15 +356,16 @@ def handle_process_record(
 
     try:
         # Process OpenSearch record
-        stac_dict, incomplete = process_record(
-            record["_source"],
-            drs,
-            stac_api=stac_api,
-            splitter=splitter,
-            start_time=start_time,
-            end_time=end_time,
-            **kwargs,
-        )
+        with timer.stage("process_record"):
+            stac_dict, incomplete = process_record(
+                record["_source"],
+                drs,
+                stac_api=stac_api,
+                splitter=splitter,
+                start_time=start_time,
+                end_time=end_time,
+                **kwargs,
+            )
 
         if stac_dict.get("error"):
             return stac_dict["error"]
@@ -201,7 +379,11 @@ def handle_process_record(
     # Create directory for each CCI ECV/Project
     ecv_dir = stac_dict["collection"]
     id = stac_dict["id"]
-    if output_dir != 'UPLOAD': # UPLOAD directly to the STAC API
+    if writer is not None:
+        with timer.stage("write"):
+            writer(stac_dict)
+
+    elif output_dir != 'UPLOAD': # UPLOAD directly to the STAC API
         cci_stac_dir = f"{output_dir}/{ecv_dir}/"
 
         if not os.path.isdir(cci_stac_dir):
@@ -220,11 +402,15 @@ def handle_process_record(
         id = stac_dict["id"]
         stac_file = f"{cci_stac_dir}stac_{id}.json"
 
-        with open(stac_file, "w", encoding="utf-8") as file:
-            json.dump(stac_dict, file, ensure_ascii=False, indent=2)
-    
+        with timer.stage("serialise"):
+            content = json.dumps(stac_dict, ensure_ascii=False, indent=2)
+        with timer.stage("write"):
+            with open(stac_file, "w", encoding="utf-8") as file:
+                file.write(content)
+
     else:
-        _ = post_record(stac_dict, {})
+        with timer.stage("upload"):
+            _ = post_record(stac_dict, {})
 
     if incomplete:
         return "Incomplete"
@@ -232,6 +418,386 @@ def handle_process_record(
     return "OK"
 
 
+def _init_pool_worker(share: float):
+    """
+    Limit a worker process to its share of the rate limits, which each process
+    would otherwise apply in full."""
+    if artefacts_limiter.rate:
+        artefacts_limiter.set_rate(artefacts_limiter.rate * share)
+
+    controller = stac_writes.controller
+    if controller.max_rate:
+        stac_writes.configure(
+            max_retries=stac_writes.max_retries,
+            max_rate=controller.max_rate * share,
+            max_concurrency=controller.max_concurrency,
+            adaptive=controller.adaptive,
+        )
+
+
+def _pool_handle_record(args: tuple) -> tuple[str, list]:
+    """
+    Process pool entrypoint for ``handle_process_record``.
+
+    If ``defer_write`` is set, items are returned to the parent process to be
+    written instead of being stored by the worker. Stage timings are returned
+    for the parent to merge if ``timing`` is set, along with the bytes fetched
+    by remote reads, the tile inference counts and the STAC API write counts."""
+    record, output_dir, defer_write, timing, kwargs = args
+
+    timer.enabled = timing
+    items = []
+    if defer_write:
+        kwargs = {**kwargs, "writer": items.append}
+    response = handle_process_record(record, output_dir, **kwargs)
+
+    timings = timer.drain()
+    if defer_write:
+        # Deferred items are written, and timed, by the parent process.
+        timings.pop("write", None)
+    return (
+        response,
+        items,
+        timings,
+        fetch_stats.drain(),
+        tile_sets.drain_counts(),
+        stac_writes.drain_counts(),
+    )
+
+
+def _geotiff_file(es_all_dict: dict, fmt_override: str = None) -> str | None:
+    """
+    Path of the GeoTIFF ``process_record`` would read for a record, if any."""
+    if "xarray" in (fmt_override or ""):
+        return None
+
+    fname, _, file_ext = extract_id(es_all_dict)
+    if file_ext not in (".tif", ".TIF"):
+        return None
+    return es_all_dict["info"].get("directory") + "/" + fname
+
+
+def _geotiff_read_kwargs(kwargs: dict, ecv: str) -> dict:
+    """
+    Options of ``read_geotiff`` that affect the ``stac_info`` of a file."""
+    return {
+        "start_time": kwargs.get("start_time"),
+        "end_time": kwargs.get("end_time"),
+        "openeo": kwargs.get("openeo", False),
+        "interval": kwargs.get("interval"),
+        "ecv": ecv,
+    }
+
+
+def _netcdf_file(es_all_dict: dict, fmt_override: str = None) -> str | None:
+    """
+    Path of a NetCDF file whose OpenSearch record lacks spatial or temporal
+    information, so ``process_record`` would read its header."""
+    if "xarray" in (fmt_override or ""):
+        return None
+
+    fname, _, file_ext = extract_id(es_all_dict)
+    info = es_all_dict["info"]
+    if file_ext != ".nc" or (info.get("spatial") and info.get("temporal")):
+        return None
+    return info.get("directory") + "/" + fname
+
+
+def _prefetch_netcdf_headers(records, workers: int, kwargs: dict):
+    """
+    Add the header extent of incomplete NetCDF records, read ahead of time by
+    ``read_netcdf_headers``, to each ``(label, record, prefetched)`` triple."""
+    buffered = deque()
+
+    def netcdf_files():
+        for label, record, prefetched in records:
+            buffered.append((label, record, prefetched))
+            yield _netcdf_file(record["_source"], kwargs.get("fmt_override"))
+
+    for header in read_netcdf_headers(netcdf_files(), workers=workers):
+        label, record, prefetched = buffered.popleft()
+        if header is not None:
+            prefetched = {**prefetched, "netcdf_header": header}
+        yield label, record, prefetched
+
+
+def _prefetch_geotiffs(records, threads: int, kwargs: dict):
+    """
+    Add the GeoTIFF ``stac_info``, read ahead of time by ``scan_geotiffs`` or
+    derived by ``tile_sets``, to each ``(label, record, prefetched)`` triple."""
+    buffered = deque()
+
+    def geotiff_files():
+        for label, record, prefetched in records:
+            source = record["_source"]
+            geotiff_file = _geotiff_file(source, kwargs.get("fmt_override"))
+            if geotiff_file is None:
+                buffered.append((label, record, prefetched, None, None))
+                yield None
+                continue
+
+            try:
+                ecv = extract_collection(source)
+            except ValueError:
+                # Reported when the record itself is processed
+                ecv = None
+            read_kwargs = _geotiff_read_kwargs(kwargs, ecv)
+
+            stac_info = tile_sets.predict(geotiff_file, **read_kwargs)
+            if stac_info is not None:
+                prefetched = {**prefetched, "geotiff_info": stac_info}
+                buffered.append((label, record, prefetched, None, None))
+                yield None
+                continue
+
+            buffered.append((label, record, prefetched, geotiff_file, read_kwargs))
+            yield geotiff_file, {"ecv": ecv}
+
+    for stac_info in scan_geotiffs(
+        geotiff_files(),
+        threads=threads,
+        start_time=kwargs.get("start_time"),
+        end_time=kwargs.get("end_time"),
+        fill_incomplete=True,
+        openeo=kwargs.get("openeo", False),
+        interval=kwargs.get("interval"),
+    ):
+        label, record, prefetched, geotiff_file, read_kwargs = buffered.popleft()
+        if stac_info is not None:
+            prefetched = {**prefetched, "geotiff_info": stac_info}
+            if isinstance(stac_info, Exception):
+                tile_sets.discard(geotiff_file)
+            else:
+                tile_sets.observe(geotiff_file, stac_info, **read_kwargs)
+        yield label, record, prefetched
+
+
+def handle_process_records(
+    records,
+    output_dir: str,
+    workers: int = 1,
+    queue_size: int = None,
+    geotiff_threads: int = 0,
+    netcdf_workers: int = 0,
+    pool_share: float = 1.0,
+    **kwargs,
+):
+    """
+    Process a stream of ``(label, record)`` pairs, yielding ``(label, record, response)``
+    in the same order the records were given.
+
+    With ``workers > 1`` records are fanned out across a process pool. At most
+    ``queue_size`` records (default ``4 * workers``) are in flight at any time, so
+    memory stays flat however many records the input stream produces. A ``writer``
+    is always called from this process, in record order. The workers split
+    ``pool_share`` of the STAC API and artefacts rate limits evenly between them.
+
+    Otherwise, with ``geotiff_threads > 0`` GeoTIFF headers are read ahead on a
+    thread pool while earlier records are being processed, and with
+    ``netcdf_workers > 0`` the headers of NetCDF files whose OpenSearch records
+    are incomplete are read ahead on a process pool. Workers read NetCDF headers
+    themselves when this is set.
+    """
+
+    if netcdf_workers > 0:
+        kwargs["read_headers"] = True
+
+    if workers <= 1:
+        records = ((label, record, {}) for label, record in records)
+        if geotiff_threads > 0:
+            records = _prefetch_geotiffs(records, geotiff_threads, kwargs)
+        if netcdf_workers > 0:
+            records = _prefetch_netcdf_headers(records, netcdf_workers, kwargs)
+
+        for label, record, prefetched in records:
+            yield label, record, handle_process_record(
+                record, output_dir, **prefetched, **kwargs
+            )
+        return
+
+    writer = kwargs.pop("writer", None)
+
+    def collect(future):
+        response, items, timings, fetched, tile_counts, write_counts = future.result()
+        timer.merge(timings)
+        fetch_stats.merge(fetched)
+        tile_sets.merge_counts(tile_counts)
+        stac_writes.merge_counts(write_counts)
+        for item in items:
+            with timer.stage("write"):
+                writer(item)
+        return response
+
+    queue_size = queue_size or 4 * workers
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_pool_worker,
+        initargs=(pool_share / workers,),
+    ) as pool:
+        for label, record in records:
+            pending.append(
+                (
+                    label,
+                    record,
+                    pool.submit(
+                        _pool_handle_record,
+                        (
+                            record,
+                            output_dir,
+                            writer is not None,
+                            timer.enabled,
+                            kwargs,
+                        ),
+                    ),
+                )
+            )
+            if len(pending) >= queue_size:
+                label, record, future = pending.popleft()
+                yield label, record, collect(future)
+
+        while pending:
+            label, record, future = pending.popleft()
+            yield label, record, collect(future)
+
+
+def _read_xarray(
+    es_all_dict,
+    location,
+    fname,
+    file_ext,
+    ecv,
+    drs=None,
+    collections=None,
+    fmt_override="",
+    metadata_only=False,
+    consolidated=None,
+    **kwargs,
+) -> tuple:
+    """
+    Extract STAC info from an xarray-readable dataset (``fmt_override`` xarray)."""
+    with timer.stage("scrape_xarray"):
+        stac_info = scrape_xarray(
+            location,
+            fname,
+            fmt_override,
+            drs,
+            collections,
+            metadata_only=metadata_only,
+            metadata=consolidated,
+        )
+    return stac_info, stac_info["properties"], False
+
+
+def _read_opensearch(
+    es_all_dict,
+    location,
+    fname,
+    file_ext,
+    ecv,
+    read_headers=False,
+    netcdf_header=None,
+    **kwargs,
+) -> tuple:
+    """
+    Information can only be extracted from the OpenSearch record, except for the
+    extent of incomplete NetCDF records, which may be read from the file header."""
+
+    with timer.stage("extract_opensearch"):
+        stac_info, properties = extract_opensearch(es_all_dict)
+    incomplete = stac_info["properties"].get("incomplete", False)
+
+    if incomplete and file_ext == ".nc" and (read_headers or netcdf_header):
+        if netcdf_header is None:
+            try:
+                with timer.stage("read_netcdf_header"):
+                    netcdf_header = read_netcdf_header(location + "/" + fname)
+            except Exception as err:
+                netcdf_header = err
+
+        if isinstance(netcdf_header, Exception):
+            logger.info(f"Unable to read header of {fname}: {netcdf_header}")
+        else:
+            incomplete = not fill_from_header(stac_info, netcdf_header)
+
+    if stac_info["format"] == None:
+        stac_info["format"] = (file_ext[1:]).upper()
+
+    stac_info["format"] = stac_info["format"].replace(" ", "_")
+    return stac_info, properties, incomplete
+
+
+def _read_geotiff(
+    es_all_dict,
+    location,
+    fname,
+    file_ext,
+    ecv,
+    geotiff_info=None,
+    start_time=None,
+    end_time=None,
+    openeo=False,
+    interval=None,
+    **kwargs,
+) -> tuple:
+    """
+    Information is extracted from the OpenSearch record and the GeoTIFF file itself."""
+
+    if isinstance(geotiff_info, Exception):
+        raise geotiff_info
+
+    geotiff_file = location + "/" + fname
+    read_kwargs = _geotiff_read_kwargs(
+        {
+            "start_time": start_time,
+            "end_time": end_time,
+            "openeo": openeo,
+            "interval": interval,
+        },
+        ecv,
+    )
+
+    if geotiff_info is None:
+        geotiff_info = tile_sets.predict(geotiff_file, **read_kwargs)
+
+    if geotiff_info is not None:
+        # Already read by ``scan_geotiffs`` or derived by ``tile_sets``
+        stac_info = geotiff_info
+    else:
+        try:
+            with timer.stage("read_geotiff"):
+                stac_info = read_geotiff(
+                    geotiff_file, fill_incomplete=True, **read_kwargs
+                )
+            tile_sets.observe(geotiff_file, stac_info, **read_kwargs)
+        finally:
+            # Left pending only if the read failed
+            tile_sets.discard(geotiff_file)
+
+    properties = stac_info["properties"]
+    return stac_info, properties, properties.get("incomplete", False)
+
+
+register_reader(Reader("xarray", _read_xarray, overrides=["xarray"]))
+register_reader(
+    Reader(
+        "OpenSearch",
+        _read_opensearch,
+        extensions=ALLOWED_OPENSEARCH_EXTS,
+        signatures=SIGNATURES["hdf5"] + SIGNATURES["netcdf3"],
+        opens_file=False,
+    )
+)
+register_reader(
+    Reader(
+        "GeoTIFF",
+        _read_geotiff,
+        extensions=[".tif", ".TIF"],
+        signatures=SIGNATURES["tiff"],
+    )
+)
+
+
 def process_record(
     es_all_dict: dict,
     drs: str | None,
@@ -243,10 +809,14 @@ def process_record(
     fmt_override: str = None,
     collections: list = None,
     interval: str = None,
+    geotiff_info: dict | Exception = None,
+    metadata_only: bool = False,
+    read_headers: bool = False,
+    netcdf_header: dict | Exception = None,
+    consolidated: ConsolidatedMetadata = None,
     **kwargs,
 ) -> tuple:
 
-    incomplete = False
     # Extract filename, file id, and file extension
     fname, file_id, file_ext = extract_id(es_all_dict)
 
@@ -257,58 +827,48 @@ def process_record(
     ecv = extract_collection(es_all_dict)
 
     # Construct url to license on the CEDA archive assets server
-    url = get_licence(ecv)
+    with timer.stage("licence"):
+        url = get_licence(ecv)
 
     # Extract dataset ID (UUID)
     uuid = es_all_dict["projects"]["opensearch"].get("datasetId")
 
     fmt_override = fmt_override or ""
-    if "xarray" in fmt_override:
-        stac_info = scrape_xarray(location, fname, fmt_override, drs, collections)
-        properties = stac_info["properties"]
-
-    elif file_ext in ALLOWED_OPENSEARCH_EXTS:
-        # Information can only be extracted from OpenSearch record
-
-        stac_info, properties = extract_opensearch(es_all_dict)
-        incomplete = stac_info["properties"].get("incomplete", False)
-
-        if stac_info["format"] == None:
-            stac_info["format"] = (file_ext[1:]).upper()
-
-        stac_info["format"] = stac_info["format"].replace(" ", "_")
-
-        if not isinstance(stac_info, dict):
-            logger.error(
-                "OpenSearch record does not contain the required information to create a STAC record."
-            )
-            return {"error": "InsufficientInformation"}, incomplete
-
-    elif file_ext == ".tif" or file_ext == ".TIF":
-        # === GeoTIFF ===
-        # Information will be extracted from the OpenSearch record and the GeoTIFF file itself
-
-        stac_info = read_geotiff(
-            location + "/" + fname,
-            start_time=start_time,
-            end_time=end_time,
-            fill_incomplete=True,
-            openeo=openeo,
-            interval=interval,
+    try:
+        # Files already read by ``scan_geotiffs`` or derived by ``tile_sets`` are
+        # not opened again to check their format
+        reader = resolve_reader(
+            location, fname, fmt_override, sniff=not isinstance(geotiff_info, dict)
         )
-
-        incomplete = stac_info["properties"].get("incomplete", False)
-
-        if not isinstance(stac_info, dict):
-            logger.error(
-                f"GeoTIFF file does not contain the required information to create a STAC record: {location}/{fname}"
-            )
-            return {"error": "InsufficientInformation"}, incomplete
-
-    else:
-        logger.error(f"File format {file_ext} not recognised!")
+    except UnrecognisedFormat as err:
+        logger.error(str(err))
         return {"error": "FormatUnrecognised"}, False
 
+    read_args = (es_all_dict, location, fname, file_ext, ecv)
+    options = dict(
+        drs=drs,
+        collections=collections,
+        fmt_override=fmt_override,
+        metadata_only=metadata_only,
+        read_headers=read_headers,
+        netcdf_header=netcdf_header,
+        consolidated=consolidated,
+        geotiff_info=geotiff_info,
+        start_time=start_time,
+        end_time=end_time,
+        openeo=openeo,
+        interval=interval,
+    )
+    try:
+        stac_info, properties, incomplete = reader.read(*read_args, **options)
+    except Exception:
+        # A file with the wrong extension among correctly named ones
+        other = fallback_reader(location, fname, reader)
+        if other is None:
+            raise
+        logger.info(f"{fname} is not a {reader.name} file, reading as {other.name}")
+        stac_info, properties, incomplete = other.read(*read_args, **options)
+
     exts = [
         "https://stac-extensions.github.io/projection/v1.1.0/schema.json",
         "https://stac-extensions.github.io/classification/v1.0.0/schema.json",
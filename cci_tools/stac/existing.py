@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import asyncio
+import hashlib
+import threading
+from array import array
+
+import numpy as np
+from elasticsearch import NotFoundError
+
+from cci_tools.core.utils import scan_index
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+def _id_hash(item_id: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(item_id.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class ItemIdSet:
+    """
+    Compact set of item ids, held as a sorted array of 64-bit hashes (8 bytes per
+    item). A hash collision can report an item as present when it is not, which
+    callers must tolerate."""
+
+    def __init__(self, item_ids=()):
+        hashes = array("Q", (_id_hash(i) for i in item_ids))
+        self._hashes = np.unique(np.frombuffer(hashes, dtype=np.uint64))
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, item_id: str) -> bool:
+        h = np.uint64(_id_hash(item_id))
+        i = np.searchsorted(self._hashes, h)
+        return i < len(self._hashes) and self._hashes[i] == h
+
+
+def fetch_item_ids(collection: str, page_size: int = 10000) -> ItemIdSet:
+    """
+    Ids of all items in a STAC collection, from an ids-only scan of its
+    ``items_<collection>`` index. A collection with no index has no items."""
+    try:
+        hits = scan_index(
+            {"query": {"match_all": {}}},
+            index=f"items_{collection}",
+            page_size=page_size,
+            source=["id"],
+        )
+        ids = ItemIdSet(hit["_source"]["id"] for hit in hits)
+    except NotFoundError:
+        ids = ItemIdSet()
+    logger.info(f"Collection:{collection} {len(ids)} existing items")
+    return ids
+
+
+class ExistingItems:
+    """
+    Existing item ids per collection, fetched once on first use, so that items can
+    be created with POST or updated with PUT without a failed request first."""
+
+    def __init__(self, page_size: int = 10000):
+        self.page_size = page_size
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _ids(self, collection: str) -> ItemIdSet:
+        ids = self._collections.get(collection)
+        if ids is None:
+            with self._lock:
+                ids = self._collections.get(collection)
+                if ids is None:
+                    ids = fetch_item_ids(collection, self.page_size)
+                    self._collections[collection] = ids
+        return ids
+
+    def contains(self, collection: str, item_id: str) -> bool:
+        return item_id in self._ids(collection)
+
+    async def acontains(self, collection: str, item_id: str) -> bool:
+        """
+        ``contains`` for use in an event loop, fetching a collection's ids in a
+        thread so that requests already in flight keep running."""
+        ids = self._collections.get(collection)
+        if ids is None:
+            ids = await asyncio.to_thread(self._ids, collection)
+        return item_id in ids
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import json
+import os
+import threading
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+class RecordJournal:
+    """
+    Append-only NDJSON journal of the records processed by ``create_items``.
+
+    Each line holds the configuration, ES ``_id``, sort key, label and outcome of one
+    record. Lines are committed, written and fsync'd together, every ``sync_every``
+    records, so after a crash the journal holds a committed prefix of the run that
+    ``--resume`` can continue from. Hooks added with ``add_sync_hook`` run before
+    each commit, so output the entries vouch for is made durable first.
+    """
+
+    def __init__(self, path: str, resume: bool = False, sync_every: int = 100):
+        self.path = path
+        self.sync_every = sync_every
+        self._entries = {}
+        self._pending = []
+        self._hooks = []
+        self._lock = threading.Lock()
+
+        if resume:
+            self._load()
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            logger.warning(f"No journal found at {self.path}, starting from scratch")
+            return
+
+        committed = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written final line from an interrupted run.
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._entries.setdefault(entry["config"], []).append(entry)
+                committed += len(line)
+
+        # Drop anything after the committed prefix so new entries are not appended
+        # to a partial line.
+        if committed < os.path.getsize(self.path):
+            os.truncate(self.path, committed)
+
+    def completed(self, config: str) -> list:
+        """
+        Journal entries already committed for a configuration, in processing order."""
+        return self._entries.get(config, [])
+
+    def resume_after(self, config: str) -> list | None:
+        """
+        The ``search_after`` position to restart a directory scan for a configuration.
+
+        The trailing ``_shard_doc`` tiebreaker is specific to the point-in-time of the
+        previous run, so it is replaced by -1 to restart at the last committed sort
+        values. Records already completed at that position must be skipped by id.
+        """
+        for entry in reversed(self.completed(config)):
+            if entry.get("sort"):
+                return entry["sort"][:-1] + [-1]
+        return None
+
+    def add_sync_hook(self, hook):
+        """
+        Call ``hook()`` before each batch of entries is committed."""
+        self._hooks.append(hook)
+
+    def write(self, config: str, record: dict, label: str, outcome: str):
+        entry = {
+            "config": config,
+            "id": record.get("_id"),
+            "sort": record.get("sort"),
+            "label": label,
+            "outcome": outcome,
+        }
+        with self._lock:
+            self._pending.append(json.dumps(entry) + "\n")
+            if len(self._pending) >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        for hook in self._hooks:
+            hook()
+        if self._pending:
+            self._file.write("".join(self._pending))
+            self._pending = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            self._file.close()
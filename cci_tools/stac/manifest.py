@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+# Properties set to the current time whenever an item is generated
+VOLATILE_PROPERTIES = ["created", "updated"]
+
+
+def item_hash(stac_data: dict) -> str:
+    """
+    SHA-256 of an item's canonical JSON, leaving out its links (rewritten by the
+    STAC API) and generation timestamps."""
+    item = {k: v for k, v in stac_data.items() if k != "links"}
+    properties = item.get("properties")
+    if isinstance(properties, dict):
+        item["properties"] = {
+            k: v for k, v in properties.items() if k not in VOLATILE_PROPERTIES
+        }
+    canonical = json.dumps(
+        item, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def item_keys(stac_data: dict) -> dict:
+    """
+    Nested keys of an item, with None for each value that is not a dict."""
+    return {
+        k: item_keys(v) if isinstance(v, dict) else None for k, v in stac_data.items()
+    }
+
+
+def project(item: dict, keys: dict) -> dict:
+    """
+    The fields of ``item`` named in ``keys``, leaving out any the STAC API added
+    to it, such as links or extra properties."""
+    projected = {}
+    for k, sub in keys.items():
+        if k not in item:
+            continue
+        value = item[k]
+        if sub is not None and isinstance(value, dict):
+            value = project(value, sub)
+        projected[k] = value
+    return projected
+
+
+class PostManifest:
+    """
+    SQLite record of the hash of every item posted to the STAC API, so items that
+    have not changed since they were last posted can be skipped.
+
+    With ``force`` no item is reported as unchanged, but hashes are still
+    recorded. Writes are committed every ``commit_every`` items and on ``close``.
+    The keys of each posted item are kept too, once per distinct set of keys, so
+    that ``verify_remote`` only compares the fields that were posted.
+    """
+
+    def __init__(self, path: str, force: bool = False, commit_every: int = 1000):
+        self.path = path
+        self.force = force
+        self.commit_every = commit_every
+        self.skipped = 0
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "collection TEXT NOT NULL, id TEXT NOT NULL, hash TEXT NOT NULL, "
+            "posted REAL NOT NULL, keys TEXT, PRIMARY KEY (collection, id)) "
+            "WITHOUT ROWID"
+        )
+        columns = [r[1] for r in self._db.execute("PRAGMA table_info(items)")]
+        if "keys" not in columns:
+            # Manifests written before keys were kept
+            self._db.execute("ALTER TABLE items ADD COLUMN keys TEXT")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS item_keys ("
+            "digest TEXT PRIMARY KEY, keys TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._db.commit()
+        self._known_keys = set()
+
+    def unchanged(self, collection: str, item_id: str, digest: str) -> bool:
+        """
+        Whether an item was last posted with this hash."""
+        if self.force:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM items WHERE collection = ? AND id = ?",
+                (collection, item_id),
+            ).fetchone()
+        if row is not None and row[0] == digest:
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, collection: str, item_id: str, digest: str, item: dict = None):
+        """
+        Record the hash of a posted item, and the keys of ``item`` if given."""
+        keys = keys_digest = None
+        if item is not None:
+            keys = json.dumps(item_keys(item), sort_keys=True, separators=(",", ":"))
+            keys_digest = hashlib.sha256(keys.encode()).hexdigest()[:16]
+
+        with self._lock:
+            if keys_digest is not None and keys_digest not in self._known_keys:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO item_keys VALUES (?, ?)", (keys_digest, keys)
+                )
+                self._known_keys.add(keys_digest)
+            self._db.execute(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                (collection, item_id, digest, time.time(), keys_digest),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+
+    def collections(self) -> list:
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT collection FROM items").fetchall()
+        return [r[0] for r in rows]
+
+    def sample(self, collection: str, size: int) -> list:
+        """
+        Random ``(id, hash, keys)`` recorded for a collection, where ``keys`` is
+        None if the item's keys were not kept."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT items.id, items.hash, item_keys.keys FROM items "
+                "LEFT JOIN item_keys ON items.keys = item_keys.digest "
+                "WHERE items.collection = ? ORDER BY RANDOM() LIMIT ?",
+                (collection, size),
+            ).fetchall()
+        return [(i, h, json.loads(k) if k else None) for i, h, k in rows]
+
+    def forget(self, collection: str, item_id: str = None):
+        """
+        Remove the entries for an item, or for a whole collection, so they are
+        posted again."""
+        with self._lock:
+            if item_id is None:
+                self._db.execute("DELETE FROM items WHERE collection = ?", (collection,))
+            else:
+                self._db.execute(
+                    "DELETE FROM items WHERE collection = ? AND id = ?",
+                    (collection, item_id),
+                )
+            self._db.commit()
+
+    def verify_remote(self, fetch_item, sample_size: int) -> dict:
+        """
+        Compare a sample of recorded items per collection with the live items
+        returned by ``fetch_item(collection, item_id)`` (None if missing), using
+        only the fields that were posted. If any differ, the whole collection is
+        forgotten so it is posted again. Returns the number of drifted items per
+        collection."""
+        drifted = {}
+        for collection in self.collections():
+            sample = self.sample(collection, sample_size)
+            differ = 0
+            for item_id, digest, keys in sample:
+                live = fetch_item(collection, item_id)
+                if live is not None and keys is not None:
+                    live = project(live, keys)
+                if live is None or item_hash(live) != digest:
+                    differ += 1
+
+            if differ:
+                drifted[collection] = differ
+                logger.warning(
+                    f"Collection:{collection} {differ} of {len(sample)} sampled items "
+                    "differ from the STAC API, posting all of its items again"
+                )
+                self.forget(collection)
+        return drifted
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
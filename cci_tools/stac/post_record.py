@@ -6,10 +6,20 @@ __copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
 import json
 import httpx
 from httpx_auth import OAuth2ClientCredentials
+import asyncio
 import click
 import glob
+import itertools
+import os
+import time
+from collections import defaultdict, deque
 
 from cci_tools.core.utils import STAC_API, client, auth
+from cci_tools.core.transport import stac_writes
+from cci_tools.core.timing import percentile
+from cci_tools.stac.existing import ExistingItems
+from cci_tools.stac.manifest import PostManifest, item_hash, item_keys, project
+from cci_tools.stac.shards import read_collection_shards
 import logging
 from cci_tools.core.utils import logstream
 
@@ -17,17 +27,117 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logstream)
 logger.propagate = False
 
+# Bulk items endpoint of the STAC Transactions extension, relative to a collection
+BULK_ITEMS_PATH = "bulk_items"
 
-def post_records(post_directory: str | None, post_records: list | None, openeo: bool = False):
+
+def _record_groups(post_directory: str | None, post_records: list | None) -> list:
+    """
+    Records to post, as one iterable per directory of item files or collection
+    of shards, or a single one for a list of records."""
+    if post_directory is not None:
+        files = defaultdict(list)
+        for path in glob.glob(f"{post_directory}/**/stac*.json", recursive=True):
+            files[os.path.dirname(path)].append(path)
+        return list(files.values()) + read_collection_shards(post_directory)
+    if post_records is not None:
+        return [post_records]
+    return []
+
+
+def _round_robin(groups: list):
+    """
+    Records taken from each group in turn, so that items of every collection are
+    in flight together rather than one collection after another."""
+    iterators = deque(iter(group) for group in groups)
+    while iterators:
+        records = iterators.popleft()
+        try:
+            record = next(records)
+        except StopIteration:
+            continue
+        yield record
+        iterators.append(records)
+
+
+def post_records(
+    post_directory: str | None,
+    post_records: list | None,
+    openeo: bool = False,
+    batch_size: int = 0,
+    concurrency: int = 1,
+    collection_concurrency: int = None,
+    prefetch_existing: bool = False,
+    manifest: PostManifest = None,
+):
+    """
+    Post STAC items from a directory of item files/shards or a list of records.
+
+    With ``batch_size > 0`` items are grouped by collection and sent in batches of
+    that size through the bulk items endpoint, falling back to one request per
+    item for any batch the API rejects.
+
+    Otherwise, with ``concurrency > 1`` items are posted from an event loop with
+    that many requests in flight (``collection_concurrency`` per collection), over
+    HTTP/2 where the server supports it. Items are taken from each collection in
+    turn, so that every collection has requests in flight.
+
+    With ``prefetch_existing`` the ids of the items already in each collection are
+    fetched once, so existing items are updated with PUT straight away instead of
+    after a rejected POST.
+
+    Items whose hash matches the one recorded in ``manifest`` when they were last
+    posted are skipped, and the hashes of posted items are recorded."""
 
     summaries = {}
+    groups = _record_groups(post_directory, post_records)
+    if batch_size <= 0 and concurrency > 1:
+        records = _round_robin(groups)
+    else:
+        records = itertools.chain.from_iterable(groups)
+    existing = ExistingItems() if prefetch_existing else None
 
-    if post_directory is not None:
-        for record in glob.glob(f"{post_directory}/**/stac*.json", recursive=True):
-            summaries = post_record(record, summaries)
-    elif post_records is not None:
-        for record in post_records:
-            summaries = post_record(record, summaries)
+    if batch_size > 0:
+        batches = BatchStats()
+        buffers = {}
+        for record in records:
+            stac_data = _load_record(record)
+            _add_summary(stac_data, summaries)
+            if manifest is not None and manifest.unchanged(
+                stac_data["collection"], stac_data["id"], item_hash(stac_data)
+            ):
+                continue
+
+            buffer = buffers.setdefault(stac_data["collection"], [])
+            buffer.append(stac_data)
+            if len(buffer) >= batch_size:
+                post_batch(
+                    stac_data["collection"], buffer, summaries, batches, manifest
+                )
+                buffer.clear()
+
+        for collection, buffer in buffers.items():
+            if buffer:
+                post_batch(collection, buffer, summaries, batches, manifest)
+        batches.report()
+    elif concurrency > 1:
+        outcomes = asyncio.run(
+            _apost_records(
+                records,
+                summaries,
+                concurrency,
+                collection_concurrency,
+                existing,
+                manifest,
+            )
+        )
+        print(f"Posted items: {outcomes}")
+    else:
+        for record in records:
+            summaries = post_record(record, summaries, existing, manifest)
+
+    if manifest is not None and manifest.skipped:
+        print(f"Skipped {manifest.skipped} items unchanged since they were last posted")
 
     if not openeo:
         return
@@ -59,24 +169,34 @@ def post_records(post_directory: str | None, post_records: list | None, openeo:
         parent["summaries"]["eo:bands"] = summaries_set
         if repost_summaries:
             logger.info(
-                f"Parent: {href.split('/')[-1]}, Updated: {client.put(href, json=parent, auth=auth)}"
+                f"Parent: {href.split('/')[-1]}, Updated: {stac_writes.put(href, json=parent, auth=auth)}"
             )
 
 
-def post_record(stac_record, summaries):
+def fetch_item(collection: str, item_id: str) -> dict | None:
+    """
+    Live item from the STAC API, or None if it does not exist."""
+    response = client.get(f"{STAC_API}/collections/{collection}/items/{item_id}")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
 
+
+def _load_record(stac_record) -> dict:
     if isinstance(stac_record, str):
         with open(stac_record, "r") as file:
             # Load STAC record
             stac_data = json.load(file)
-    
+    else:
+        stac_data = stac_record
+
     # Ensure lower-case collections
     stac_data["collection"] = stac_data["collection"].lower()
+    return stac_data
 
-    # Extract 'drsId' for collection name and 'id' for item name
-    dataset_id = stac_data["collection"]
-    item_id = stac_data["id"]
 
+def _add_summary(stac_data: dict, summaries: dict):
     parent_href = f'{STAC_API}/collections/{stac_data["collection"]}'
     if parent_href not in summaries:
         summaries[parent_href] = {}
@@ -89,17 +209,301 @@ def post_record(stac_record, summaries):
                 "description": "None",
             }
 
+
+def post_record(
+    stac_record,
+    summaries,
+    existing: ExistingItems = None,
+    manifest: PostManifest = None,
+):
+
+    stac_data = _load_record(stac_record)
+
+    # Extract 'drsId' for collection name and 'id' for item name
+    dataset_id = stac_data["collection"]
+    item_id = stac_data["id"]
+
+    _add_summary(stac_data, summaries)
+
+    digest = None
+    if manifest is not None:
+        digest = item_hash(stac_data)
+        if manifest.unchanged(dataset_id, item_id, digest):
+            logger.debug(f"Item:{item_id} unchanged")
+            return summaries
+
+    exists = existing is not None and existing.contains(dataset_id, item_id)
+
     # Construct paths for STAC collection STAC item
     stac_collection = STAC_API + "/collections/" + dataset_id + "/items"
     stac_item = stac_collection + "/" + item_id
 
-    # Post a new STAC record
-    response = client.post(stac_collection, json=stac_data, auth=auth)
+    response = None
+    if exists:
+        # Known to exist, so update it, unless that was a hash collision
+        response = stac_writes.put(stac_item, json=stac_data, auth=auth)
+
+    if response is None or response.status_code == 404:
+        # Post a new STAC record
+        response = stac_writes.post(stac_collection, json=stac_data, auth=auth)
 
-    # If the STAC record already exists, just update it
-    if response.status_code == 409:
-        response = client.put(stac_item, json=stac_data, auth=auth)
+        # If the STAC record already exists, just update it
+        if response.status_code == 409:
+            response = stac_writes.put(stac_item, json=stac_data, auth=auth)
 
     logger.info(f"Item:{item_id} {response}")
     # logger.info('Item:',item_id, response.content)
+    if manifest is not None and response.is_success:
+        manifest.record(dataset_id, item_id, digest, stac_data)
     return summaries
+
+
+class BatchStats:
+    """
+    Latency and throughput of bulk item batches."""
+
+    def __init__(self):
+        self.latencies = []
+        self.items = 0
+        self.fallbacks = 0
+        self.start = time.perf_counter()
+
+    def add(self, items: int, seconds: float):
+        self.latencies.append(seconds)
+        self.items += items
+
+    def report(self):
+        if len(self.latencies) == 0:
+            return
+        elapsed = time.perf_counter() - self.start
+        latencies = sorted(self.latencies)
+        print(
+            f"Posted {self.items} items in {len(latencies)} batches over {elapsed:.1f}s "
+            f"({self.items / elapsed:.1f} items/s), batch latency p50 "
+            f"{percentile(latencies, 0.5):.2f}s, p95 {percentile(latencies, 0.95):.2f}s, "
+            f"{self.fallbacks} batches posted item by item"
+        )
+
+
+def _bulk_outcomes(response: httpx.Response) -> dict | None:
+    """
+    Status code per item id in a bulk items response, given as ``{"items": [...]}``
+    with an ``id``/``_id`` and ``status`` for each item, optionally nested under
+    its action as Elasticsearch reports them. None if the response has no such
+    list, such as when it only describes the outcome in text."""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if not isinstance(body, dict) or not isinstance(body.get("items"), list):
+        return None
+
+    outcomes = {}
+    for result in body["items"]:
+        if isinstance(result, dict) and len(result) == 1:
+            (nested,) = result.values()
+            result = nested if isinstance(nested, dict) else result
+        if not isinstance(result, dict):
+            return None
+        item_id = result.get("id", result.get("_id"))
+        status = result.get("status")
+        if item_id is None or not isinstance(status, int):
+            return None
+        outcomes[str(item_id)] = status
+    return outcomes
+
+
+def _search_confirmed(collection: str, items: list) -> set:
+    """
+    Ids of the items of a batch that the STAC API returns with the fields that
+    were posted, read back with a single search."""
+    response = client.post(
+        f"{STAC_API}/search",
+        json={
+            "collections": [collection],
+            "ids": [item["id"] for item in items],
+            "limit": len(items),
+        },
+    )
+    if not response.is_success:
+        return set()
+
+    live = {feature["id"]: feature for feature in response.json().get("features", [])}
+    return {
+        item["id"]
+        for item in items
+        if item["id"] in live
+        and item_hash(project(live[item["id"]], item_keys(item))) == item_hash(item)
+    }
+
+
+def _bulk_confirmed(collection: str, items: list, response: httpx.Response) -> set:
+    """
+    Ids of the items of a batch confirmed as written, from the status code the
+    bulk items response gives for each item, or by reading the batch back if the
+    response does not give them."""
+    if not response.is_success:
+        return set()
+    outcomes = _bulk_outcomes(response)
+    if outcomes is None:
+        return _search_confirmed(collection, items)
+    return {item_id for item_id, status in outcomes.items() if 200 <= status < 300}
+
+
+def post_batch(
+    collection: str,
+    items: list,
+    summaries: dict,
+    stats: BatchStats = None,
+    manifest: PostManifest = None,
+) -> httpx.Response:
+    """
+    Create or update a batch of items in one collection with a single request to
+    the bulk items endpoint of the STAC Transactions API. Items the API does not
+    confirm as written, or all of them if the batch is rejected, are posted
+    individually instead."""
+
+    stac_bulk = f"{STAC_API}/collections/{collection}/{BULK_ITEMS_PATH}"
+    payload = {"items": {item["id"]: item for item in items}, "method": "upsert"}
+
+    start = time.perf_counter()
+    response = stac_writes.post(stac_bulk, json=payload, auth=auth)
+    seconds = time.perf_counter() - start
+
+    logger.info(
+        f"Batch:{collection} {len(items)} items in {seconds:.2f}s "
+        f"({len(items) / seconds:.1f} items/s) {response}"
+    )
+    if stats is not None:
+        stats.add(len(items), seconds)
+
+    confirmed = _bulk_confirmed(collection, items, response)
+    unconfirmed = [item for item in items if item["id"] not in confirmed]
+    if unconfirmed:
+        reason = (
+            f"rejected ({response.status_code})"
+            if not response.is_success
+            else f"{len(unconfirmed)} items not confirmed"
+        )
+        logger.warning(
+            f"Batch of {len(items)} items for {collection} {reason}, "
+            "posting them individually"
+        )
+        if stats is not None:
+            stats.fallbacks += 1
+        for item in unconfirmed:
+            post_record(item, summaries, manifest=manifest)
+
+    if manifest is not None:
+        for item in items:
+            if item["id"] in confirmed:
+                manifest.record(collection, item["id"], item_hash(item), item)
+    return response
+
+
+async def apost_record(
+    aclient: httpx.AsyncClient, stac_data: dict, log: bool = True, exists: bool = False
+) -> httpx.Response:
+    """
+    Post a loaded STAC item with an async client, updating it if it already exists.
+    Items known to exist are updated straight away."""
+
+    # Ensure lower-case collections
+    stac_data["collection"] = stac_data["collection"].lower()
+
+    stac_collection = f'{STAC_API}/collections/{stac_data["collection"]}/items'
+    stac_item = f'{stac_collection}/{stac_data["id"]}'
+
+    response = None
+    if exists:
+        response = await stac_writes.aput(
+            aclient, stac_item, json=stac_data, auth=auth
+        )
+
+    if response is None or response.status_code == 404:
+        response = await stac_writes.apost(
+            aclient, stac_collection, json=stac_data, auth=auth
+        )
+        if response.status_code == 409:
+            response = await stac_writes.aput(
+                aclient, stac_item, json=stac_data, auth=auth
+            )
+
+    if log:
+        logger.info(f'Item:{stac_data["id"]} {response}')
+    return response
+
+
+async def _apost_records(
+    records,
+    summaries: dict,
+    concurrency: int,
+    collection_concurrency: int = None,
+    existing: ExistingItems = None,
+    manifest: PostManifest = None,
+) -> dict:
+    """
+    Post items with up to ``concurrency`` requests in flight, and at most
+    ``collection_concurrency`` for any one collection so that a large collection
+    cannot hold every connection. Outcomes are logged in record order."""
+
+    collection_concurrency = collection_concurrency or concurrency
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    slots = asyncio.Semaphore(concurrency)
+    collection_slots = defaultdict(lambda: asyncio.Semaphore(collection_concurrency))
+    outcomes = defaultdict(int)
+
+    async with httpx.AsyncClient(
+        http2=True, verify=False, timeout=180, limits=limits
+    ) as aclient:
+
+        async def post(stac_data: dict, exists: bool) -> httpx.Response:
+            # Wait for the collection first so queued items do not hold global slots
+            async with collection_slots[stac_data["collection"]]:
+                async with slots:
+                    return await apost_record(
+                        aclient, stac_data, log=False, exists=exists
+                    )
+
+        async def collect(stac_data: dict, digest: str, task: asyncio.Task):
+            item_id = stac_data["id"]
+            try:
+                response = await task
+                logger.info(f"Item:{item_id} {response}")
+                outcomes[response.status_code] += 1
+                if manifest is not None and response.is_success:
+                    manifest.record(
+                        stac_data["collection"], item_id, digest, stac_data
+                    )
+            except Exception as err:
+                logger.error(f"Item:{item_id} failed: {err}")
+                outcomes[type(err).__name__] += 1
+
+        pending = deque()
+        for record in records:
+            stac_data = _load_record(record)
+            _add_summary(stac_data, summaries)
+
+            digest = None
+            if manifest is not None:
+                digest = item_hash(stac_data)
+                if manifest.unchanged(stac_data["collection"], stac_data["id"], digest):
+                    continue
+
+            exists = existing is not None and await existing.acontains(
+                stac_data["collection"], stac_data["id"]
+            )
+            pending.append(
+                (stac_data, digest, asyncio.create_task(post(stac_data, exists)))
+            )
+
+            if len(pending) >= 4 * concurrency:
+                await collect(*pending.popleft())
+
+        while pending:
+            await collect(*pending.popleft())
+
+    return dict(outcomes)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import zlib
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+SHARD_INDEX = "items_index.json"
+
+SHARD_SUFFIXES = {
+    None: ".ndjson",
+    "gzip": ".ndjson.gz",
+    "zstd": ".ndjson.zst",
+}
+
+SHARD_NUMBER = re.compile(r"^items_([0-9]+)\.ndjson")
+
+
+def _open_shard(path: str, mode: str, compression: str | None):
+    """
+    Open a shard file in text mode with the given compression. Shards written by
+    earlier versions may hold several gzip members or zstd frames, which are read in
+    turn."""
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, mode, encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstd compressed shards require the 'zstandard' package to be installed"
+            )
+        if mode.startswith("r"):
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                open(path, "rb"), read_across_frames=True
+            )
+            return io.TextIOWrapper(reader, encoding="utf-8")
+        return zstandard.open(path, mode, encoding="utf-8")
+    raise ValueError(f"Unknown shard compression: {compression}")
+
+
+def _read_index(collection_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(collection_dir, SHARD_INDEX)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_index(collection_dir: str, index: dict):
+    """
+    Replace a collection's shard index atomically."""
+    path = os.path.join(collection_dir, SHARD_INDEX)
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(index, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _fsync_path(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _decompress_partial(path: str, compression: str) -> bytes:
+    """
+    Decompress as much of a shard as was flushed, where the last gzip member or
+    zstd frame was never ended."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if compression == "gzip":
+        content = []
+        while data:
+            decompressor = zlib.decompressobj(wbits=31)
+            content.append(decompressor.decompress(data))
+            if not decompressor.eof:
+                break
+            data = decompressor.unused_data
+        return b"".join(content)
+
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _repair(path: str, shard: dict):
+    """
+    Rewrite a shard left open by an interrupted run as complete compressed data,
+    so it can be read and new shards written after it."""
+    compression = shard["compression"]
+    if compression is not None and os.path.isfile(path):
+        content = _decompress_partial(path, compression)
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with _open_shard(tmp_file, "wt", compression) as f:
+            f.write(content.decode("utf-8"))
+        _fsync_path(tmp_file)
+        os.replace(tmp_file, path)
+        shard["size"] = os.path.getsize(path)
+    shard.pop("open", None)
+
+
+def _recover(collection_dir: str, index: dict) -> int:
+    """
+    Undo writes made to a collection's shards after its index was last written,
+    and return the number for its next shard.
+
+    Indexed shards are truncated to their recorded size, and compressed shards
+    that were still open are completed. Shards missing from the index, opened
+    after the last sync of an interrupted run, are left alone and new shards are
+    numbered after them."""
+    for shard in index["shards"]:
+        path = os.path.join(collection_dir, shard["file"])
+        size = shard.get("size")
+        if size is not None and os.path.isfile(path) and os.path.getsize(path) > size:
+            logger.warning(f"Truncating {path} to its last synced size")
+            os.truncate(path, size)
+        if shard.get("open"):
+            logger.warning(f"Completing {path}, left open by an interrupted run")
+            _repair(path, shard)
+
+    numbers = [
+        int(m.group(1))
+        for m in (SHARD_NUMBER.match(name) for name in os.listdir(collection_dir))
+        if m is not None
+    ]
+    return max(numbers + [len(index["shards"]) - 1]) + 1
+
+
+class ShardWriter:
+    """
+    Append STAC items to size-capped NDJSON shards, one set of shards per collection.
+
+    Each collection directory gets an ``items_index.json`` listing its shards with item
+    counts, uncompressed sizes and synced on-disk sizes. With ``resume`` the shards
+    from earlier runs are kept and new shards are numbered after them, otherwise a
+    collection's shards and index are removed the first time it is written to.
+
+    ``sync`` flushes the open shards (to a byte boundary of their gzip or zstd
+    stream), fsyncs them and rewrites the indexes, leaving them open for later
+    writes. The index only ever lists items that are on disk, so it should be synced
+    before the journal records those items as done.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        compression: str | None = None,
+        resume: bool = False,
+    ):
+        if compression not in SHARD_SUFFIXES:
+            raise ValueError(f"Unknown shard compression: {compression}")
+
+        self.output_dir = output_dir
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.resume = resume
+
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection: str) -> dict:
+        if collection in self._collections:
+            return self._collections[collection]
+
+        collection_dir = os.path.join(self.output_dir, collection)
+        os.makedirs(collection_dir, exist_ok=True)
+        if not self.resume:
+            self._clear(collection_dir)
+
+        index = _read_index(collection_dir) or {"collection": collection, "shards": []}
+        state = {
+            "dir": collection_dir,
+            "index": index,
+            "file": None,
+            "current": None,
+            "next": _recover(collection_dir, index),
+        }
+        self._collections[collection] = state
+        return state
+
+    def _clear(self, collection_dir: str):
+        """
+        Remove the shards and index left in a collection directory by an earlier
+        run, so its items are not posted twice."""
+        index_file = os.path.join(collection_dir, SHARD_INDEX)
+        if os.path.isfile(index_file):
+            logger.info(f"Replacing the shards in {collection_dir}")
+            os.remove(index_file)
+        for name in os.listdir(collection_dir):
+            if SHARD_NUMBER.match(name):
+                os.remove(os.path.join(collection_dir, name))
+
+    def _sync_shard(self, state: dict):
+        """
+        Flush and fsync the open shard of a collection, recording its size."""
+        state["file"].flush()
+        os.fsync(state["file"].fileno())
+        path = os.path.join(state["dir"], state["current"]["file"])
+        state["current"]["size"] = os.path.getsize(path)
+
+    def _close_shard(self, state: dict):
+        """
+        Close and fsync the open shard of a collection, recording its size."""
+        if state["file"] is None:
+            return
+        state["file"].close()
+        state["file"] = None
+
+        path = os.path.join(state["dir"], state["current"]["file"])
+        _fsync_path(path)
+        state["current"]["size"] = os.path.getsize(path)
+        state["current"].pop("open", None)
+
+    def _new_shard(self, state: dict):
+        if state["current"] is not None:
+            self._close_shard(state)
+            _write_index(state["dir"], state["index"])
+
+        name = f"items_{state['next']:05d}{SHARD_SUFFIXES[self.compression]}"
+        state["next"] += 1
+        state["current"] = {
+            "file": name,
+            "compression": self.compression,
+            "items": 0,
+            "bytes": 0,
+            "size": 0,
+            "open": True,
+        }
+        state["index"]["shards"].append(state["current"])
+        state["file"] = _open_shard(
+            os.path.join(state["dir"], name), "wt", self.compression
+        )
+        logger.debug(f"Opened shard {state['dir']}/{name}")
+
+    def write(self, stac_dict: dict):
+        line = json.dumps(stac_dict, ensure_ascii=False) + "\n"
+        size = len(line.encode("utf-8"))
+        with self._lock:
+            state = self._collection(stac_dict["collection"])
+            current = state["current"]
+            if current is None or current["bytes"] + size > self.max_bytes:
+                self._new_shard(state)
+
+            state["file"].write(line)
+            state["current"]["items"] += 1
+            state["current"]["bytes"] += size
+
+    def sync(self):
+        """
+        Make every item written so far durable and listed in the shard indexes."""
+        with self._lock:
+            for state in self._collections.values():
+                if state["file"] is not None:
+                    self._sync_shard(state)
+                    _write_index(state["dir"], state["index"])
+
+    def close(self):
+        with self._lock:
+            for state in self._collections.values():
+                self._close_shard(state)
+                _write_index(state["dir"], state["index"])
+
+
+def _read_collection(index_file: str):
+    collection_dir = os.path.dirname(index_file)
+    with open(index_file) as f:
+        index = json.load(f)
+
+    for shard in index["shards"]:
+        with _open_shard(
+            os.path.join(collection_dir, shard["file"]), "rt", shard["compression"]
+        ) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_collection_shards(directory: str) -> list:
+    """
+    One iterator per collection under a directory over the STAC items in its
+    shards, which are only opened once the iterator is read."""
+    return [
+        _read_collection(index_file)
+        for index_file in sorted(
+            glob.glob(f"{directory}/**/{SHARD_INDEX}", recursive=True)
+        )
+    ]
+
+
+def read_shards(directory: str):
+    """
+    Yield every STAC item stored in NDJSON shards under a directory."""
+    for items in read_collection_shards(directory):
+        yield from items
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+__author__ = "Daniel Westwood"
+__contact__ = "daniel.westwood@stfc.ac.uk"
+__copyright__ = "Copyright 2025 United Kingdom Research and Innovation"
+
+import asyncio
+import queue
+import threading
+
+import httpx
+
+from cci_tools.core.timing import timer
+from cci_tools.stac.post_record import apost_record
+
+import logging
+from cci_tools.core.utils import logstream
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logstream)
+logger.propagate = False
+
+
+class AsyncUploader:
+    """
+    Upload STAC items to the STAC API from a background event loop.
+
+    Items are handed over with ``submit``, which blocks once ``queue_size`` items are
+    waiting, so record generation slows down to the pace of the API. Up to
+    ``concurrency`` uploads are in flight at once. Outcomes are collected as
+    ``(item_id, outcome, incomplete)`` tuples from ``results`` and ``close``.
+    """
+
+    def __init__(self, concurrency: int = 8, queue_size: int = None):
+        self.concurrency = concurrency
+        self.queue_size = queue_size or 4 * concurrency
+
+        self._results = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._ready.set()
+        self._loop.run_until_complete(self._main())
+        self._loop.close()
+
+    async def _main(self):
+        async with httpx.AsyncClient(verify=False, timeout=180) as aclient:
+            await asyncio.gather(
+                *[self._worker(aclient) for _ in range(self.concurrency)]
+            )
+
+    async def _worker(self, aclient: httpx.AsyncClient):
+        while True:
+            stac_dict = await self._queue.get()
+            if stac_dict is None:
+                return
+
+            incomplete = stac_dict["properties"].get("incomplete", False)
+            try:
+                with timer.stage("upload"):
+                    response = await apost_record(aclient, stac_dict)
+                if response.is_success:
+                    outcome = "OK"
+                else:
+                    outcome = f"UploadFailed:{response.status_code}"
+            except Exception as err:
+                logger.error(f'Upload failed for {stac_dict["id"]}: {err}')
+                outcome = f"UploadFailed:{err}"
+
+            self._results.put((stac_dict["id"], outcome, incomplete))
+
+    def submit(self, stac_dict: dict):
+        """
+        Queue an item for upload, waiting while the upload queue is full."""
+        asyncio.run_coroutine_threadsafe(
+            self._queue.put(stac_dict), self._loop
+        ).result()
+
+    def results(self):
+        """
+        Yield the outcomes of uploads completed so far."""
+        while True:
+            try:
+                yield self._results.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self) -> list:
+        """
+        Wait for all queued uploads to finish, then return their outcomes."""
+        for _ in range(self.concurrency):
+            self.submit(None)
+        self._thread.join()
+        return list(self.results())
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for filename date parsing in ``cci_tools.readers.file``.
+
+Parses synthetic CCI filenames covering each default pattern (date ranges, single
+dates, year ranges, single years with and without a ``P1Y`` resolution, and names
+with no date) and reports filenames/s for single and batch parsing::
+
+    $ python tests/benchmark_filename_dates.py -n 1000000 --min_rate 100000
+
+With ``--min_rate`` the run fails if batch parsing is slower than that rate.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import click
+
+# Import cci_tools from this checkout when it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_filenames(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+
+    def date():
+        return f"{rng.randint(1979, 2024)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+
+    templates = [
+        lambda: f"ESACCI-SST-L3S-SSTskin-AVHRR-{date()}_{date()}-fv3.0.nc",
+        lambda: f"{date()}120000-ESACCI-L4_GHRSST-SSTdepth-OSTIA-GLOB-fv02.0.tif",
+        lambda: f"ESACCI-BIOMASS-L4-AGB-MERGED-100m-{rng.randint(1990, 2010)}-{rng.randint(2011, 2024)}-fv5.0.tif",
+        lambda: f"ESACCI-LC-L4-LCCS-Map-300m-P1Y-{rng.randint(1992, 2020)}-v2.0.7.tif",
+        lambda: f"ESACCI-PERMAFROST-L4-ALT-MODISLST-AREA4_PP-{rng.randint(1997, 2019)}-fv03.0.tif",
+        lambda: f"ESACCI-GLACIERS-L3-AREA-RGI{rng.randint(1, 19):02d}-fv1.tif",
+    ]
+    return [rng.choice(templates)() for _ in range(count)]
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--count",
+    "count",
+    type=int,
+    default=1000000,
+    help="Number of synthetic filenames parsed",
+)
+@click.option("--interval", "interval", help="Interval passed to the parser")
+@click.option(
+    "--min_rate",
+    "min_rate",
+    type=float,
+    help="Fail if batch parsing is slower than this many filenames per second",
+)
+def main(count, interval, min_rate):
+    with tempfile.TemporaryDirectory() as workdir:
+        # Placeholder credentials so cci_tools.core.utils can be imported offline
+        os.chdir(workdir)
+        with open("AUTH_CREDENTIALS", "w") as f:
+            json.dump({"id": "benchmark", "secret": "benchmark"}, f)
+        with open("API_CREDENTIALS", "w") as f:
+            json.dump({"secret": "benchmark"}, f)
+
+        from cci_tools.readers.file import (
+            extract_times_from_file,
+            extract_times_from_files,
+        )
+
+    filenames = synthetic_filenames(count)
+
+    start = time.perf_counter()
+    for filename in filenames:
+        extract_times_from_file(filename, interval)
+    single = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    times = extract_times_from_files(filenames, interval)
+    batch = count / (time.perf_counter() - start)
+
+    unmatched = sum(1 for t in times if t[0] is None)
+    print(f"Filenames parsed: {count} ({unmatched} with no date)")
+    print(f"Single: {single:,.0f} filenames/s")
+    print(f"Batch:  {batch:,.0f} filenames/s")
+
+    if min_rate is not None and batch < min_rate:
+        print(f"Batch parsing is slower than {min_rate:,.0f} filenames/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
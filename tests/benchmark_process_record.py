@@ -0,0 +1,318 @@
+"""
+Offline benchmark for ``cci_tools.stac.create_record.process_record``.
+
+Synthetic ``opensearch-files`` records are generated for each reader path
+(OpenSearch-only NetCDF, GeoTIFF with and without geospatial tags, kerchunk and
+zarr via xarray, in full and ``metadata_only``) against small files written to a
+temporary directory. Licences are stubbed, so no Elasticsearch, archive or
+artefacts server access is needed.
+
+Each scenario runs in a fresh process and reports records/s and peak RSS::
+
+    $ python tests/benchmark_process_record.py -n 500 --output bench.json
+    $ python tests/benchmark_process_record.py --baseline bench.json
+
+With ``--baseline`` the run fails if any scenario is more than ``--tolerance``
+slower than the baseline, or uses that much more memory.
+"""
+
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+# Import cci_tools from this checkout when it is not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LICENCE_URL = "https://artefacts.ceda.ac.uk/licences/specific_licences/esacci_test.pdf"
+DATASET_ID = "00000000000000000000000000000000"
+DRS = "esacci.test.day.l3s.sst.multi-sensor.multi-platform.merged.v1-0.r1"
+
+SCENARIOS = [
+    "opensearch",
+    "geotiff",
+    "geotiff_untagged",
+    "kerchunk",
+    "zarr",
+    "kerchunk_metadata_only",
+    "zarr_metadata_only",
+]
+
+
+def opensearch_source(directory: str, name: str, ecv: str = "sst") -> dict:
+    """
+    Synthetic ``_source`` of an ``opensearch-files`` document."""
+    return {
+        "info": {
+            "name": name,
+            "directory": directory,
+            "format": "NetCDF",
+            "spatial": {
+                "coordinates": {"coordinates": [[-180.0, 90.0], [180.0, -90.0]]}
+            },
+            "temporal": {
+                "start_time": "2020-01-01T00:00:00+00:00",
+                "end_time": "2020-01-01T23:59:59+00:00",
+            },
+        },
+        "projects": {
+            "opensearch": {
+                "ecv": [ecv.upper()],
+                "datasetId": DATASET_ID,
+                "drsId": [DRS],
+                "productVersion": ["1.0"],
+                "platform": ["NOAA-19"],
+                "platformGroup": ["NOAA"],
+                "sensor": ["AVHRR"],
+                "frequency": ["day"],
+                "processingLevel": ["L3S"],
+                "dataType": ["SST"],
+                "institute": ["Test"],
+            }
+        },
+    }
+
+
+def write_credentials(workdir: str):
+    """
+    Placeholder credentials so ``cci_tools.core.utils`` can be imported offline."""
+    with open(os.path.join(workdir, "AUTH_CREDENTIALS"), "w") as f:
+        json.dump({"id": "benchmark", "secret": "benchmark"}, f)
+    with open(os.path.join(workdir, "API_CREDENTIALS"), "w") as f:
+        json.dump({"secret": "benchmark"}, f)
+
+
+def write_geotiffs(workdir: str) -> tuple[str, str]:
+    import numpy as np
+    import rasterio
+    from rasterio.transform import from_origin
+
+    data = np.arange(256 * 256, dtype="uint16").reshape(256, 256)
+
+    tagged = "ESACCI-TEST-20200101-fv1.0.tif"
+    with rasterio.open(
+        os.path.join(workdir, tagged),
+        "w",
+        driver="GTiff",
+        width=256,
+        height=256,
+        count=1,
+        dtype=data.dtype,
+        crs="EPSG:4326",
+        transform=from_origin(-10.0, 60.0, 0.1, 0.1),
+    ) as dst:
+        dst.write(data, 1)
+        dst.update_tags(
+            time_coverage_start="20200101T000000Z",
+            time_coverage_end="20200101T235959Z",
+            geospatial_lon_min="-10.0",
+            geospatial_lon_max="15.6",
+            geospatial_lat_min="34.4",
+            geospatial_lat_max="60.0",
+            product_version="1.0",
+        )
+
+    # No tags, so times come from the filename and bounds from reprojection
+    untagged = "ESACCI-TEST-20200102-fv1.0.tif"
+    with rasterio.open(
+        os.path.join(workdir, untagged),
+        "w",
+        driver="GTiff",
+        width=256,
+        height=256,
+        count=1,
+        dtype=data.dtype,
+        crs="EPSG:3857",
+        transform=from_origin(-1000000.0, 8000000.0, 1000.0, 1000.0),
+    ) as dst:
+        dst.write(data, 1)
+
+    return tagged, untagged
+
+
+def write_xarray_stores(workdir: str) -> tuple[str, str]:
+    import numpy as np
+    import pandas as pd
+    import xarray as xr
+    from kerchunk.zarr import single_zarr
+
+    ds = xr.Dataset(
+        {
+            "sst": (
+                ("time", "lat", "lon"),
+                np.random.default_rng(0).random((12, 90, 180), dtype="float32"),
+            )
+        },
+        coords={
+            "time": pd.date_range("2020-01-01", periods=12, freq="MS"),
+            "lat": np.linspace(-89, 89, 90),
+            "lon": np.linspace(1, 359, 180),
+        },
+        attrs={"product_version": "1.0", "platform": "NOAA-19"},
+    )
+
+    store = "ESACCI-TEST-fv1.0.zarr"
+    ds.to_zarr(os.path.join(workdir, store), mode="w", zarr_format=2)
+
+    refs = "ESACCI-TEST-fv1.0.json"
+    with open(os.path.join(workdir, refs), "w") as f:
+        json.dump(single_zarr(os.path.join(workdir, store)), f)
+
+    return refs, store
+
+
+def make_fixtures(workdir: str) -> dict:
+    """
+    Write the benchmark files and return ``(source, kwargs)`` for each scenario."""
+    write_credentials(workdir)
+    tagged, untagged = write_geotiffs(workdir)
+    refs, store = write_xarray_stores(workdir)
+
+    return {
+        "opensearch": (
+            opensearch_source("/neodc/esacci/sst/data", "ESACCI-TEST-20200101-fv1.0.nc"),
+            {},
+        ),
+        "geotiff": (opensearch_source(workdir, tagged), {}),
+        "geotiff_untagged": (opensearch_source(workdir, untagged), {}),
+        "kerchunk": (
+            opensearch_source(workdir, refs),
+            {"fmt_override": "xarray|kerchunk"},
+        ),
+        "zarr": (opensearch_source(workdir, store), {"fmt_override": "xarray|zarr"}),
+        "kerchunk_metadata_only": (
+            opensearch_source(workdir, refs),
+            {"fmt_override": "xarray|kerchunk", "metadata_only": True},
+        ),
+        "zarr_metadata_only": (
+            opensearch_source(workdir, store),
+            {"fmt_override": "xarray|zarr", "metadata_only": True},
+        ),
+    }
+
+
+def run_scenario(
+    workdir: str, source: dict, kwargs: dict, records: int, warmup: int
+) -> dict:
+    """
+    Benchmark one scenario, in a process of its own so peak RSS is per-scenario."""
+    os.chdir(workdir)
+
+    from cci_tools.stac import create_record
+
+    # No network access for licences
+    create_record.get_licence = lambda ecv: LICENCE_URL
+
+    # As given by create_items, since drsId is a list in opensearch-files
+    for _ in range(warmup):
+        create_record.process_record(source, DRS, **kwargs)
+
+    start = time.perf_counter()
+    for _ in range(records):
+        create_record.process_record(source, DRS, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed,
+        # ru_maxrss is reported in KB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Scenarios that are slower, or use more memory, than the baseline allows."""
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if base is None:
+            continue
+        if result["records_per_second"] < base["records_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: {result['records_per_second']:.1f} records/s "
+                f"(baseline {base['records_per_second']:.1f})"
+            )
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{scenario}: {result['peak_rss_mb']:.1f} MB peak RSS "
+                f"(baseline {base['peak_rss_mb']:.1f})"
+            )
+    return regressions
+
+
+@click.command()
+@click.option(
+    "-n",
+    "--records",
+    "records",
+    type=int,
+    default=200,
+    help="Number of records processed per scenario",
+)
+@click.option(
+    "--warmup", "warmup", type=int, default=5, help="Untimed records per scenario"
+)
+@click.option(
+    "-s",
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(SCENARIOS),
+    help="Scenario to run (repeatable, default all)",
+)
+@click.option("--output", "output", help="Write results to this JSON file")
+@click.option("--baseline", "baseline", help="JSON results to check for regressions")
+@click.option(
+    "--tolerance",
+    "tolerance",
+    type=float,
+    default=0.2,
+    help="Allowed fractional slowdown or memory growth against the baseline",
+)
+def main(records, warmup, scenarios, output, baseline, tolerance):
+    scenarios = scenarios or SCENARIOS
+    results = {}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fixtures = make_fixtures(workdir)
+        for scenario in scenarios:
+            source, kwargs = fixtures[scenario]
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                results[scenario] = pool.submit(
+                    run_scenario, workdir, source, kwargs, records, warmup
+                ).result()
+
+    print(f"{'Scenario':<24} {'Records':>8} {'Records/s':>11} {'Peak RSS (MB)':>14}")
+    for scenario, result in results.items():
+        print(
+            f"{scenario:<24} {result['records']:>8} "
+            f"{result['records_per_second']:>11.1f} {result['peak_rss_mb']:>14.1f}"
+        )
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        if len(regressions) > 0:
+            print("")
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f" > {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
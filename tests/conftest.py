@@ -0,0 +1,20 @@
+"""
+Shared setup for the unit tests.
+
+``cci_tools.core.utils`` reads the STAC and Elasticsearch credentials from the
+working directory when it is imported, so the tests run from a temporary directory
+holding dummy credentials. Nothing in the tests contacts either service.
+"""
+
+import json
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="cci_tools_tests_")
+for name, creds in [
+    ("AUTH_CREDENTIALS", {"id": "test", "secret": "test"}),
+    ("API_CREDENTIALS", {"secret": "test"}),
+]:
+    with open(os.path.join(_workdir, name), "w") as f:
+        json.dump(creds, f)
+os.chdir(_workdir)
@@ -0,0 +1,85 @@
+import pytest
+
+from cci_tools.core.timing import timer
+from cci_tools.stac import create_record
+from cci_tools.stac.create_record import extract_collection
+
+
+@pytest.mark.parametrize("ecv", ["SST", ["SST"], "sst", ["sst"]])
+def test_collection_matches_licence_cache_keys(ecv):
+    assert extract_collection({"projects": {"opensearch": {"ecv": ecv}}}) == "sst"
+
+
+def test_multi_ecv_record_is_rejected():
+    with pytest.raises(ValueError):
+        extract_collection({"projects": {"opensearch": {"ecv": ["SST", "LST"]}}})
+
+
+DRS = "esacci.test.day.l3s.sst.multi-sensor.multi-platform.merged.v1-0.r1"
+
+
+def _record(i: int) -> dict:
+    name = f"{20200101 + i}-ESACCI-L3S_SST-fv1.0.nc"
+    return {
+        "_id": name,
+        "_source": {
+            "info": {
+                "name": name,
+                "directory": "/neodc/esacci/sst/data",
+                "format": "NetCDF",
+                "spatial": {
+                    "coordinates": {"coordinates": [[-180.0, 90.0], [180.0, -90.0]]}
+                },
+                "temporal": {
+                    "start_time": "2020-01-01T00:00:00+00:00",
+                    "end_time": "2020-01-01T23:59:59+00:00",
+                },
+            },
+            "projects": {
+                "opensearch": {
+                    "ecv": ["SST"],
+                    "datasetId": "0" * 32,
+                    "drsId": [DRS],
+                    "productVersion": ["1.0"],
+                    "platform": ["NOAA-19"],
+                    "platformGroup": ["NOAA"],
+                    "sensor": ["AVHRR"],
+                    "frequency": ["day"],
+                    "processingLevel": ["L3S"],
+                    "dataType": ["SST"],
+                    "institute": ["Test"],
+                }
+            },
+        },
+    }
+
+
+def test_process_pool_keeps_record_order(monkeypatch):
+    # Forked workers inherit the stubbed licence lookup
+    monkeypatch.setattr(
+        create_record, "get_licence", lambda ecv: "https://artefacts/licence.pdf"
+    )
+    monkeypatch.setattr(timer, "enabled", True)
+    timer.drain()
+    written = []
+
+    records = [(f"label{i}", _record(i)) for i in range(10)]
+    results = list(
+        create_record.handle_process_records(
+            iter(records),
+            "output",
+            workers=2,
+            queue_size=3,
+            writer=written.append,
+            drs=DRS,
+            exclusion="20200105",
+        )
+    )
+
+    assert [label for label, _, _ in results] == [label for label, _ in records]
+    assert [response for _, _, response in results].count("Excluded") == 1
+    assert all(r in ("OK", "Excluded") for _, _, r in results)
+    assert [item["id"][:8] for item in written] == [
+        r["_id"][:8] for _, r in records if "20200105" not in r["_id"]
+    ]
+    assert timer.drain()["process_record"]
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+from cci_tools.stac import existing as existing_module
+from cci_tools.stac.existing import ExistingItems, ItemIdSet
+
+
+def test_item_id_set_membership():
+    ids = ItemIdSet(f"item-{i}" for i in range(1000))
+
+    assert len(ids) == 1000
+    assert all(f"item-{i}" in ids for i in range(1000))
+    assert not any(f"item-{i}" in ids for i in range(1000, 2000))
+
+
+def test_item_id_set_duplicates_and_empty():
+    assert len(ItemIdSet(["a", "a", "b"])) == 2
+    assert "a" not in ItemIdSet()
+
+
+def test_acontains_fetches_outside_the_event_loop(monkeypatch):
+    fetches = []
+
+    def fetch_item_ids(collection: str, page_size: int) -> ItemIdSet:
+        fetches.append((collection, threading.current_thread()))
+        return ItemIdSet(["x"])
+
+    monkeypatch.setattr(existing_module, "fetch_item_ids", fetch_item_ids)
+    existing = ExistingItems()
+
+    async def run():
+        return [
+            await existing.acontains("col", "x"),
+            await existing.acontains("col", "y"),
+        ]
+
+    assert asyncio.run(run()) == [True, False]
+    assert len(fetches) == 1
+    assert fetches[0][1] is not threading.main_thread()
+    assert existing.contains("col", "x")
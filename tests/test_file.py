@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from cci_tools.readers import file
+from cci_tools.readers.file import (
+    extract_times_from_file,
+    extract_times_from_files,
+    load_date_patterns,
+)
+
+
+@pytest.mark.parametrize(
+    "filename, interval, expected",
+    [
+        (
+            "ESACCI-L3C_SST-20200101_20200131-fv1.0.nc",
+            None,
+            ("2020-01-01T00:00:00Z", "2020-01-31T00:00:00Z"),
+        ),
+        (
+            "20200115-ESACCI-L4_GHRSST-SSTdepth-fv2.0.nc",
+            None,
+            ("2020-01-15T00:00:00Z", "2020-01-15T23:59:59Z"),
+        ),
+        (
+            "ESACCI-SEAICE-20200301-fv2.0.nc",
+            "month",
+            ("2020-03-01T00:00:00Z", "2020-03-31T00:00:00Z"),
+        ),
+        (
+            "ESACCI-SEAICE-20200201_20200215-fv2.0.nc",
+            "month",
+            ("2020-02-01T00:00:00Z", "2020-02-15T00:00:00Z"),
+        ),
+        (
+            "ESACCI-LC-L4-LCCS-Map-300m-P1Y-2015-v2.0.7.tif",
+            None,
+            ("2015-01-01T00:00:00Z", "2015-12-31T23:59:59Z"),
+        ),
+        (
+            "ESACCI-BIOMASS-L4-AGB-MERGED-100m-2010-2020-fv4.0.nc",
+            None,
+            ("2010-01-01T00:00:00Z", "2020-12-31T23:59:59Z"),
+        ),
+        (
+            "ESACCI-PERMAFROST-L4-ALT-2003-fv3.0.nc",
+            None,
+            ("2003-01-01T00:00:00Z", "2003-01-01T23:59:59Z"),
+        ),
+        (
+            "/neodc/esacci/2019/ESACCI-OC-L3S-20200101-fv6.0.nc",
+            None,
+            ("2020-01-01T00:00:00Z", "2020-01-01T23:59:59Z"),
+        ),
+        ("README.txt", None, (None, None)),
+        ("ESACCI-OC-fv6.0.nc", None, (None, None)),
+    ],
+)
+def test_default_patterns(filename, interval, expected):
+    assert extract_times_from_file(filename, interval) == expected
+
+
+def test_ecv_patterns_are_tried_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(file, "_ecv_parsers", {})
+    config = tmp_path / "patterns.json"
+    config.write_text(
+        json.dumps({"TEST": [{"pattern": "(?P<start>[0-9]{6})", "format": "%Y%m"}]})
+    )
+    load_date_patterns(str(config))
+
+    assert extract_times_from_file("ESACCI-X-202003-fv1.nc", None, ecv="test") == (
+        "2020-03-01T00:00:00Z",
+        "2020-03-01T23:59:59Z",
+    )
+    assert extract_times_from_file("ESACCI-X-202003-fv1.nc", None) == (None, None)
+    # Defaults still apply after the ECV patterns
+    assert extract_times_from_file("ESACCI-X-2003-fv1.nc", None, ecv="test") == (
+        "2003-01-01T00:00:00Z",
+        "2003-01-01T23:59:59Z",
+    )
+
+
+def test_parse_many():
+    names = ["ESACCI-OC-L3S-20200101-fv6.0.nc", "README.txt"]
+
+    assert extract_times_from_files(names) == [
+        ("2020-01-01T00:00:00Z", "2020-01-01T23:59:59Z"),
+        (None, None),
+    ]
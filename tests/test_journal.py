@@ -0,0 +1,53 @@
+import json
+
+from cci_tools.stac.journal import RecordJournal
+
+
+def _record(i: int) -> dict:
+    return {"_id": f"id{i}", "sort": [1000 + i, i]}
+
+
+def test_resume_after_crash(tmp_path):
+    path = str(tmp_path / "journal.ndjson")
+    journal = RecordJournal(path, sync_every=2)
+    for i in range(3):
+        journal.write("config_a", _record(i), f"file{i}.nc", "OK")
+    journal.write("config_b", _record(9), "other.nc", "Failed:IOError")
+    journal.close()
+
+    # A crash part way through writing the next line
+    with open(path, "a") as f:
+        f.write('{"config": "config_a", "id": "id3", "so')
+
+    resumed = RecordJournal(path, resume=True)
+    entries = resumed.completed("config_a")
+    assert [e["id"] for e in entries] == ["id0", "id1", "id2"]
+    assert resumed.completed("config_b")[0]["outcome"] == "Failed:IOError"
+    assert resumed.completed("config_c") == []
+
+    # The point-in-time tiebreaker is dropped from the restart position
+    assert resumed.resume_after("config_a") == [1002, -1]
+    assert resumed.resume_after("config_c") is None
+
+    resumed.write("config_a", _record(3), "file3.nc", "OK")
+    resumed.close()
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[-1])["id"] == "id3"
+
+
+def test_resume_without_journal(tmp_path):
+    journal = RecordJournal(str(tmp_path / "missing.ndjson"), resume=True)
+    assert journal.completed("config_a") == []
+    journal.close()
+
+
+def test_fresh_run_truncates(tmp_path):
+    path = str(tmp_path / "journal.ndjson")
+    journal = RecordJournal(path)
+    journal.write("config_a", _record(0), "file0.nc", "OK")
+    journal.close()
+
+    RecordJournal(path).close()
+    assert RecordJournal(path, resume=True).completed("config_a") == []
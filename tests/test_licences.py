@@ -0,0 +1,43 @@
+import requests
+
+from cci_tools.stac import create_record
+
+
+class _Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+def _use_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(create_record, "LICENCE_CACHE_FILE", str(tmp_path / "l.json"))
+    monkeypatch.setattr(create_record, "_licence_cache", {})
+
+
+def test_confirmed_licence_is_cached(monkeypatch, tmp_path):
+    _use_cache(monkeypatch, tmp_path)
+    monkeypatch.setattr(
+        requests,
+        "get",
+        lambda url, **kw: _Response(200 if "conditions.pdf" in url else 404),
+    )
+
+    url = create_record.get_licence("sst")
+    assert url.endswith("esacci_sst_terms_and_conditions.pdf")
+    assert create_record._read_licence_cache()["sst"]["url"] == url
+
+
+def test_unconfirmed_licence_is_not_saved(monkeypatch, tmp_path):
+    _use_cache(monkeypatch, tmp_path)
+
+    def unavailable(url, **kwargs):
+        raise requests.ConnectionError("artefacts server down")
+
+    monkeypatch.setattr(requests, "get", unavailable)
+
+    assert create_record.get_licence("sst").endswith("esacci_sst.pdf")
+    assert create_record._read_licence_cache() == {}
+
+    create_record._licence_cache.clear()
+    create_record.warm_licences(["sst"])
+    assert create_record._read_licence_cache() == {}
+    assert not create_record._licence_cache["sst"]["confirmed"]
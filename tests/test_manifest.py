@@ -0,0 +1,258 @@
+import copy
+import json
+import sqlite3
+
+import httpx
+
+from cci_tools.core.ratelimit import RateLimiter
+from cci_tools.core.transport import WriteTransport
+from cci_tools.stac import post_record as post_record_module
+from cci_tools.stac.manifest import PostManifest, item_hash
+from cci_tools.stac.post_record import post_batch
+
+ITEM = {
+    "type": "Feature",
+    "stac_version": "1.0.0",
+    "stac_extensions": [
+        "https://stac-extensions.github.io/projection/v1.1.0/schema.json"
+    ],
+    "id": "esacci.TEST.file-1",
+    "collection": "test",
+    "geometry": {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]],
+    },
+    "bbox": [0, 0, 10, 10],
+    "properties": {
+        "start_datetime": "2020-01-01T00:00:00Z",
+        "end_datetime": "2020-12-31T23:59:59Z",
+        "datetime": None,
+        "proj:epsg": 4326,
+        "created": "2026-01-01T00:00:00Z",
+    },
+    "assets": {
+        "data": {
+            "href": "https://dap.ceda.ac.uk/neodc/test/file-1.nc",
+            "roles": ["data"],
+        }
+    },
+    "links": [],
+}
+
+ITEMS = [dict(ITEM, id=f"item-{i}") for i in range(3)]
+
+
+def _api_response(item: dict) -> dict:
+    """
+    An item as returned by stac-fastapi, with links and timestamps it adds."""
+    live = copy.deepcopy(item)
+    base = "https://api.stac.ceda.ac.uk"
+    live["links"] = [
+        {"rel": "self", "href": f"{base}/collections/test/items/{item['id']}"},
+        {"rel": "parent", "href": f"{base}/collections/test"},
+        {"rel": "collection", "href": f"{base}/collections/test"},
+        {"rel": "root", "href": base},
+    ]
+    live["properties"]["updated"] = "2026-02-01T00:00:00Z"
+    live["properties"]["proj:code"] = "EPSG:4326"
+    live["assets"]["data"]["file:size"] = 1024
+    return live
+
+
+def _manifest(tmp_path, force: bool = False) -> PostManifest:
+    return PostManifest(str(tmp_path / "manifest.sqlite"), force=force)
+
+
+def test_unchanged_items_are_skipped(tmp_path):
+    manifest = _manifest(tmp_path)
+    digest = item_hash(ITEM)
+
+    assert not manifest.unchanged("test", ITEM["id"], digest)
+    manifest.record("test", ITEM["id"], digest, ITEM)
+    assert manifest.unchanged("test", ITEM["id"], digest)
+    assert not manifest.unchanged("test", ITEM["id"], "other")
+    assert manifest.skipped == 1
+
+
+def test_force_and_reopen(tmp_path):
+    manifest = _manifest(tmp_path)
+    manifest.record("test", ITEM["id"], item_hash(ITEM), ITEM)
+    manifest.close()
+
+    assert not _manifest(tmp_path, force=True).unchanged(
+        "test", ITEM["id"], item_hash(ITEM)
+    )
+    assert _manifest(tmp_path).unchanged("test", ITEM["id"], item_hash(ITEM))
+
+
+def test_forget_item_and_collection(tmp_path):
+    manifest = _manifest(tmp_path)
+    for i in range(3):
+        manifest.record("test", f"item-{i}", "hash")
+    manifest.record("other", "item-0", "hash")
+
+    manifest.forget("test", "item-0")
+    assert not manifest.unchanged("test", "item-0", "hash")
+    assert manifest.unchanged("test", "item-1", "hash")
+
+    manifest.forget("test")
+    assert manifest.collections() == ["other"]
+
+
+def test_verify_remote_ignores_fields_added_by_the_api(tmp_path):
+    manifest = _manifest(tmp_path)
+    manifest.record("test", ITEM["id"], item_hash(ITEM), ITEM)
+
+    drifted = manifest.verify_remote(lambda c, i: _api_response(ITEM), 10)
+
+    assert drifted == {}
+    assert manifest.collections() == ["test"]
+
+
+def test_verify_remote_detects_changed_and_missing_items(tmp_path):
+    manifest = _manifest(tmp_path)
+    manifest.record("test", ITEM["id"], item_hash(ITEM), ITEM)
+    manifest.record("other", ITEM["id"], item_hash(ITEM), ITEM)
+
+    def fetch_item(collection: str, item_id: str) -> dict | None:
+        if collection == "other":
+            return None
+        live = _api_response(ITEM)
+        live["properties"]["proj:epsg"] = 27700
+        return live
+
+    assert manifest.verify_remote(fetch_item, 10) == {"test": 1, "other": 1}
+    assert manifest.collections() == []
+
+
+def test_manifest_without_keys_is_upgraded(tmp_path):
+    db = sqlite3.connect(tmp_path / "manifest.sqlite")
+    db.execute(
+        "CREATE TABLE items (collection TEXT NOT NULL, id TEXT NOT NULL, "
+        "hash TEXT NOT NULL, posted REAL NOT NULL, PRIMARY KEY (collection, id)) "
+        "WITHOUT ROWID"
+    )
+    db.execute("INSERT INTO items VALUES ('test', 'a', 'hash', 0)")
+    db.commit()
+    db.close()
+
+    manifest = _manifest(tmp_path)
+    assert manifest.unchanged("test", "a", "hash")
+    assert manifest.sample("test", 10) == [("a", "hash", None)]
+
+
+def _post_batch(
+    tmp_path,
+    monkeypatch,
+    bulk_response: httpx.Response,
+    failing: str = None,
+    live: list = (),
+) -> tuple:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.method, request.url.path))
+        if request.url.path.endswith("/bulk_items"):
+            return bulk_response
+        if request.url.path.endswith("/search"):
+            ids = json.loads(request.content)["ids"]
+            features = [_api_response(i) for i in live if i["id"] in ids]
+            return httpx.Response(200, json={"features": features})
+        if failing is not None and json.loads(request.content)["id"] == failing:
+            return httpx.Response(400, json={})
+        return httpx.Response(201, json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    transport = WriteTransport(client, RateLimiter())
+    transport.configure(max_retries=0, adaptive=False)
+    monkeypatch.setattr(post_record_module, "stac_writes", transport)
+    monkeypatch.setattr(post_record_module, "client", client)
+    monkeypatch.setattr(post_record_module, "auth", None)
+
+    manifest = _manifest(tmp_path)
+    post_batch("test", ITEMS, {}, manifest=manifest)
+    recorded = [
+        i["id"] for i in ITEMS if manifest.unchanged("test", i["id"], item_hash(i))
+    ]
+    return requests, recorded
+
+
+def _outcomes(*statuses: int) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "items": [
+                {"id": f"item-{i}", "status": status}
+                for i, status in enumerate(statuses)
+            ]
+        },
+    )
+
+
+def test_confirmed_batch_is_recorded(tmp_path, monkeypatch):
+    requests, recorded = _post_batch(tmp_path, monkeypatch, _outcomes(201, 200, 201))
+
+    assert len(requests) == 1
+    assert recorded == ["item-0", "item-1", "item-2"]
+
+
+def test_only_failed_items_are_posted_again(tmp_path, monkeypatch):
+    requests, recorded = _post_batch(tmp_path, monkeypatch, _outcomes(201, 400, 201))
+
+    assert [m for m, _ in requests] == ["POST"] * 2
+    assert recorded == ["item-0", "item-1", "item-2"]
+
+
+def test_elasticsearch_style_outcomes():
+    response = httpx.Response(
+        200,
+        json={
+            "errors": True,
+            "items": [
+                {"index": {"_id": "item-0", "status": 201}},
+                {"index": {"_id": "item-1", "status": 409}},
+            ],
+        },
+    )
+
+    assert post_record_module._bulk_outcomes(response) == {
+        "item-0": 201,
+        "item-1": 409,
+    }
+
+
+def test_text_outcome_is_checked_by_reading_the_batch_back(tmp_path, monkeypatch):
+    response = httpx.Response(
+        200, json="Successfully added/updated 3 Items. 0 errors occurred."
+    )
+    changed = dict(ITEMS[2], bbox=[0, 0, 5, 5])
+    requests, recorded = _post_batch(
+        tmp_path, monkeypatch, response, live=[ITEMS[0], changed]
+    )
+
+    assert [p.rsplit("/", 1)[-1] for _, p in requests] == [
+        "bulk_items",
+        "search",
+        "items",
+        "items",
+    ]
+    assert recorded == ["item-0", "item-1", "item-2"]
+
+
+def test_items_failing_after_an_unconfirmed_batch_are_not_recorded(
+    tmp_path, monkeypatch
+):
+    response = httpx.Response(200, json={})
+    requests, recorded = _post_batch(tmp_path, monkeypatch, response, failing="item-1")
+
+    assert len(requests) == 5
+    assert recorded == ["item-0", "item-2"]
+
+
+def test_rejected_batch_is_not_read_back(tmp_path, monkeypatch):
+    requests, recorded = _post_batch(tmp_path, monkeypatch, httpx.Response(500))
+
+    assert [p.rsplit("/", 1)[-1] for _, p in requests] == ["bulk_items"] + [
+        "items"
+    ] * 3
+    assert recorded == ["item-0", "item-1", "item-2"]
@@ -0,0 +1,40 @@
+import h5py
+import numpy as np
+
+from cci_tools.readers.netcdf import read_netcdf_headers
+from cci_tools.readers.remote import fetch_stats
+
+
+def _write(path, lat_min: float):
+    with h5py.File(path, "w") as f:
+        f.attrs["time_coverage_start"] = "20200101T000000Z"
+        f.attrs["time_coverage_end"] = "20200131T235959Z"
+        f["lat"] = np.linspace(lat_min, lat_min + 10, 5)
+        f["lon"] = np.linspace(0, 20, 5)
+
+
+def test_headers_are_read_in_order_on_a_process_pool(tmp_path):
+    files = []
+    for i in range(6):
+        _write(tmp_path / f"f{i}.nc", float(i))
+        files.append(str(tmp_path / f"f{i}.nc"))
+    files.insert(2, None)
+    files.append(str(tmp_path / "missing.nc"))
+
+    headers = list(read_netcdf_headers(files, workers=2, queue_size=3))
+
+    assert len(headers) == 8
+    assert headers[2] is None
+    assert isinstance(headers[-1], Exception)
+    assert [h["bbox"][1] for h in headers[:2] + headers[3:-1]] == [0, 1, 2, 3, 4, 5]
+    assert headers[0]["start_datetime"].startswith("2020-01-01")
+
+
+def test_remote_reads_are_counted_in_the_parent(tmp_path):
+    _write(tmp_path / "a.nc", 0.0)
+    fetch_stats.drain()
+
+    headers = list(read_netcdf_headers([f"file://{tmp_path}/a.nc"], workers=1))
+
+    assert headers[0]["bbox"] == [0.0, 0.0, 20.0, 10.0]
+    assert fetch_stats.drain()
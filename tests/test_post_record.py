@@ -0,0 +1,32 @@
+import json
+
+from cci_tools.stac.post_record import _record_groups, _round_robin
+from cci_tools.stac.shards import ShardWriter
+
+
+def test_round_robin_takes_each_group_in_turn():
+    groups = [["a1", "a2", "a3"], ["b1"], [], ["c1", "c2"]]
+
+    assert list(_round_robin(groups)) == ["a1", "b1", "c1", "a2", "c2", "a3"]
+
+
+def test_record_groups_split_shards_and_files_by_collection(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    for i in range(3):
+        writer.write({"id": f"a{i}", "collection": "coll_a"})
+        writer.write({"id": f"b{i}", "collection": "coll_b"})
+    writer.close()
+
+    (tmp_path / "files").mkdir()
+    with open(tmp_path / "files" / "stac_c0.json", "w") as f:
+        json.dump({"id": "c0", "collection": "coll_c"}, f)
+
+    groups = _record_groups(str(tmp_path), None)
+    records = [
+        r["id"] if isinstance(r, dict) else r.rsplit("/", 1)[-1]
+        for r in _round_robin(groups)
+    ]
+
+    assert len(groups) == 3
+    assert records[:3] == ["stac_c0.json", "a0", "b0"]
+    assert records[3:] == ["a1", "b1", "a2", "b2"]
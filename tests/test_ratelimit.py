@@ -0,0 +1,57 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cci_tools.core.ratelimit import RateLimiter, artefacts_limiter
+from cci_tools.core.transport import stac_writes
+from cci_tools.stac import create_record
+
+
+def test_requests_are_spaced():
+    limiter = RateLimiter(50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_async_requests_are_spaced():
+    limiter = RateLimiter(50)
+
+    async def run():
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.aacquire() for _ in range(6)])
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 5 / 50 * 0.9
+
+
+def test_disabled_limit_still_holds():
+    limiter = RateLimiter()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start < 0.05
+
+    limiter.hold(0.1)
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def _worker_rates(_) -> tuple:
+    return artefacts_limiter.rate, stac_writes.controller.max_rate
+
+
+def test_pool_workers_share_the_limit():
+    artefacts_limiter.set_rate(8)
+    stac_writes.configure(max_rate=8)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=4,
+            initializer=create_record._init_pool_worker,
+            initargs=(1 / 4,),
+        ) as pool:
+            assert set(pool.map(_worker_rates, range(8))) == {(2, 2)}
+        assert artefacts_limiter.rate == 8
+    finally:
+        artefacts_limiter.set_rate(None)
+        stac_writes.configure()
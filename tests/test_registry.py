@@ -0,0 +1,115 @@
+import pytest
+
+from cci_tools.readers.registry import (
+    SIGNATURES,
+    Reader,
+    ReaderRegistry,
+    UnrecognisedFormat,
+)
+from cci_tools.readers.remote import fetch_stats
+
+
+class CountingRegistry(ReaderRegistry):
+    def __init__(self):
+        super().__init__()
+        self.sniffed = []
+
+    def _sniff(self, path: str) -> bytes | None:
+        self.sniffed.append(path.rsplit("/", 1)[-1])
+        return super()._sniff(path)
+
+
+def _registry() -> CountingRegistry:
+    registry = CountingRegistry()
+    registry.register(Reader("xarray", None, overrides=["xarray"]))
+    registry.register(
+        Reader(
+            "OpenSearch",
+            None,
+            extensions=[".nc"],
+            signatures=SIGNATURES["hdf5"] + SIGNATURES["netcdf3"],
+            opens_file=False,
+        )
+    )
+    registry.register(
+        Reader("GeoTIFF", None, extensions=[".tif"], signatures=SIGNATURES["tiff"])
+    )
+    return registry
+
+
+def _write(path, head: bytes):
+    path.write_bytes(head + b"\x00" * 64)
+
+
+def test_reader_is_sniffed_once_per_directory(tmp_path):
+    registry = _registry()
+    for name in ["a.tif", "b.tif", "c.tif"]:
+        _write(tmp_path / name, SIGNATURES["tiff"][0])
+
+    for name in ["a.tif", "b.tif", "c.tif"]:
+        assert registry.resolve(str(tmp_path), name).name == "GeoTIFF"
+    assert registry.sniffed == ["a.tif"]
+
+
+def test_misnamed_first_file_is_not_cached(tmp_path):
+    registry = _registry()
+    _write(tmp_path / "a.tif", SIGNATURES["hdf5"][0])
+    _write(tmp_path / "b.tif", SIGNATURES["tiff"][0])
+    _write(tmp_path / "c.tif", SIGNATURES["tiff"][1])
+
+    assert registry.resolve(str(tmp_path), "a.tif").name == "OpenSearch"
+    assert registry.resolve(str(tmp_path), "b.tif").name == "GeoTIFF"
+    assert registry.resolve(str(tmp_path), "c.tif").name == "GeoTIFF"
+    assert registry.sniffed == ["a.tif", "b.tif"]
+
+
+def test_fallback_for_misnamed_file_after_correct_ones(tmp_path):
+    registry = _registry()
+    _write(tmp_path / "a.tif", SIGNATURES["tiff"][0])
+    _write(tmp_path / "b.tif", SIGNATURES["netcdf3"][0])
+
+    geotiff = registry.resolve(str(tmp_path), "a.tif")
+    assert registry.resolve(str(tmp_path), "b.tif") is geotiff
+    assert registry.fallback(str(tmp_path), "b.tif", geotiff).name == "OpenSearch"
+    assert registry.fallback(str(tmp_path), "a.tif", geotiff) is None
+
+
+def test_prefetched_files_are_not_sniffed(tmp_path):
+    registry = _registry()
+    _write(tmp_path / "a.tif", SIGNATURES["tiff"][0])
+
+    assert registry.resolve(str(tmp_path), "a.tif", sniff=False).name == "GeoTIFF"
+    assert registry.sniffed == []
+
+
+def test_unknown_content_is_rejected(tmp_path):
+    registry = _registry()
+    _write(tmp_path / "a.tif", b"<html>")
+
+    with pytest.raises(UnrecognisedFormat):
+        registry.resolve(str(tmp_path), "a.tif")
+
+
+def test_unreadable_file_is_left_to_its_reader(tmp_path):
+    assert _registry().resolve(str(tmp_path), "missing.tif").name == "GeoTIFF"
+
+
+def test_override_and_unknown_extension(tmp_path):
+    registry = _registry()
+    _write(tmp_path / "a.tif", SIGNATURES["hdf5"][0])
+
+    xarray = registry.resolve(str(tmp_path), "a.tif", "xarray|kerchunk")
+    assert xarray.name == "xarray"
+    assert registry.fallback(str(tmp_path), "a.tif", xarray) is None
+    assert registry.sniffed == []
+    with pytest.raises(UnrecognisedFormat):
+        registry.resolve(str(tmp_path), "a.csv")
+
+
+def test_remote_sniff_is_counted(tmp_path):
+    _write(tmp_path / "a.tif", SIGNATURES["tiff"][0])
+    fetch_stats.drain()
+
+    _registry().resolve(f"file://{tmp_path}", "a.tif")
+
+    assert fetch_stats.drain() == [16]
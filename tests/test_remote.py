@@ -0,0 +1,28 @@
+import threading
+
+from cci_tools.readers.remote import FetchStats
+
+
+def test_no_samples_lost_while_draining():
+    stats = FetchStats()
+    start = threading.Barrier(9)
+    drained = []
+
+    def add():
+        start.wait()
+        for _ in range(5000):
+            stats.add(1)
+
+    def drain():
+        start.wait()
+        for _ in range(200):
+            drained.extend(stats.drain())
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    threads.append(threading.Thread(target=drain))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(drained) + len(stats.drain()) == 40000
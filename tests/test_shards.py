@@ -0,0 +1,101 @@
+import json
+import os
+import zlib
+
+import pytest
+
+from cci_tools.stac.journal import RecordJournal
+from cci_tools.stac.shards import SHARD_INDEX, ShardWriter, read_shards
+
+
+def _item(i: int, collection: str = "coll_a") -> dict:
+    return {"id": f"item{i}", "collection": collection, "properties": {"n": i}}
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_write_and_read(tmp_path, compression):
+    writer = ShardWriter(str(tmp_path), max_bytes=400, compression=compression)
+    for i in range(20):
+        writer.write(_item(i, "coll_a" if i % 2 else "coll_b"))
+    writer.close()
+
+    with open(tmp_path / "coll_a" / SHARD_INDEX) as f:
+        index = json.load(f)
+    assert len(index["shards"]) > 1
+    assert sum(s["items"] for s in index["shards"]) == 10
+
+    items = list(read_shards(str(tmp_path)))
+    assert sorted(i["id"] for i in items) == sorted(f"item{i}" for i in range(20))
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_resume_appends_new_shards(tmp_path, compression):
+    for run in range(2):
+        writer = ShardWriter(str(tmp_path), compression=compression, resume=True)
+        for i in range(5):
+            writer.write(_item(10 * run + i))
+        writer.close()
+
+    with open(tmp_path / "coll_a" / SHARD_INDEX) as f:
+        files = [s["file"] for s in json.load(f)["shards"]]
+    assert len(files) == 2 and files[0] != files[1]
+    assert len(list(read_shards(str(tmp_path)))) == 10
+
+
+def test_fresh_run_replaces_shards(tmp_path):
+    for run in range(2):
+        writer = ShardWriter(str(tmp_path), max_bytes=200)
+        for i in range(5):
+            writer.write(_item(10 * run + i))
+        writer.write(_item(run, "coll_b" if run == 0 else "coll_c"))
+        writer.close()
+
+    ids = sorted(i["id"] for i in read_shards(str(tmp_path)))
+    assert ids == sorted([f"item1{i}" for i in range(5)] + ["item0", "item1"])
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_sync_keeps_shard_open(tmp_path, compression):
+    writer = ShardWriter(str(tmp_path), compression=compression)
+    writer.write(_item(0))
+    writer.sync()
+    writer.write(_item(1))
+    writer.sync()
+    writer.write(_item(2))
+    writer.close()
+
+    with open(tmp_path / "coll_a" / SHARD_INDEX) as f:
+        shards = json.load(f)["shards"]
+    assert len(shards) == 1 and "open" not in shards[0]
+    assert [i["id"] for i in read_shards(str(tmp_path))] == ["item0", "item1", "item2"]
+    if compression == "gzip":
+        decompressor = zlib.decompressobj(wbits=31)
+        with open(tmp_path / "coll_a" / shards[0]["file"], "rb") as f:
+            decompressor.decompress(f.read())
+        assert decompressor.eof and decompressor.unused_data == b""
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_crash_keeps_journalled_items(tmp_path, compression):
+    journal = RecordJournal(str(tmp_path / "journal.ndjson"), sync_every=3)
+    writer = ShardWriter(str(tmp_path / "out"), compression=compression)
+    journal.add_sync_hook(writer.sync)
+    for i in range(5):
+        writer.write(_item(i))
+        journal.write("config", {"_id": f"item{i}", "sort": [i, 0]}, f"f{i}", "OK")
+
+    # Crash: items 3 and 4 are in the shard but neither synced nor journalled
+    writer._collections["coll_a"]["file"].flush()
+    resumed = RecordJournal(str(tmp_path / "journal.ndjson"), resume=True)
+    done = [e["id"] for e in resumed.completed("config")]
+    assert done == ["item0", "item1", "item2"]
+
+    writer = ShardWriter(str(tmp_path / "out"), compression=compression, resume=True)
+    for i in range(3, 5):
+        writer.write(_item(i))
+    writer.close()
+
+    shard_dir = tmp_path / "out" / "coll_a"
+    assert len([f for f in os.listdir(shard_dir) if f != SHARD_INDEX]) == 2
+    ids = [i["id"] for i in read_shards(str(tmp_path / "out"))]
+    assert ids == [f"item{i}" for i in range(5)]
@@ -0,0 +1,70 @@
+from cci_tools.readers import tileset
+from cci_tools.readers.geotiff import bbox_geometry
+from cci_tools.readers.tileset import TileSetInference
+
+
+def _info(x0: float, y0: float, epsg: int = 4326) -> dict:
+    transform = [0.1, 0.0, x0, 0.0, -0.1, y0]
+    bbox = [x0, y0 - 10, x0 + 10, y0]
+    geo_type, coordinates = bbox_geometry(*bbox)
+    return {
+        "platforms": ["sentinel-2"],
+        "drs": "esacci.TEST",
+        "format": "GeoTIFF",
+        "epsg": epsg,
+        "shape": [100, 100],
+        "transform": transform,
+        "properties": {"proj:transform": transform, "proj:epsg": epsg},
+        "start_datetime": "2020-01-01T00:00:00Z",
+        "end_datetime": "2020-12-31T23:59:59Z",
+        "version": "v1.0",
+        "bbox": bbox,
+        "geo_type": geo_type,
+        "coordinates": coordinates,
+    }
+
+
+def _fitted(epsg: int = 4326, verify_rate: float = 0.0) -> TileSetInference:
+    tiles = TileSetInference(sample_size=2, verify_rate=verify_rate)
+    tiles.observe("/data/TILE-N10E010.tif", _info(10.0, 10.0, epsg))
+    tiles.observe("/data/TILE-N20E020.tif", _info(20.0, 20.0, epsg))
+    return tiles
+
+
+def test_predict_derives_tile_from_filename():
+    tiles = _fitted()
+
+    info = tiles.predict("/data/TILE-N30E030.tif")
+
+    assert info["transform"][2] == 30.0
+    assert info["transform"][5] == 30.0
+    assert [round(v, 6) for v in info["bbox"]] == [30.0, 20.0, 40.0, 30.0]
+    assert tiles.derived == 1
+
+
+def test_predict_returns_none_when_reprojection_fails(monkeypatch):
+    tiles = _fitted()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("crs not found")
+
+    monkeypatch.setattr(tileset, "transform_bboxes", fail)
+    assert tiles.predict("/data/TILE-N30E030.tif") is None
+    assert tiles.derived == 0
+
+
+def test_unprojectable_samples_disable_inference():
+    tiles = _fitted(epsg=999999)
+
+    assert tiles.predict("/data/TILE-N30E030.tif") is None
+    assert tiles._directories[tiles._key("/data/TILE-N30E030.tif", {})].disabled
+
+
+def test_failed_verifying_read_is_discarded():
+    tiles = _fitted(verify_rate=1.0)
+
+    assert tiles.predict("/data/TILE-N30E030.tif") is None
+    assert "/data/TILE-N30E030.tif" in tiles._verify
+
+    tiles.discard("/data/TILE-N30E030.tif")
+    assert tiles._verify == {}
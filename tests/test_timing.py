@@ -0,0 +1,35 @@
+import threading
+
+from cci_tools.core.timing import StageTimer
+
+
+def test_concurrent_first_samples():
+    timer = StageTimer(enabled=True)
+    start = threading.Barrier(8)
+
+    def add(n: int):
+        start.wait()
+        for i in range(1000):
+            timer.add(f"stage{i % 10}", 0.001)
+
+    threads = [threading.Thread(target=add, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    summary = timer.summary()
+    assert len(summary) == 10
+    assert all(s["count"] == 800 for s in summary.values())
+
+
+def test_drain_and_merge():
+    worker, parent = StageTimer(enabled=True), StageTimer(enabled=True)
+    with worker.stage("read"):
+        pass
+    parent.add("read", 0.5)
+    parent.merge(worker.drain())
+
+    assert worker.summary() == {}
+    assert parent.summary()["read"]["count"] == 2
+    assert parent.summary()["read"]["max"] == 0.5
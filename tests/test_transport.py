@@ -0,0 +1,165 @@
+import asyncio
+import email.utils
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from cci_tools.core import transport
+from cci_tools.core.ratelimit import RateLimiter
+from cci_tools.core.transport import (
+    AIMDController,
+    WriteTransport,
+    _endpoint,
+    _LatencyFilter,
+    retry_after,
+)
+
+ITEMS = "https://api.stac.ceda.ac.uk/collections/test/items"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(
+        transport,
+        "time",
+        SimpleNamespace(
+            monotonic=clock.monotonic,
+            perf_counter=time.perf_counter,
+            sleep=time.sleep,
+            time=time.time,
+        ),
+    )
+    return clock
+
+
+def _transport(handler, **kwargs) -> WriteTransport:
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    writes = WriteTransport(client, RateLimiter(), backoff=0.01, max_backoff=1.0)
+    writes.configure(**kwargs)
+    return writes
+
+
+def test_retry_after_seconds_and_dates():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "2.5"})) == 2.5
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "-1"})) == 0.0
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+    assert retry_after(httpx.Response(429)) is None
+
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    wait = retry_after(httpx.Response(503, headers={"Retry-After": date}))
+    assert 25 < wait <= 30
+
+
+def test_endpoints_leave_out_ids():
+    assert _endpoint("POST", ITEMS) == "POST /collections/*/items"
+    assert _endpoint("PUT", f"{ITEMS}/a.b") == "PUT /collections/*/items/*"
+    assert (
+        _endpoint("POST", "https://api/collections/x/bulk_items")
+        == "POST /collections/*/bulk_items"
+    )
+
+
+def test_throttled_request_is_retried_after_the_requested_wait():
+    responses = iter(
+        [httpx.Response(429, headers={"Retry-After": "0.2"}), httpx.Response(201)]
+    )
+    writes = _transport(lambda request: next(responses), max_rate=100)
+
+    start = time.monotonic()
+    response = writes.post(ITEMS, json={})
+
+    assert response.status_code == 201
+    assert time.monotonic() - start >= 0.2
+    assert writes.drain_counts() == (2, 1, 0)
+    assert writes.controller.decreases == 1
+    assert writes.controller.rate < 100
+
+
+def test_last_response_returned_after_max_retries():
+    writes = _transport(lambda request: httpx.Response(503), max_retries=2)
+
+    assert writes.put(f"{ITEMS}/a", json={}).status_code == 503
+    assert writes.drain_counts() == (3, 2, 1)
+
+
+def test_async_requests_go_through_the_controller():
+    writes = _transport(lambda request: httpx.Response(201), max_concurrency=2)
+
+    async def run():
+        aclient = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(201))
+        )
+        async with aclient:
+            return await asyncio.gather(
+                *[writes.apost(aclient, ITEMS, json={}) for _ in range(5)]
+            )
+
+    assert [r.status_code for r in asyncio.run(run())] == [201] * 5
+    assert writes.controller._in_flight == 0
+
+
+def test_latency_baseline_decays():
+    latency = _LatencyFilter(window=60)
+
+    assert latency.add(0, 0.01) == 0.01
+    for t in range(1, 30):
+        assert latency.add(t, 0.5) == 0.01
+    assert latency.add(61, 0.5) > 0.1
+
+
+def test_fast_refusals_do_not_set_the_baseline(monkeypatch):
+    clock = _clock(monkeypatch)
+    controller = AIMDController(RateLimiter(), max_rate=10)
+    created = httpx.Response(201)
+
+    for _ in range(20):
+        clock.now += 0.1
+        controller.observe(0.3, created, "POST /collections/*/items")
+    for _ in range(20):
+        clock.now += 0.1
+        controller.observe(0.005, httpx.Response(409), "POST /collections/*/items")
+        controller.observe(0.3, created, "PUT /collections/*/items/*")
+    clock.now += 0.1
+    controller.observe(0.3, created, "POST /collections/*/items")
+
+    assert controller.decreases == 0
+
+
+def test_latency_does_not_lower_rate_below_throughput(monkeypatch):
+    clock = _clock(monkeypatch)
+    controller = AIMDController(RateLimiter(), max_rate=50)
+    ok = httpx.Response(201)
+
+    for _ in range(50):
+        clock.now += 0.05
+        controller.observe(0.05, ok, "POST /collections/*/items")
+    for _ in range(10):
+        clock.now += 0.05
+        controller.observe(2.0, ok, "POST /collections/*/items")
+
+    assert controller.decreases == 1
+    assert controller.rate >= 19.0
+    assert controller.limiter.rate == controller.rate
+
+
+def test_throttling_halves_rate(monkeypatch):
+    clock = _clock(monkeypatch)
+    controller = AIMDController(RateLimiter(), max_rate=50)
+
+    for _ in range(50):
+        clock.now += 0.05
+        controller.observe(0.05, httpx.Response(201), "POST /collections/*/items")
+    clock.now += 0.05
+    controller.observe(0.05, httpx.Response(429), "POST /collections/*/items")
+
+    assert controller.decreases == 1
+    assert controller.rate < 11
@@ -0,0 +1,118 @@
+from cci_tools.core import utils
+from cci_tools.core.utils import resolve_files, scan_index
+
+
+class FakeES:
+    """
+    Elasticsearch client answering point-in-time searches and multi-searches from
+    a list of documents, recording the requests made."""
+
+    def __init__(self, docs: list):
+        self.docs = docs
+        self.searches = []
+        self.msearches = []
+        self.closed = []
+
+    def open_point_in_time(self, index: str, keep_alive: str) -> dict:
+        return {"id": "pit-0"}
+
+    def close_point_in_time(self, body: dict):
+        self.closed.append(body["id"])
+
+    def search(self, body: dict) -> dict:
+        self.searches.append(body)
+        start = 0
+        if "search_after" in body:
+            start = body["search_after"][-1] + 1
+        hits = [
+            {"_id": doc["id"], "_source": doc, "sort": [doc["name"], i]}
+            for i, doc in enumerate(self.docs)
+        ][start : start + body["size"]]
+        return {"pit_id": f"pit-{len(self.searches)}", "hits": {"hits": hits}}
+
+    def msearch(self, body: list) -> dict:
+        self.msearches.append(body)
+        responses = []
+        for query in body[1::2]:
+            must = query["query"]["bool"]["must"]
+            name = must[0]["term"]["info.name"]
+            if name == "broken.nc":
+                responses.append({"error": {"type": "search_phase_exception"}})
+                continue
+            hits = [
+                {"_id": d["id"], "_source": d} for d in self.docs if d["name"] == name
+            ]
+            responses.append({"hits": {"hits": hits[:1]}})
+        return {"responses": responses}
+
+
+def _docs(n: int) -> list:
+    return [{"id": f"doc{i}", "name": f"file{i:03d}.nc"} for i in range(n)]
+
+
+def test_scan_index_pages_through_a_point_in_time(monkeypatch):
+    es = FakeES(_docs(25))
+    monkeypatch.setattr(utils, "es_client", es)
+
+    body = {"query": {"match_all": {}}, "sort": [{"info.name": "asc"}]}
+    hits = list(scan_index(body, page_size=10))
+
+    assert [h["_id"] for h in hits] == [f"doc{i}" for i in range(25)]
+    assert len(es.searches) == 3
+    assert all(s["sort"][-1] == {"_shard_doc": "asc"} for s in es.searches)
+    assert all(s["sort"][0] == {"info.name": "asc"} for s in es.searches)
+    # Each page uses the PIT id returned with the previous page
+    assert [s["pit"]["id"] for s in es.searches] == ["pit-0", "pit-1", "pit-2"]
+    assert [s.get("search_after") for s in es.searches] == [
+        None,
+        ["file009.nc", 9],
+        ["file019.nc", 19],
+    ]
+    assert es.closed == ["pit-3"]
+
+
+def test_scan_index_without_prefetch_stops_on_a_full_last_page(monkeypatch):
+    es = FakeES(_docs(20))
+    monkeypatch.setattr(utils, "es_client", es)
+
+    hits = list(scan_index({"query": {}}, page_size=10, prefetch=False))
+
+    assert len(hits) == 20
+    assert len(es.searches) == 3
+    assert es.closed == ["pit-3"]
+
+
+def test_scan_index_closes_the_point_in_time_when_abandoned(monkeypatch):
+    es = FakeES(_docs(25))
+    monkeypatch.setattr(utils, "es_client", es)
+
+    scan = scan_index({"query": {}}, page_size=10)
+    next(scan)
+    scan.close()
+
+    assert es.closed == ["pit-1"]
+
+
+def test_resolve_files_batches_msearch_requests(monkeypatch):
+    es = FakeES(_docs(5))
+    monkeypatch.setattr(utils, "es_client", es)
+
+    files = [
+        "/neodc/a/file000.nc",
+        "missing.nc",
+        "file003.nc",
+        "broken.nc",
+        "/neodc/b/file004.nc",
+    ]
+    resolved, missing = resolve_files(files, batch_size=2)
+
+    assert [len(body) for body in es.msearches] == [4, 4, 2]
+    assert [(f, hit["_id"]) for f, hit in resolved] == [
+        ("/neodc/a/file000.nc", "doc0"),
+        ("file003.nc", "doc3"),
+        ("/neodc/b/file004.nc", "doc4"),
+    ]
+    assert missing == ["missing.nc", "broken.nc"]
+    header, query = es.msearches[0][:2]
+    assert header == {"index": "opensearch-files"}
+    assert {"term": {"info.directory": "/neodc/a"}} in query["query"]["bool"]["must"]